@@ -32,4 +32,8 @@ app.conf.beat_schedule = {
         'task': 'scrap_emploi.tasks.scrape_offre_emploi_sn_periodic',
         'schedule': 30 * 60,  # 30 minutes in seconds
     },
+    'refresh-offers-every-night': {
+        'task': 'scrap_emploi.tasks.refresh_offers_periodic',
+        'schedule': crontab(hour=3, minute=0),  # every day at 3:00
+    },
 } 
\ No newline at end of file
@@ -86,6 +86,19 @@ DATABASES = {
        }
    }
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Cache fichier partagé entre le serveur web et les workers Celery (qui préchauffent les pages) ;
+# 'django.core.cache.backends.redis.RedisCache' (LOCATION 'redis://...') pour plusieurs serveurs,
+# 'django.core.cache.backends.locmem.LocMemCache' pour un seul processus sans préchauffage
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+    }
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -175,3 +188,75 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC'
 CELERY_BROKER_CONNECTION_RETRY_ON_STARTUP = True
+
+# Scraping
+# Durée (en secondes) pendant laquelle les données d'une source sont considérées fraîches
+SCRAP_FRESHNESS_WINDOW = 30 * 60
+# Durée (en secondes) au-delà de laquelle une actualisation demandée mais non terminée est relancée
+SCRAP_REFRESH_LOCK_TIMEOUT = 15 * 60
+# Nombre de threads du moteur de téléchargement des pages de détail
+SCRAP_FETCH_WORKERS = 8
+# Nombre maximal de requêtes simultanées vers un même site
+SCRAP_FETCH_PER_HOST = 4
+# Délai d'attente par défaut (en secondes) de toutes les requêtes de scraping
+SCRAP_HTTP_TIMEOUT = 30
+# Nombre de relances sur erreur réseau, délai dépassé, 429 et 5xx
+SCRAP_HTTP_RETRIES = 3
+# Facteur de l'attente exponentielle entre deux relances (1s, 2s, 4s, ...)
+SCRAP_HTTP_BACKOFF = 1.0
+# Nombre de connexions persistantes conservées par site
+SCRAP_HTTP_POOL_SIZE = 10
+# Débit autorisé par site : requêtes par seconde ('rate') et rafale ('burst')
+SCRAP_RATE_LIMITS = {
+    'default': {'rate': 1.0, 'burst': 2},
+    'emploidakar.com': {'rate': 1.0, 'burst': 3},
+    'emploisenegal.com': {'rate': 2.0, 'burst': 4},
+    'senjob.com': {'rate': 0.5, 'burst': 2},
+    'offre-emploi.sn': {'rate': 0.5, 'burst': 2},
+}
+# Stockage de l'état du limiteur : 'database' (partagé entre workers) ou 'memory'
+SCRAP_RATE_LIMIT_BACKEND = 'database'
+# Détection des offres déjà connues : 'database' (requêtes groupées par page)
+# ou 'hash' (empreintes 64 bits chargées en mémoire au démarrage)
+SCRAP_SEEN_STORE = 'database'
+# Taille des files entre les étages du pipeline (listing, détail, analyse, écriture)
+SCRAP_PIPELINE_QUEUE_SIZE = 100
+# Nombre d'offres écrites en base par lot
+SCRAP_PIPELINE_BATCH_SIZE = 50
+# Délai (en secondes) sans nouvelle offre au-delà duquel le lot en cours est écrit
+SCRAP_PIPELINE_FLUSH_INTERVAL = 2.0
+# Nombre de pages de listing préchargées en parallèle lorsque le nombre de pages est connu (0 : aucune)
+SCRAP_LISTING_PREFETCH = 3
+# Analyseur HTML de BeautifulSoup : 'lxml' (en C, rapide) ou 'html.parser' (pur Python, repli automatique)
+SCRAP_HTML_PARSER = 'lxml'
+# Analyse partielle des pages de détail : seuls les sous-arbres utiles (description...) sont construits
+SCRAP_PARTIAL_PARSING = True
+# Nombre de processus analysant les pages de détail hors du processus principal (0 : analyse dans le pipeline)
+SCRAP_PARSE_PROCESSES = 0
+# Mode de rafraîchissement des offres déjà en base : 'cartes' (détail récupéré si la carte a changé) ou 'complet'
+SCRAP_REFRESH_MODE = 'cartes'
+# Requêtes conditionnelles (If-None-Match / If-Modified-Since, empreinte du contenu à défaut) : les pages
+# inchangées depuis la dernière collecte ne sont pas analysées
+SCRAP_CONDITIONAL_REQUESTS = True
+# Archive des pages brutes récupérées (listes et détails, compressées) pour les réanalyser hors ligne
+# avec la commande reparse_archive (None : pas d'archivage)
+SCRAP_ARCHIVE_DIR = BASE_DIR / 'archive'
+# Durée (en secondes) de mise en cache du nombre d'offres affiché par les listes
+SCRAP_COUNT_CACHE_TIMEOUT = 5 * 60
+# Nombre de lignes au-delà duquel l'estimation de MySQL remplace le COUNT(*) exact
+SCRAP_EXACT_COUNT_LIMIT = 100000
+# Niveau de compression zlib (1 à 9) des descriptions HTML stockées dans les tables de contenu (0 : non compressées)
+SCRAP_CONTENT_COMPRESSION_LEVEL = 6
+# Cache des pages de liste et de détail (alias de CACHES), invalidé par la version de chaque source
+SCRAP_PAGE_CACHE = 'default'
+# Durée (en secondes) de conservation d'une page en cache (0 : pas de cache)
+SCRAP_PAGE_CACHE_TIMEOUT = 24 * 60 * 60
+# Nombre de pages de liste de chaque source mises en cache à la fin de chaque collecte (0 : aucune)
+SCRAP_PREWARM_PAGES = 3
+# Hôte des requêtes de préchauffage
+SCRAP_PREWARM_HOST = 'localhost'
+# Nombre maximal de pages de résultats d'une recherche (les pages lointaines coûtent un classement plus long)
+SCRAP_SEARCH_MAX_PAGE = 10
+# Nombre d'offres classées par pertinence : les offres indexées le plus récemment parmi celles contenant
+# les mots recherchés (les pages de résultats au-delà classent toutes les offres trouvées)
+SCRAP_SEARCH_RANK_WINDOW = 5000
@@ -21,6 +21,9 @@ from scrap_emploi import views
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', views.home, name='home'),
+
+    path('offres/', views.offres_list, name='offres_list'),
+    path('recherche/', views.recherche, name='recherche'),
     
     path('emplois-senegal/', views.emplois_senegal_list, name='emplois_senegal_list'),
     path('emplois-senegal/<int:emploi_id>/', views.emploi_senegal_detail, name='emploi_senegal_detail'),
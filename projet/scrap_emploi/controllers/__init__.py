@@ -1,6 +1,36 @@
+from . import emploidakarController, emploisenegalController, senjobController, offreEmploiSNController
 from .emploisenegalController import scrape_emplois
 from .emploidakarController import scrape_emplois_dakar
 from .senjobController import scrape_senjob
 from .offreEmploiSNController import scrape_offre_emploi_sn
+from ..models import EmploiDakar, EmploiSenegal, SenjobModel, OffreEmploiSN
 
-__all__ = ['scrape_emplois', 'scrape_emplois_dakar', 'scrape_senjob', 'scrape_offre_emploi_sn']
\ No newline at end of file
+# Fonctions d'analyse de chaque source (find_cards, parse_listing_card, parse_card_details,
+# parse_offer_detail), indexées par CrawlState.SOURCE_*
+SOURCE_MODULES = {
+    'emploidakar': emploidakarController,
+    'emploisenegal': emploisenegalController,
+    'senjob': senjobController,
+    'offre_emploi_sn': offreEmploiSNController,
+}
+
+# Modèle des offres de chaque source
+SOURCE_MODELS = {
+    'emploidakar': EmploiDakar,
+    'emploisenegal': EmploiSenegal,
+    'senjob': SenjobModel,
+    'offre_emploi_sn': OffreEmploiSN,
+}
+
+# Fonction de collecte de chaque source (paramètre refresh pour le mode rafraîchissement)
+SOURCE_SCRAPERS = {
+    'emploidakar': scrape_emplois_dakar,
+    'emploisenegal': scrape_emplois,
+    'senjob': scrape_senjob,
+    'offre_emploi_sn': scrape_offre_emploi_sn,
+}
+
+__all__ = [
+    'scrape_emplois', 'scrape_emplois_dakar', 'scrape_senjob', 'scrape_offre_emploi_sn',
+    'SOURCE_MODULES', 'SOURCE_MODELS', 'SOURCE_SCRAPERS',
+]
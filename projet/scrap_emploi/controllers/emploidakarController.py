@@ -1,200 +1,330 @@
 import requests
-from bs4 import BeautifulSoup
+import soupsieve
+from ..models.crawlStateModel import CrawlState
 from ..models.emploidakarModel import EmploiDakar
+from ..utils import httpClient
+from ..utils.crawlWatermark import Watermark, is_featured
+from ..utils.extractor import Extractor, Field, attr, html, stripped_text
+from ..utils.fetchEngine import PagePrefetcher
+from ..utils.fingerprint import RefreshChecker
+from ..utils.htmlParser import class_strainer, make_soup
+from ..utils.pageArchive import KIND_LISTING, archive_page
+from ..utils.pipeline import OfferPipeline
+from ..utils.seenStore import get_seen_store
+from ..utils.textNormalizer import normalize_title
+import functools
 import json
 import logging
 from django.utils import timezone
 from datetime import datetime, timedelta
 from django.shortcuts import render, get_object_or_404
-import time
 
 logger = logging.getLogger(__name__)
 
-def scrape_emplois_dakar():
-    # Headers pour simuler un navigateur réel
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/93.0.4577.82 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'fr,fr-FR;q=0.8,en-US;q=0.5,en;q=0.3',
-        'Connection': 'keep-alive',
-        'Upgrade-Insecure-Requests': '1',
+# Colonnes indexées identifiant une offre déjà en base (voir utils.seenStore)
+SEEN_KEYS = ('lien_offre', 'reference', 'titre_normalise')
+
+# Seul sous-arbre utile d'une page de détail
+DETAIL_STRAINER = class_strainer('job_description')
+
+
+def aware_datetime(value):
+    return timezone.make_aware(datetime.fromisoformat(value))
+
+
+# Sélecteurs des cartes et des pages de détail, compilés une seule fois
+CARDS = soupsieve.compile('li.job_listing')
+LISTING_CARD = Extractor(
+    titre=Field('.position h3', stripped_text, default="Sans titre"),
+    lien_offre=Field('a', attr('href')),
+    date_publication=Field('.meta time', attr('datetime'), aware_datetime),
+)
+CARD_DETAILS = Extractor(
+    entreprise=Field('.company strong', stripped_text, default="Entreprise non spécifiée"),
+    localisation=Field('.location', stripped_text, default="Lieu non spécifié"),
+    type_contrat=Field('.meta .job-type', stripped_text, default="Type non spécifié"),
+)
+# La description conserve sa structure HTML
+DETAIL_PAGE = Extractor(
+    description_poste=Field('.job_description', html, default=""),
+)
+
+# URL de l'API AJAX de WP Job Manager
+API_URL = "https://www.emploidakar.com/jm-ajax/get_listings/"
+
+def listing_request(page, conditional=False):
+    """Requête AJAX d'une page de la liste des offres (conditionnelle : voir httpClient.request)."""
+    # Paramètres de la requête AJAX
+    data = {
+        'page': page,
+        'per_page': 25,
+        'orderby': 'date',
+        'order': 'DESC',
+        'featured': None,
+        'filled': None,
+        'job_types': [],
+        'search_categories': [],
+        'search_keywords': '',
+        'search_location': ''
     }
+    return 'POST', API_URL, {'data': data, 'conditional': conditional}
+
+def scrape_emplois_dakar(refresh=None):
+    """
+    Collecte les nouvelles offres d'EmploiDakar.
     
-    # URL de l'API AJAX de WP Job Manager
-    api_url = "https://www.emploidakar.com/jm-ajax/get_listings/"
+    refresh: 'cartes' ou 'complet' pour recontrôler aussi les offres déjà en base (voir utils.fingerprint) ;
+    la liste est alors parcourue en entier
+    """
     page = 1
-    new_offers_count = 0
     existing_offers_count = 0
     consecutive_existing_offers = 0
     max_consecutive_existing = 40  # Arrêter après 15 offres consécutives déjà existantes
     
-    # Récupérer tous les liens d'offres et titres existants une seule fois au début
-    existing_offers = set(EmploiDakar.objects.values_list('lien_offre', flat=True))
-    existing_references = set(EmploiDakar.objects.values_list('reference', flat=True))
-    existing_titles = set(EmploiDakar.objects.values_list('titre', flat=True))
+    # Détection des offres déjà en base par référence, lien et titre
+    seen = get_seen_store(EmploiDakar, SEEN_KEYS)
+    
+    # Repère de la dernière collecte complète : la liste est triée par date décroissante
+    watermark = Watermark(CrawlState.SOURCE_EMPLOIDAKAR)
+    watermark_reached = False
+    crawl_complete = False
+    # Validateurs des pages de liste traitées, enregistrés en fin de collecte
+    listing_validators = []
+    
+    # Mode rafraîchissement : les offres connues dont la carte a changé sont récupérées à nouveau
+    checker = RefreshChecker(EmploiDakar, refresh) if refresh else None
     
     logger.info("Démarrage du scraping EmploiDakar...")
-    logger.info(f"Nombre d'offres déjà en base: {len(existing_offers)}")
+    logger.info(f"Détection des doublons: {seen}, {checker or watermark}")
     
-    while True:
-        logger.info(f"Traitement de la page {page}")
-        
-        # Paramètres de la requête AJAX
-        data = {
-            'page': page,
-            'per_page': 25,
-            'orderby': 'date',
-            'order': 'DESC',
-            'featured': None,
-            'filled': None,
-            'job_types': [],
-            'search_categories': [],
-            'search_keywords': '',
-            'search_location': ''
-        }
-        
-        try:
-            # Faire la requête HTTP avec un délai
-            time.sleep(2)  # Attendre 2 secondes entre chaque requête
-            response = requests.post(api_url, headers=headers, data=data, timeout=30)
-            logger.info(f"Statut de la réponse API: {response.status_code}")
-            
-            if response.status_code != 200:
-                logger.error("Échec de la récupération des offres depuis l'API")
-                break
+    # Les pages de listing suivantes sont préchargées dès que leur nombre est connu ;
+    # les pages de détail sont récupérées, analysées et écrites en parallèle du parcours des listes
+    # Hors rafraîchissement, une page de listing inchangée depuis la dernière collecte arrête le parcours
+    build_request = functools.partial(listing_request, conditional=not checker)
+    with OfferPipeline(EmploiDakar, parse_offer_detail, source=CrawlState.SOURCE_EMPLOIDAKAR) as pipeline, PagePrefetcher(build_request) as listings:
+        while True:
+            logger.info(f"Traitement de la page {page}")
             
             try:
-                # Parser la réponse JSON
-                json_data = response.json()
+                # Récupérer la page (les suivantes sont préchargées, le débit est régulé par le limiteur de httpClient)
+                response = listings.get(page)
+                logger.info(f"Statut de la réponse API: {response.status_code}")
                 
-                if not json_data.get('html'):
-                    logger.info("Aucun contenu HTML trouvé dans la réponse JSON")
+                if response.not_modified:
+                    logger.info(f"Page {page} inchangée depuis la dernière collecte, aucune nouvelle offre")
+                    crawl_complete = True
                     break
                 
-                # Parser le HTML contenu dans la réponse JSON
-                soup = BeautifulSoup(json_data['html'], 'html.parser')
-                job_listings = soup.select('li.job_listing')
-                logger.info(f"Nombre d'offres trouvées sur la page {page}: {len(job_listings)}")
-                
-                if not job_listings:
-                    logger.info("Aucune offre trouvée sur cette page")
+                if response.status_code != 200:
+                    logger.error("Échec de la récupération des offres depuis l'API")
                     break
                 
-                page_has_new_offers = False
-                
-                # Extraire les détails de chaque offre
-                for job in job_listings:
-                    try:
-                        # Extraire d'abord le titre pour vérification
-                        titre_elem = job.select_one('.position h3')
-                        titre = titre_elem.text.strip() if titre_elem else "Sans titre"
-                        
-                        lien_elem = job.select_one('a')
-                        if not lien_elem or 'href' not in lien_elem.attrs:
+                try:
+                    # Parser la réponse JSON
+                    json_data = response.json()
+                    listings.set_last_page(int(json_data.get('max_num_pages', 1)))
+                    
+                    if not json_data.get('html'):
+                        logger.info("Aucun contenu HTML trouvé dans la réponse JSON")
+                        crawl_complete = True
+                        break
+                    
+                    # Parser le HTML contenu dans la réponse JSON
+                    soup = make_soup(json_data['html'])
+                    job_listings = find_cards(soup)
+                    logger.info(f"Nombre d'offres trouvées sur la page {page}: {len(job_listings)}")
+                    
+                    if not job_listings:
+                        logger.info("Aucune offre trouvée sur cette page")
+                        crawl_complete = True
+                        break
+                    
+                    page_has_new_offers = False
+                    
+                    # Extraire d'abord le titre, le lien et la référence de chaque offre pour vérification
+                    page_cards = []
+                    for job in job_listings:
+                        try:
+                            carte = parse_listing_card(job)
+                            if carte is None:
+                                continue
+                                
+                            keys = {
+                                'lien_offre': carte['lien_offre'],
+                                'reference': carte['reference'],
+                                'titre_normalise': normalize_title(carte['titre']),
+                            }
+                            page_cards.append((job, carte, keys))
+                        except Exception as e:
+                            logger.error(f"Erreur lors du traitement d'une offre: {str(e)}")
                             continue
+                    
+                    # Une seule vérification en base pour toutes les offres de la page
+                    seen.prefetch([keys for _, _, keys in page_cards])
+                    if checker:
+                        checker.prefetch([carte['lien_offre'] for _, carte, _ in page_cards])
+                    
+                    # Extraire les détails de chaque offre
+                    for job, carte, keys in page_cards:
+                        try:
+                            titre = carte['titre']
+                            lien_offre = carte['lien_offre']
+                            reference = carte['reference']
+                            date_carte = carte['date_publication']
                             
-                        lien_offre = lien_elem['href']
-                        reference = lien_offre.split('/')[-2]
-                        
-                        # Vérification rapide par référence, lien et titre
-                        if (reference in existing_references or 
-                            lien_offre in existing_offers or 
-                            titre.lower() in [t.lower() for t in existing_titles]):
+                            # Arrêt dès que l'on atteint le repère de la précédente collecte complète
+                            if not is_featured(job):
+                                if not checker and watermark.reached(date_carte, reference, lien_offre):
+                                    logger.info(f"Repère de collecte atteint sur l'offre {titre}")
+                                    watermark_reached = True
+                                    break
+                                watermark.observe(date_carte, reference, lien_offre)
                             
-                            logger.debug(f"Offre déjà existante: {titre} ({lien_offre})")
-                            existing_offers_count += 1
-                            consecutive_existing_offers += 1
-                            continue
-                        else:
-                            # Réinitialiser le compteur d'offres consécutives existantes
-                            consecutive_existing_offers = 0
-                            page_has_new_offers = True
-                            
-                        # Extraire les autres informations seulement si c'est une nouvelle offre
-                        entreprise_elem = job.select_one('.company strong')
-                        entreprise = entreprise_elem.text.strip() if entreprise_elem else "Entreprise non spécifiée"
-                        
-                        localisation_elem = job.select_one('.location')
-                        localisation = localisation_elem.text.strip() if localisation_elem else "Lieu non spécifié"
-                        
-                        type_contrat_elem = job.select_one('.meta .job-type')
-                        type_contrat = type_contrat_elem.text.strip() if type_contrat_elem else "Type non spécifié"
-                        
-                        date_elem = job.select_one('.meta time')
-                        if date_elem and 'datetime' in date_elem.attrs:
-                            date_publication = datetime.fromisoformat(date_elem['datetime'])
-                            date_publication = timezone.make_aware(date_publication)
-                        else:
-                            date_publication = timezone.now()
-                        
-                        # Extraire la description détaillée de l'offre
-                        time.sleep(1)  # Attendre 1 seconde avant de récupérer les détails
-                        job_detail_response = requests.get(lien_offre, headers=headers)
-                        if job_detail_response.status_code == 200:
-                            job_detail_soup = BeautifulSoup(job_detail_response.content, 'html.parser')
-                            job_description_elem = job_detail_soup.select_one('.job_description')
-                            if job_description_elem:
-                                # Conserver la structure HTML
-                                job_description = str(job_description_elem)
-                                logger.info(f"Description extraite pour l'offre {titre} ({len(job_description)} caractères)")
+                            # Vérification rapide par référence, lien et titre
+                            if seen.contains(keys):
+                                
+                                logger.debug(f"Offre déjà existante: {titre} ({lien_offre})")
+                                existing_offers_count += 1
+                                consecutive_existing_offers += 1
+                                # Mode rafraîchissement : offre renvoyée au pipeline si sa carte a changé
+                                if checker:
+                                    offre = build_offer(job, carte)
+                                    if checker.needs_refresh(offre):
+                                        pipeline.put(offre, refresh=True)
+                                continue
                             else:
-                                job_description = ""
-                                logger.warning(f"Pas de description trouvée pour l'offre {titre}")
-                        else:
-                            job_description = ""
-                            logger.error(f"Impossible d'accéder aux détails de l'offre {titre}")
-                        
-                        # Créer la nouvelle offre
-                        nouvelle_offre = EmploiDakar.objects.create(
-                            titre=titre,
-                            description_poste=job_description,
-                            entreprise=entreprise,
-                            localisation=localisation,
-                            type_contrat=type_contrat,
-                            date_publication=date_publication,
-                            lien_offre=lien_offre,
-                            reference=reference
-                        )
-                        
-                        # Ajouter aux ensembles d'offres existantes pour éviter les doublons dans la même session
-                        existing_offers.add(lien_offre)
-                        existing_references.add(reference)
-                        existing_titles.add(titre)
-                        
-                        new_offers_count += 1
-                        logger.info(f"Nouvelle offre ajoutée: {titre}")
-                        
-                    except Exception as e:
-                        logger.error(f"Erreur lors du traitement d'une offre: {str(e)}")
-                        continue
-                
-                # Arrêter si on a trouvé trop d'offres consécutives déjà existantes
-                if consecutive_existing_offers >= max_consecutive_existing:
-                    logger.info(f"Arrêt du scraping après {consecutive_existing_offers} offres consécutives déjà existantes")
-                    break
-                
-                # Si la page ne contient que des offres déjà existantes, on peut considérer 
-                # qu'on a probablement déjà tout ce qui est récent
-                if not page_has_new_offers and existing_offers_count > 0:
-                    logger.info("Page ne contenant que des offres déjà existantes, passage à la page suivante")
-                
-                # Vérifier s'il y a une page suivante
-                if page >= int(json_data.get('max_num_pages', 1)):
-                    logger.info("Plus de pages à scraper")
+                                # Réinitialiser le compteur d'offres consécutives existantes
+                                consecutive_existing_offers = 0
+                                page_has_new_offers = True
+                                
+                            # Extraire les autres informations seulement si c'est une nouvelle offre,
+                            # puis envoyer l'offre au pipeline (détail, analyse, écriture)
+                            pipeline.put(build_offer(job, carte))
+                            
+                            # Mémoriser l'offre pour éviter les doublons dans la même session
+                            seen.add(keys)
+                            
+                        except Exception as e:
+                            logger.error(f"Erreur lors du traitement d'une offre: {str(e)}")
+                            watermark.fail()
+                            continue
+                    
+                    # Pipeline arrêté par une erreur (relevée à sa fermeture) : inutile de parcourir la suite
+                    if pipeline.aborted:
+                        break
+                    
+                    # Page traitée : archivée, ses validateurs seront enregistrés pour la prochaine collecte
+                    archive_page(response, CrawlState.SOURCE_EMPLOIDAKAR, KIND_LISTING)
+                    listing_validators.append(httpClient.page_validator(response))
+                    
+                    # Les offres suivantes sont plus anciennes que le repère
+                    if watermark_reached:
+                        crawl_complete = True
+                        break
+                    
+                    # Sinon, arrêter si on a trouvé trop d'offres consécutives déjà existantes
+                    if not checker and consecutive_existing_offers >= max_consecutive_existing:
+                        logger.info(f"Arrêt du scraping après {consecutive_existing_offers} offres consécutives déjà existantes")
+                        crawl_complete = True
+                        break
+                    
+                    # Si la page ne contient que des offres déjà existantes, on peut considérer 
+                    # qu'on a probablement déjà tout ce qui est récent
+                    if not page_has_new_offers and existing_offers_count > 0:
+                        logger.info("Page ne contenant que des offres déjà existantes, passage à la page suivante")
+                    
+                    # Vérifier s'il y a une page suivante
+                    if page >= int(json_data.get('max_num_pages', 1)):
+                        logger.info("Plus de pages à scraper")
+                        crawl_complete = True
+                        break
+                    
+                    page += 1
+                    
+                except json.JSONDecodeError:
+                    logger.error("Échec du parsing de la réponse JSON")
                     break
                 
-                page += 1
-                
-            except json.JSONDecodeError:
-                logger.error("Échec du parsing de la réponse JSON")
+            except requests.exceptions.RequestException as e:
+                logger.error(f"Erreur réseau: {str(e)}")
                 break
-            
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Erreur réseau: {str(e)}")
-            break
     
+    new_offers_count = pipeline.written
+    # Validateurs des pages de liste enregistrés seulement si toutes les offres vues ont été écrites :
+    # sinon la collecte suivante s'arrêterait sur une page inchangée sans reprendre les offres manquées
+    if crawl_complete and watermark.save(pipeline.failed):
+        httpClient.save_validators(listing_validators)
     logger.info(f"Scraping terminé. {new_offers_count} nouvelles offres ajoutées. {existing_offers_count} offres déjà existantes ignorées.")
+    if checker:
+        logger.info(f"Rafraîchissement: {checker.changed}/{checker.checked} offres existantes recontrôlées, "
+                    f"{pipeline.refreshed} mises à jour")
     return new_offers_count
 
 
-    
\ No newline at end of file
+def find_cards(soup):
+    """Éléments des offres d'une page de la liste."""
+    return CARDS.select(soup)
+
+
+def parse_listing_card(job):
+    """
+    Extrait d'une carte les champs utilisés pour la détection des doublons et le repère de collecte.
+    
+    Returns:
+        dict: titre, lien_offre, reference et date_publication (None si absente),
+        ou None si la carte n'a pas de lien
+    """
+    carte = LISTING_CARD.extract(job)
+    if carte['lien_offre'] is None:
+        return None
+    carte['reference'] = carte['lien_offre'].split('/')[-2]
+    return carte
+
+
+def parse_card_details(job):
+    """Extrait les autres informations de la carte (seulement pour les nouvelles offres)."""
+    return CARD_DETAILS.extract(job)
+
+
+def build_offer(job, carte):
+    """Offre envoyée au pipeline : champs de la carte complétés par les autres informations."""
+    return {
+        'titre': carte['titre'],
+        **parse_card_details(job),
+        'date_publication': carte['date_publication'] or timezone.now(),
+        'lien_offre': carte['lien_offre'],
+        'reference': carte['reference'],
+    }
+
+
+def parse_offer_detail(offre, job_detail_response):
+    """
+    Complète une offre de la liste avec la description de sa page de détail.
+    
+    Args:
+        offre: champs extraits de la liste des offres
+        job_detail_response: réponse de la page de détail (None si la requête a échoué)
+        
+    Returns:
+        dict: champs du modèle EmploiDakar, ou None si l'offre doit être ignorée
+    """
+    if job_detail_response is None:
+        return None
+    
+    titre = offre['titre']
+    
+    # Extraire la description détaillée de l'offre
+    if job_detail_response.status_code == 200:
+        job_detail_soup = make_soup(job_detail_response.content, parse_only=DETAIL_STRAINER)
+        job_description = DETAIL_PAGE.extract(job_detail_soup)['description_poste']
+        if job_description:
+            logger.info(f"Description extraite pour l'offre {titre} ({len(job_description)} caractères)")
+        else:
+            logger.warning(f"Pas de description trouvée pour l'offre {titre}")
+        # Libérer l'arbre dès que la description est extraite
+        job_detail_soup.decompose()
+    else:
+        job_description = ""
+        logger.error(f"Impossible d'accéder aux détails de l'offre {titre}")
+    
+    return {**offre, 'description_poste': job_description}
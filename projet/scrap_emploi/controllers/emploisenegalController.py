@@ -1,213 +1,358 @@
 import requests
-from bs4 import BeautifulSoup
+import soupsieve
+from ..models.crawlStateModel import CrawlState
 from ..models.emploisenegalModel import EmploiSenegal
+from ..utils.crawlWatermark import Watermark, is_featured
+from ..utils.fingerprint import RefreshChecker
+from ..utils.extractor import Extractor, Field, attr, html, parse_date, text, texts
+from ..utils import httpClient
+from ..utils.htmlParser import class_strainer, make_soup
+from ..utils.pageArchive import KIND_LISTING, archive_page
+from ..utils.pipeline import OfferPipeline
+from ..utils.seenStore import get_seen_store
+from ..utils.textNormalizer import normalize_title
 from datetime import datetime
 import logging
-import random
 from django.utils import timezone
 
 logger = logging.getLogger(__name__)
 
-USER_AGENTS = [
-    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/92.0.4515.107 Safari/537.36',
-    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/90.0.4430.212 Safari/537.36',
-    'Mozilla/5.0 (iPhone; CPU iPhone OS 12_2 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/15E148',
-    'Mozilla/5.0 (Linux; Android 11; SM-G960U) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/89.0.4389.72 Mobile Safari/537.36'
-]
+# Colonnes indexées identifiant une offre déjà en base (voir utils.seenStore)
+SEEN_KEYS = ('lien_offre', 'titre_normalise')
 
-def scrape_emplois():
+# Sous-arbres utiles d'une page de détail : description, profil, compétences et entreprise
+DETAIL_STRAINER = class_strainer('job-description', 'job-qualifications', 'skills', 'card-block-company')
+
+
+def absolute_url(href):
+    return "https://www.emploisenegal.com" + href
+
+
+# Sélecteurs des cartes et des pages de détail, compilés une seule fois
+# (seules les cartes dont la classe vaut exactement "card card-job" sont retenues)
+CARDS = soupsieve.compile('div[class="card card-job"]')
+LISTING_CARD = Extractor(
+    titre=Field('h3 a', text),
+    lien_offre=Field('h3 a', attr('href'), absolute_url),
+    date_publication=Field('time', text, parse_date('%d.%m.%Y')),
+)
+CARD_DETAILS = Extractor(
+    entreprise=Field('a.card-job-company.company-name', text, default="Non spécifié"),
+    description=Field('div.card-job-description p', text, default=""),
+    infos=Field('li', many=True, default=[]),
+)
+DETAIL_PAGE = Extractor(
+    description_poste=Field('div.job-description', html, default=""),
+    profil_recherche=Field('div.job-qualifications', html, default=""),
+    competences=Field('.skills li', texts, ', '.join, many=True, default=""),
+    secteur_activite=Field('div.card-block-company div.field-item.even', text, default=""),
+    site_internet=Field('div.card-block-company a[rel~="nofollow"]', attr('href'), default=""),
+    description_entreprise=Field('div.card-block-company p.truncated-text', text, default=""),
+)
+
+def scrape_emplois(refresh=None):
+    """
+    Collecte les nouvelles offres d'EmploiSenegal.
+    
+    refresh: 'cartes' ou 'complet' pour recontrôler aussi les offres déjà en base (voir utils.fingerprint) ;
+    la liste est alors parcourue en entier
+    """
     logger.info("Début du scraping EmploiSenegal")
     
-    # Récupérer les offres existantes pour éviter les doublons
-    existing_links = set(EmploiSenegal.objects.values_list('lien_offre', flat=True))
-    existing_titles = set(EmploiSenegal.objects.values_list('titre', flat=True))
+    # Détection des offres existantes pour éviter les doublons
+    seen = get_seen_store(EmploiSenegal, SEEN_KEYS)
+    
+    # Repère de la dernière collecte complète (les offres sont listées de la plus récente à la plus ancienne)
+    watermark = Watermark(CrawlState.SOURCE_EMPLOISENEGAL)
+    watermark_reached = False
+    crawl_complete = False
+    # Validateurs des pages de liste traitées, enregistrés en fin de collecte
+    listing_validators = []
+    
+    # Mode rafraîchissement : les offres connues dont la carte a changé sont récupérées à nouveau
+    checker = RefreshChecker(EmploiSenegal, refresh) if refresh else None
     
-    logger.info(f"Nombre d'offres déjà en base: {len(existing_links)}")
+    logger.info(f"Détection des doublons: {seen}, {checker or watermark}")
     
     base_url = "https://www.emploisenegal.com/recherche-jobs-senegal"
     page = 0
-    new_offers_count = 0
     existing_offers_count = 0
     consecutive_existing_offers = 0
     max_consecutive_existing = 40  # Arrêter après 40 offres consécutives déjà existantes
     
-    while True:
-        url = f"{base_url}?page={page}"
-        headers = {'User-Agent': random.choice(USER_AGENTS)}
-        
-        logger.info(f"Requête vers {url}")
-        try:
-            response = requests.get(url, headers=headers, timeout=30)
-            logger.info(f"Statut de la réponse: {response.status_code}")
-            
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            offres = soup.find_all('div', class_='card card-job')
-            logger.info(f"{len(offres)} offres trouvées sur la page {page}")
-            
-            if not offres:
-                logger.info(f"Fin du scraping à la page {page}. Aucune offre trouvée.")
-                break  
-            
-            page_has_new_offers = False
-            
-            for offre in offres:
-                try:
-                    # Extraction du titre et du lien en premier pour vérification
-                    titre_element = offre.find('h3').find('a')
-                    titre = titre_element.get_text(strip=True)
-                    lien_offre = "https://www.emploisenegal.com" + titre_element['href']
-                    
-                    # Vérifier si l'offre existe déjà
-                    if lien_offre in existing_links or titre.lower() in [t.lower() for t in existing_titles]:
-                        logger.debug(f"Offre déjà existante: {titre} ({lien_offre})")
-                        existing_offers_count += 1
-                        consecutive_existing_offers += 1
-                        continue
-                    else:
-                        # Réinitialiser le compteur d'offres consécutives existantes
-                        consecutive_existing_offers = 0
-                        page_has_new_offers = True
-                        
-                    
-                    logger.info(f"Traitement de la nouvelle offre: {titre}")
-        
-                    # Extraction de l'entreprise
-                    entreprise_element = offre.find('a', class_='card-job-company company-name')
-                    entreprise = entreprise_element.get_text(strip=True) if entreprise_element else "Non spécifié"
-                    
-                    # Extraction de la description
-                    description_element = offre.find('div', class_='card-job-description')
-                    description = description_element.find('p').get_text(strip=True) if description_element else ""
-                    
-                    # Extraction des informations complémentaires
-                    infos = offre.find_all('li')
-                    localisation = "Non spécifié" 
-                    niveau_etude = "Non spécifié"
-                    niveau_experience = "Non spécifié"
-                    type_contrat = "Non spécifié"
-                    competences = "Non spécifié"
-                    
-                    for info in infos:
-                        info_text = info.get_text()
-                        if "Région de" in info_text or "Localisation" in info_text:
-                            localisation = info.get_text(strip=True)
-                            localisation = localisation.replace("Localisation:", "").strip()
-                        elif "Niveau d'études requis" in info_text:
-                            niveau_etude = info.get_text(strip=True) if "Niveau d'études requis" in info_text else None
-                            niveau_etude = niveau_etude.replace("Niveau d'études requis :", "").strip() if niveau_etude else None
-                        elif "Niveau d'expérience" in info_text:
-                            niveau_experience = info.get_text(strip=True)
-                            niveau_experience = niveau_experience.replace("Niveau d'expérience :", "").strip()
-                        elif "Contrat proposé" in info_text:
-                            type_contrat = info.get_text(strip=True)
-                            type_contrat = type_contrat.replace("Contrat proposé :", "").strip()
-                        elif "Compétences clés" in info_text:
-                            competences = info.get_text(strip=True)
-                            competences = competences.replace("Compétences clés :", "").strip()
-                    
-                    # Extraction de la date
-                    date_element = offre.find('time')
+    # Les pages de détail sont récupérées, analysées et écrites en parallèle du parcours des listes
+    with OfferPipeline(EmploiSenegal, parse_offer_detail, source=CrawlState.SOURCE_EMPLOISENEGAL) as pipeline:
+        while True:
+            url = f"{base_url}?page={page}"
+            logger.info(f"Requête vers {url}")
+            try:
+                # Hors rafraîchissement, une page inchangée depuis la dernière collecte arrête le parcours
+                response = httpClient.get(url, conditional=not checker)
+                logger.info(f"Statut de la réponse: {response.status_code}")
+                
+                response.raise_for_status()
+                if response.not_modified:
+                    logger.info(f"Page {page} inchangée depuis la dernière collecte, aucune nouvelle offre")
+                    crawl_complete = True
+                    break
+                
+                soup = make_soup(response.text)
+                
+                offres = find_cards(soup)
+                logger.info(f"{len(offres)} offres trouvées sur la page {page}")
+                
+                if not offres:
+                    logger.info(f"Fin du scraping à la page {page}. Aucune offre trouvée.")
+                    crawl_complete = True
+                    break  
+                
+                page_has_new_offers = False
+                
+                # Extraction du titre et du lien en premier pour vérification
+                page_cards = []
+                for offre in offres:
                     try:
-                        date_str = date_element.get_text(strip=True)
-                        date_publication = datetime.strptime(date_str, '%d.%m.%Y').date()
-                        # Rendre la date aware
-                        date_publication = timezone.make_aware(datetime.combine(date_publication, datetime.min.time()))
-                    except (ValueError, AttributeError):
-                        date_publication = timezone.now()
-
+                        carte = parse_listing_card(offre)
+                        if carte is None:
+                            logger.warning("Pas de titre trouvé pour cette offre")
+                            continue
+                        keys = {
+                            'lien_offre': carte['lien_offre'],
+                            'titre_normalise': normalize_title(carte['titre']),
+                        }
+                        page_cards.append((offre, carte, keys))
+                    except Exception as e:
+                        logger.error(f"Erreur lors du traitement d'une offre: {str(e)}")
+                        continue
+                
+                # Une seule vérification en base pour toutes les offres de la page
+                seen.prefetch([keys for _, _, keys in page_cards])
+                if checker:
+                    checker.prefetch([carte['lien_offre'] for _, carte, _ in page_cards])
+                
+                for offre, carte, keys in page_cards:
                     try:
-                        # Récupérer le contenu HTML de la page de détails
-                        details_response = requests.get(lien_offre, headers=headers, timeout=30)
-                        details_soup = BeautifulSoup(details_response.content, 'html.parser')
-        
-                        # Extraire la description du poste
-                        description_poste_element = details_soup.find('div', class_='job-description')
-                        description_poste = str(description_poste_element) if description_poste_element else ""
-        
-                        # Extraire les détails du profil recherché
-                        profil_recherche_element = details_soup.find('div', class_='job-qualifications')
-                        profil_recherche = str(profil_recherche_element) if profil_recherche_element else ""
-        
-                        skills_elements = details_soup.select('.skills li')
-                        competences = ', '.join([li.get_text(strip=True) for li in skills_elements]) if skills_elements else ""
-        
-                        entreprise_element = details_soup.find('div', class_='card-block-company')
-                        if entreprise_element:
-                            secteur_activite_element = entreprise_element.find('div', class_='field-item even')
-                            secteur_activite = secteur_activite_element.get_text(strip=True) if secteur_activite_element else ""
+                        titre = carte['titre']
+                        lien_offre = carte['lien_offre']
+                        date_carte = carte['date_publication']
+                        
+                        # Arrêt dès que l'on atteint le repère de la précédente collecte complète
+                        if not is_featured(offre):
+                            if not checker and watermark.reached(date_carte, lien_offre=lien_offre):
+                                logger.info(f"Repère de collecte atteint sur l'offre {titre}")
+                                watermark_reached = True
+                                break
+                            watermark.observe(date_carte, lien_offre=lien_offre)
+                        
+                        # Vérifier si l'offre existe déjà
+                        if seen.contains(keys):
+                            logger.debug(f"Offre déjà existante: {titre} ({lien_offre})")
+                            existing_offers_count += 1
+                            consecutive_existing_offers += 1
+                            # Mode rafraîchissement : offre renvoyée au pipeline si sa carte a changé
+                            if checker:
+                                offre_connue = build_offer(offre, carte)
+                                if checker.needs_refresh(offre_connue):
+                                    pipeline.put(offre_connue, refresh=True)
+                            continue
                         else:
-                            secteur_activite = ""
-        
-                        site_internet_element = entreprise_element.find('a', rel='nofollow') if entreprise_element else None
-                        site_internet = site_internet_element['href'] if site_internet_element else ""
-        
-                        description_entreprise_element = entreprise_element.find('p', class_='truncated-text') if entreprise_element else None
-                        description_entreprise = description_entreprise_element.get_text(strip=True) if description_entreprise_element else ""
+                            # Réinitialiser le compteur d'offres consécutives existantes
+                            consecutive_existing_offers = 0
+                            page_has_new_offers = True
+                            
+                        
+                        logger.info(f"Traitement de la nouvelle offre: {titre}")
+
+                        # Envoyer l'offre au pipeline (détail, analyse, écriture)
+                        pipeline.put(build_offer(offre, carte))
+                        
+                        # Mémoriser l'offre pour éviter les doublons dans la même session
+                        seen.add(keys)
+                        
                     except Exception as e:
-                        logger.error(f"Erreur lors de la récupération des détails pour {titre}: {str(e)}")
-                        # Valeurs par défaut en cas d'erreur
-                        description_poste = description
-                        profil_recherche = ""
-                        secteur_activite = ""
-                        site_internet = ""
-                        description_entreprise = ""
-                    
-                    # Créer une nouvelle offre
-                    nouvelle_offre = EmploiSenegal.objects.create(
-                        titre=titre,
-                        description_poste=description_poste,
-                        profil_recherche=profil_recherche,
-                        entreprise=entreprise,
-                        localisation=localisation,
-                        niveau_etude=niveau_etude,
-                        niveau_experience=niveau_experience, 
-                        type_contrat=type_contrat,
-                        competences=competences,
-                        date_publication=date_publication,
-                        secteur_activite=secteur_activite,
-                        site_internet=site_internet,
-                        description_entreprise=description_entreprise,
-                        lien_offre=lien_offre
-                    )
-                    
-                    # Ajouter aux ensembles pour éviter les doublons dans la même session
-                    existing_links.add(lien_offre)
-                    existing_titles.add(titre)
-                    
-                    new_offers_count += 1
-                    logger.info(f"Nouvelle offre ajoutée: {titre}")
+                        logger.error(f"Erreur lors du traitement d'une offre: {str(e)}")
+                        watermark.fail()
+                        continue
+                
+                # Pipeline arrêté par une erreur (relevée à sa fermeture) : inutile de parcourir la suite
+                if pipeline.aborted:
+                    break
+                
+                # Page traitée : archivée, ses validateurs seront enregistrés pour la prochaine collecte
+                archive_page(response, CrawlState.SOURCE_EMPLOISENEGAL, KIND_LISTING)
+                listing_validators.append(httpClient.page_validator(response))
+                
+                # Les offres suivantes sont plus anciennes que le repère
+                if watermark_reached:
+                    crawl_complete = True
+                    break
+                
+                # Sinon, arrêter si on a trouvé trop d'offres consécutives déjà existantes
+                if not checker and consecutive_existing_offers >= max_consecutive_existing:
+                    logger.info(f"Arrêt du scraping après {consecutive_existing_offers} offres consécutives déjà existantes")
+                    crawl_complete = True
+                    break
+                
+                # Si la page ne contient que des offres déjà existantes, on continue quand même à la page suivante
+                if not page_has_new_offers and existing_offers_count > 0:
+                    logger.info("Page ne contenant que des offres déjà existantes, passage à la page suivante")
+                
+                # Passer à la page suivante
+                page += 1
                     
-                except Exception as e:
-                    logger.error(f"Erreur lors du traitement d'une offre: {str(e)}")
-                    continue
-            
-            # Arrêter si on a trouvé trop d'offres consécutives déjà existantes
-            if consecutive_existing_offers >= max_consecutive_existing:
-                logger.info(f"Arrêt du scraping après {consecutive_existing_offers} offres consécutives déjà existantes")
+            except Exception as e:
+                logger.error(f"Erreur lors du scraping de la page {page}: {str(e)}")
                 break
-            
-            # Si la page ne contient que des offres déjà existantes, on continue quand même à la page suivante
-            if not page_has_new_offers and existing_offers_count > 0:
-                logger.info("Page ne contenant que des offres déjà existantes, passage à la page suivante")
-            
-            # Passer à la page suivante
-            page += 1
-                
-        except Exception as e:
-            logger.error(f"Erreur lors du scraping de la page {page}: {str(e)}")
-            break
-
+    
+    new_offers_count = pipeline.written
+    # Validateurs des pages de liste enregistrés seulement si toutes les offres vues ont été écrites :
+    # sinon la collecte suivante s'arrêterait sur une page inchangée sans reprendre les offres manquées
+    if crawl_complete and watermark.save(pipeline.failed):
+        httpClient.save_validators(listing_validators)
     logger.info(f"Fin du scraping EmploiSenegal. {new_offers_count} nouvelles offres ajoutées. {existing_offers_count} offres déjà existantes ignorées.")
+    if checker:
+        logger.info(f"Rafraîchissement: {checker.changed}/{checker.checked} offres existantes recontrôlées, "
+                    f"{pipeline.refreshed} mises à jour")
     return new_offers_count
 
+def find_cards(soup):
+    """Cartes des offres d'une page de résultats."""
+    return CARDS.select(soup)
+
+
+def parse_listing_card(offre):
+    """
+    Extrait d'une carte les champs utilisés pour la détection des doublons et le repère de collecte.
+    
+    Returns:
+        dict: titre, lien_offre et date_publication (date, None si absente),
+        ou None si la carte n'a pas de titre
+    """
+    carte = LISTING_CARD.extract(offre)
+    if carte['titre'] is None or carte['lien_offre'] is None:
+        return None
+    return carte
+
+
+def parse_card_details(offre):
+    """Extrait les autres informations de la carte (seulement pour les nouvelles offres)."""
+    details = CARD_DETAILS.extract(offre)
+    
+    # Extraction des informations complémentaires
+    infos = details.pop('infos')
+    localisation = "Non spécifié" 
+    niveau_etude = "Non spécifié"
+    niveau_experience = "Non spécifié"
+    type_contrat = "Non spécifié"
+    competences = "Non spécifié"
+    
+    for info in infos:
+        info_text = info.get_text()
+        if "Région de" in info_text or "Localisation" in info_text:
+            localisation = info.get_text(strip=True)
+            localisation = localisation.replace("Localisation:", "").strip()
+        elif "Niveau d'études requis" in info_text:
+            niveau_etude = info.get_text(strip=True)
+            niveau_etude = niveau_etude.replace("Niveau d'études requis :", "").strip()
+        elif "Niveau d'expérience" in info_text:
+            niveau_experience = info.get_text(strip=True)
+            niveau_experience = niveau_experience.replace("Niveau d'expérience :", "").strip()
+        elif "Contrat proposé" in info_text:
+            type_contrat = info.get_text(strip=True)
+            type_contrat = type_contrat.replace("Contrat proposé :", "").strip()
+        elif "Compétences clés" in info_text:
+            competences = info.get_text(strip=True)
+            competences = competences.replace("Compétences clés :", "").strip()
+    
+    return {
+        **details,
+        'localisation': localisation,
+        'niveau_etude': niveau_etude,
+        'niveau_experience': niveau_experience,
+        'type_contrat': type_contrat,
+        'competences': competences,
+    }
+
+
+def build_offer(offre, carte):
+    """Offre envoyée au pipeline : champs de la carte complétés par les autres informations."""
+    date_carte = carte['date_publication']
+    if date_carte:
+        # Rendre la date aware
+        date_publication = timezone.make_aware(datetime.combine(date_carte, datetime.min.time()))
+    else:
+        date_publication = timezone.now()
+    return {
+        'titre': carte['titre'],
+        'lien_offre': carte['lien_offre'],
+        **parse_card_details(offre),
+        'date_publication': date_publication,
+    }
+
+
+def parse_offer_detail(offre, details_response):
+    """
+    Complète une offre de la liste avec les informations de sa page de détail.
+    
+    Args:
+        offre: champs extraits de la carte de l'offre
+        details_response: réponse de la page de détail (None si la requête a échoué)
+        
+    Returns:
+        dict: champs du modèle EmploiSenegal
+    """
+    titre = offre['titre']
+    description = offre['description']
+    competences = offre['competences']
+    
+    try:
+        # Récupérer le contenu HTML de la page de détails
+        if details_response is None:
+            raise requests.exceptions.RequestException("Page de détails indisponible")
+        details_soup = make_soup(details_response.content, parse_only=DETAIL_STRAINER)
+
+        # Description du poste, profil recherché, compétences et informations sur l'entreprise
+        details = DETAIL_PAGE.extract(details_soup)
+        description_poste = details['description_poste']
+        profil_recherche = details['profil_recherche']
+        competences = details['competences']
+        secteur_activite = details['secteur_activite']
+        site_internet = details['site_internet']
+        description_entreprise = details['description_entreprise']
+        
+        # Libérer l'arbre dès que les champs sont extraits
+        details_soup.decompose()
+    except Exception as e:
+        logger.error(f"Erreur lors de la récupération des détails pour {titre}: {str(e)}")
+        # Valeurs par défaut en cas d'erreur
+        description_poste = description
+        profil_recherche = ""
+        secteur_activite = ""
+        site_internet = ""
+        description_entreprise = ""
+    
+    return {
+        'titre': titre,
+        'description_poste': description_poste,
+        'profil_recherche': profil_recherche,
+        'entreprise': offre['entreprise'],
+        'localisation': offre['localisation'],
+        'niveau_etude': offre['niveau_etude'],
+        'niveau_experience': offre['niveau_experience'],
+        'type_contrat': offre['type_contrat'],
+        'competences': competences,
+        'date_publication': offre['date_publication'],
+        'secteur_activite': secteur_activite,
+        'site_internet': site_internet,
+        'description_entreprise': description_entreprise,
+        'lien_offre': offre['lien_offre'],
+    }
+
 def scrape_emplois_new():
     # Cette fonction n'est plus utilisée mais conservée pour référence
     url = "https://emploisenegal.com/recherche-jobs-senegal"
-    response = requests.get(url)
-    soup = BeautifulSoup(response.content, 'html.parser')
+    response = httpClient.get(url)
+    soup = make_soup(response.content)
 
     emplois = []
     articles = soup.find_all('article', class_='js_result_row')
@@ -221,8 +366,8 @@ def scrape_emplois_new():
         date_publication = datetime.strptime(date_publication_str, '%d/%m/%Y').date()
 
         # Récupérer les détails de l'offre
-        details_response = requests.get(lien_offre)
-        details_soup = BeautifulSoup(details_response.content, 'html.parser')
+        details_response = httpClient.get(lien_offre)
+        details_soup = make_soup(details_response.content)
 
         description_poste = str(details_soup.find('div', class_='job-description'))
         profil_recherche = str(details_soup.find('div', class_='job-qualifications'))
@@ -1,36 +1,118 @@
-import requests
-from bs4 import BeautifulSoup
 from datetime import datetime
 import logging
-import time
 import re
+import functools
 import json
+import soupsieve
 from django.utils import timezone
+from ..models.crawlStateModel import CrawlState
 from ..models.offreEmploiSNModel import OffreEmploiSN
-from django.db import transaction
+from ..utils.crawlWatermark import Watermark, is_featured
+from ..utils.extractor import Extractor, Field, attr, html, strip, stripped_text, text
+from ..utils import httpClient
+from ..utils.fetchEngine import PagePrefetcher
+from ..utils.fingerprint import RefreshChecker
+from ..utils.htmlParser import class_strainer, make_soup
+from ..utils.pageArchive import KIND_LISTING, archive_page
+from ..utils.pipeline import OfferPipeline
+from ..utils.seenStore import get_seen_store
+from ..utils.textNormalizer import normalize_title
 
 logger = logging.getLogger(__name__)
 
-def scrape_offre_emploi_sn():
+# Colonnes indexées identifiant une offre déjà en base (voir utils.seenStore)
+SEEN_KEYS = ('lien_offre', 'titre_normalise')
+
+# Sous-arbres utiles d'une page de détail : la description (et ses emplacements de repli) et l'encadré
+# contenant la date de clôture
+DETAIL_STRAINER = class_strainer(
+    'job_description', 'job-description', 'single-job-content', 'job-details', 'single_job_listing', 'job-overview'
+)
+
+# Sélecteurs des éléments de la liste et des pages de détail, compilés une seule fois
+CARDS = soupsieve.compile('ul.job_listings li')
+LISTING_CARD = Extractor(
+    titre=Field(None, attr('data-title'), strip, default=''),
+    titre_html=Field('h4', text, default=''),
+    lien_offre=Field('a', attr('href')),
+)
+CARD_DETAILS = Extractor(
+    entreprise=Field(None, attr('data-company'), strip, default=''),
+    lieu=Field(None, attr('data-address'), strip, default=''),
+    lien_image=Field(None, attr('data-image'), default=''),
+    type_contrat_data=Field(None, attr('data-job_type'), default=''),
+    type_contrat_html=Field('.job-type', text, default=''),
+    description_courte=Field('.listing-desc p', stripped_text, default=""),
+    date_texte=Field(('.listing-date time', '.listing-date'), text),
+)
+# Emplacements de la description par ordre de préférence, l'article entier en dernier recours
+DETAIL_PAGE = Extractor(
+    description_complete=Field((
+        '.job_description',
+        'article.single_job_listing .job_description',
+        '.job-overview .job-description',
+        '.single-job-content',
+        '.job-details',
+        'article.single_job_listing',
+    ), html, default=""),
+    date_cloture=Field('.job-overview .date-expiration', stripped_text),
+)
+
+# Date de publication recalculée à chaque collecte à partir d'une date relative : exclue des empreintes
+FINGERPRINT_EXCLUDE = ('date_publication',)
+
+AJAX_HEADERS = {
+    'X-Requested-With': 'XMLHttpRequest'  # Important pour les requêtes AJAX
+}
+
+def listing_request(page, conditional=False):
+    """
+    Requête AJAX de l'onglet demandé (simulation du clic sur l'onglet avec data-page),
+    conditionnelle si demandé (voir httpClient.request)
+    """
+    # Construction de la requête AJAX pour récupérer les offres de l'onglet
+    ajax_url = "https://offre-emploi.sn/jm-ajax/get_listings/"
+    
+    # Paramètres pour la requête AJAX - simulation du clic sur l'onglet avec data-page
+    form_data = {
+        'page': str(page),
+        'per_page': '10',
+        'orderby': 'featured',
+        'order': 'DESC',
+        'show_pagination': 'true'
+    }
+    return 'POST', ajax_url, {'headers': AJAX_HEADERS, 'data': form_data, 'conditional': conditional}
+
+def scrape_offre_emploi_sn(refresh=None):
     """
     Fonction principale pour scraper les offres d'emploi du site offre-emploi.sn
     en utilisant le système de navigation par onglets avec attributs data-page
     qui charge les offres dans un même conteneur sans changer d'URL
+    
+    Args:
+        refresh: 'cartes' ou 'complet' pour recontrôler aussi les offres déjà en base (voir utils.fingerprint) ;
+            tous les onglets sont alors parcourus
     """
     logger.info("Démarrage du scraping OffreEmploiSN")
     
-    # Récupérer les offres existantes pour éviter les doublons
-    existing_links = set(OffreEmploiSN.objects.values_list('lien_offre', flat=True))
-    existing_titles = set(OffreEmploiSN.objects.values_list('titre', flat=True))
+    # Détection des offres existantes pour éviter les doublons
+    seen = get_seen_store(OffreEmploiSN, SEEN_KEYS)
+    
+    # Repère de la dernière collecte complète. Les dates affichées sont relatives
+    # ("publié il y a 2 semaines") : seul le lien de l'offre est comparé.
+    watermark = Watermark(CrawlState.SOURCE_OFFRE_EMPLOI_SN, compare_dates=False)
+    watermark_reached = False
+    crawl_complete = False
+    # Validateurs des pages de liste traitées, enregistrés en fin de collecte
+    listing_validators = []
+    
+    # Mode rafraîchissement : les offres connues dont la carte a changé sont récupérées à nouveau
+    checker = RefreshChecker(OffreEmploiSN, refresh, exclude=FINGERPRINT_EXCLUDE) if refresh else None
     
-    logger.info(f"Nombre d'offres déjà en base: {len(existing_links)}")
+    logger.info(f"Détection des doublons: {seen}, {checker or watermark}")
     
     base_url = "https://offre-emploi.sn/offre-emploi-au-senegal/"
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/93.0.4577.82 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'X-Requested-With': 'XMLHttpRequest'  # Important pour les requêtes AJAX
-    }
+    headers = AJAX_HEADERS
     
     new_offers_count = 0
     existing_offers_count = 0
@@ -38,333 +120,421 @@ def scrape_offre_emploi_sn():
     max_consecutive_existing = 15  # Arrêter après 15 offres consécutives déjà existantes
     
     try:
-        # Première étape: récupérer la page principale pour obtenir la structure de pagination
-        logger.info(f"Récupération de la page principale: {base_url}")
-        response = requests.get(base_url, headers=headers, timeout=30)
-        
-        if response.status_code != 200:
-            logger.error(f"Erreur lors de la récupération de la page principale: {response.status_code}")
-            return 0
+        # Les onglets suivants sont préchargés une fois la pagination connue ;
+        # les pages de détail sont récupérées, analysées et écrites en parallèle du parcours des onglets
+        # Hors rafraîchissement, une page inchangée depuis la dernière collecte arrête le parcours
+        build_request = functools.partial(listing_request, conditional=not checker)
+        with OfferPipeline(OffreEmploiSN, parse_offer_detail, source=CrawlState.SOURCE_OFFRE_EMPLOI_SN, fingerprint_exclude=FINGERPRINT_EXCLUDE) as pipeline, PagePrefetcher(build_request) as listings:
+            # Première étape: récupérer la page principale pour obtenir la structure de pagination
+            logger.info(f"Récupération de la page principale: {base_url}")
+            response = httpClient.get(base_url, headers=headers, conditional=not checker)
             
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Déterminer le nombre total de pages à partir de la pagination
-        pagination = soup.select_one('nav.job-manager-pagination')
-        if not pagination:
-            logger.warning("Pas de pagination trouvée, traitement de la page unique")
-            page_numbers = [1]
-        else:
-            # Trouver tous les liens de pagination avec data-page
-            page_links = pagination.select('li a[data-page]')
-            page_numbers = []
+            if response.not_modified:
+                logger.info("Page principale inchangée depuis la dernière collecte, aucune nouvelle offre")
+                return 0
             
-            for link in page_links:
-                data_page = link.get('data-page')
-                if data_page and data_page.isdigit():
-                    page_numbers.append(int(data_page))
+            if response.status_code != 200:
+                logger.error(f"Erreur lors de la récupération de la page principale: {response.status_code}")
+                return 0
+                
+            soup = make_soup(response.content)
             
-            if not page_numbers:
-                logger.warning("Pas de numéros de page trouvés, traitement de la page unique")
+            # Déterminer le nombre total de pages à partir de la pagination
+            pagination = soup.select_one('nav.job-manager-pagination')
+            if not pagination:
+                logger.warning("Pas de pagination trouvée, traitement de la page unique")
                 page_numbers = [1]
-        
-        # Trier et dédupliquer les numéros de page
-        page_numbers = sorted(set(page_numbers))
-        max_page = max(page_numbers)
-        
-        logger.info(f"Pages détectées: {page_numbers}, max: {max_page}")
-        
-        # Traitement de la première page (déjà chargée)
-        job_listings = soup.select('ul.job_listings li')
-        logger.info(f"Nombre d'offres trouvées sur la page 1: {len(job_listings)}")
-        
-        if job_listings:
-            processed_result = process_job_listings(job_listings, existing_links, existing_titles)
-            new_offers_count += processed_result['new']
-            existing_offers_count += processed_result['existing']
-            
-            # Mise à jour du compteur d'offres consécutives existantes
-            if processed_result['new'] > 0:
-                consecutive_existing_count = 0
             else:
-                consecutive_existing_count += processed_result['existing']
-        
-        # Pour les pages suivantes, utiliser des requêtes AJAX directement vers le gestionnaire d'onglets
-        for page in range(2, max_page + 1):
-            # Si trop d'offres consécutives déjà existantes, on arrête
-            if consecutive_existing_count >= max_consecutive_existing:
-                logger.info(f"Arrêt du scraping après {consecutive_existing_count} offres consécutives déjà existantes")
-                break
+                # Trouver tous les liens de pagination avec data-page
+                page_links = pagination.select('li a[data-page]')
+                page_numbers = []
+                
+                for link in page_links:
+                    data_page = link.get('data-page')
+                    if data_page and data_page.isdigit():
+                        page_numbers.append(int(data_page))
                 
-            logger.info(f"Traitement de l'onglet {page}")
-            time.sleep(3)  # Pause entre les requêtes
+                if not page_numbers:
+                    logger.warning("Pas de numéros de page trouvés, traitement de la page unique")
+                    page_numbers = [1]
             
-            # Construction de la requête AJAX pour récupérer les offres de l'onglet
-            ajax_url = "https://offre-emploi.sn/jm-ajax/get_listings/"
+            # Trier et dédupliquer les numéros de page
+            page_numbers = sorted(set(page_numbers))
+            max_page = max(page_numbers)
             
-            # Paramètres pour la requête AJAX - simulation du clic sur l'onglet avec data-page
-            form_data = {
-                'page': str(page),
-                'per_page': '10',
-                'orderby': 'featured',
-                'order': 'DESC',
-                'show_pagination': 'true'
-            }
+            logger.info(f"Pages détectées: {page_numbers}, max: {max_page}")
             
-            try:
-                # Envoi de la requête POST pour simuler le clic sur l'onglet
-                ajax_response = requests.post(ajax_url, headers=headers, data=form_data, timeout=30)
+            # Traitement de la première page (déjà chargée)
+            job_listings = find_cards(soup)
+            logger.info(f"Nombre d'offres trouvées sur la page 1: {len(job_listings)}")
+            
+            if job_listings:
+                processed_result = process_job_listings(job_listings, seen, pipeline, watermark, checker)
+                new_offers_count += processed_result['new']
+                existing_offers_count += processed_result['existing']
+                watermark_reached = processed_result['watermark_reached']
                 
-                if ajax_response.status_code != 200:
-                    logger.error(f"Erreur lors de la requête AJAX pour l'onglet {page}: {ajax_response.status_code}")
-                    continue
+                # Mise à jour du compteur d'offres consécutives existantes
+                if processed_result['new'] > 0:
+                    consecutive_existing_count = 0
+                else:
+                    consecutive_existing_count += processed_result['existing']
+            
+            # Page traitée : archivée, ses validateurs seront enregistrés pour la prochaine collecte
+            archive_page(response, CrawlState.SOURCE_OFFRE_EMPLOI_SN, KIND_LISTING)
+            listing_validators.append(httpClient.page_validator(response))
+            
+            # Pour les pages suivantes, utiliser des requêtes AJAX directement vers le gestionnaire d'onglets
+            listings.set_last_page(max_page)
+            for page in range(2, max_page + 1):
+                # Pipeline arrêté par une erreur (relevée à sa fermeture) : inutile de parcourir la suite
+                if pipeline.aborted:
+                    break
                 
-                # Analyser la réponse JSON
-                try:
-                    ajax_data = ajax_response.json()
-                    
-                    # Vérifier si la réponse contient du HTML
-                    if not ajax_data.get('html'):
-                        logger.warning(f"Pas de contenu HTML dans la réponse AJAX pour l'onglet {page}")
-                        continue
-                    
-                    # Parser le HTML des offres
-                    job_soup = BeautifulSoup(ajax_data['html'], 'html.parser')
-                    job_listings = job_soup.select('li')
+                # Les onglets suivants sont plus anciens que le repère
+                if watermark_reached:
+                    crawl_complete = True
+                    break
+                
+                # Si trop d'offres consécutives déjà existantes, on arrête
+                if not checker and consecutive_existing_count >= max_consecutive_existing:
+                    logger.info(f"Arrêt du scraping après {consecutive_existing_count} offres consécutives déjà existantes")
+                    crawl_complete = True
+                    break
                     
-                    logger.info(f"Nombre d'offres trouvées dans l'onglet {page}: {len(job_listings)}")
+                logger.info(f"Traitement de l'onglet {page}")
+                
+                try:
+                    # Requête POST simulant le clic sur l'onglet (les onglets suivants sont préchargés)
+                    ajax_response = listings.get(page)
                     
-                    if job_listings:
-                        processed_result = process_job_listings(job_listings, existing_links, existing_titles)
-                        new_offers_count += processed_result['new']
-                        existing_offers_count += processed_result['existing']
-                        
-                        # Mise à jour du compteur d'offres consécutives existantes
-                        if processed_result['new'] > 0:
-                            consecutive_existing_count = 0
-                        else:
-                            consecutive_existing_count += processed_result['existing']
+                    if ajax_response.not_modified:
+                        logger.info(f"Onglet {page} inchangé depuis la dernière collecte, aucune nouvelle offre")
+                        crawl_complete = True
+                        break
                     
-                except json.JSONDecodeError:
-                    logger.error(f"Erreur de décodage JSON pour l'onglet {page}")
+                    # Onglet en erreur : ses offres n'ont pas été vues, le repère ne sera pas avancé
+                    if ajax_response.status_code != 200:
+                        logger.error(f"Erreur lors de la requête AJAX pour l'onglet {page}: {ajax_response.status_code}")
+                        watermark.fail()
+                        continue
                     
-                    # Méthode alternative: essayer de récupérer directement le HTML
+                    # Analyser la réponse JSON
                     try:
-                        # Construire l'URL avec le paramètre de page
-                        alt_url = f"{base_url}?pg={page}"
-                        alt_response = requests.get(alt_url, headers=headers, timeout=30)
+                        ajax_data = ajax_response.json()
+                        
+                        # Vérifier si la réponse contient du HTML
+                        if not ajax_data.get('html'):
+                            logger.warning(f"Pas de contenu HTML dans la réponse AJAX pour l'onglet {page}")
+                            continue
+                        
+                        # Parser le HTML des offres
+                        job_soup = make_soup(ajax_data['html'])
+                        job_listings = job_soup.select('li')
+                        
+                        logger.info(f"Nombre d'offres trouvées dans l'onglet {page}: {len(job_listings)}")
+                        
+                        if job_listings:
+                            processed_result = process_job_listings(job_listings, seen, pipeline, watermark, checker)
+                            new_offers_count += processed_result['new']
+                            existing_offers_count += processed_result['existing']
+                            watermark_reached = processed_result['watermark_reached']
+                            
+                            # Mise à jour du compteur d'offres consécutives existantes
+                            if processed_result['new'] > 0:
+                                consecutive_existing_count = 0
+                            else:
+                                consecutive_existing_count += processed_result['existing']
+                        
+                        # Onglet traité : archivé, ses validateurs seront enregistrés pour la prochaine collecte
+                        archive_page(ajax_response, CrawlState.SOURCE_OFFRE_EMPLOI_SN, KIND_LISTING)
+                        listing_validators.append(httpClient.page_validator(ajax_response))
+                        
+                    except json.JSONDecodeError:
+                        logger.error(f"Erreur de décodage JSON pour l'onglet {page}")
                         
-                        if alt_response.status_code == 200:
-                            alt_soup = BeautifulSoup(alt_response.content, 'html.parser')
-                            job_listings = alt_soup.select('ul.job_listings li')
+                        # Méthode alternative: essayer de récupérer directement le HTML
+                        recovered = False
+                        try:
+                            # Construire l'URL avec le paramètre de page
+                            alt_url = f"{base_url}?pg={page}"
+                            alt_response = httpClient.get(alt_url, headers=headers)
                             
-                            if job_listings:
-                                logger.info(f"Méthode alternative: {len(job_listings)} offres trouvées dans l'onglet {page}")
-                                processed_result = process_job_listings(job_listings, existing_links, existing_titles)
-                                new_offers_count += processed_result['new']
-                                existing_offers_count += processed_result['existing']
+                            if alt_response.status_code == 200:
+                                recovered = True
+                                alt_soup = make_soup(alt_response.content)
+                                job_listings = find_cards(alt_soup)
                                 
-                                if processed_result['new'] > 0:
-                                    consecutive_existing_count = 0
-                                else:
-                                    consecutive_existing_count += processed_result['existing']
-                    except Exception as e:
-                        logger.error(f"Échec de la méthode alternative pour l'onglet {page}: {str(e)}")
-                
-            except Exception as e:
-                logger.error(f"Erreur lors du traitement de l'onglet {page}: {str(e)}")
-                continue
+                                if job_listings:
+                                    logger.info(f"Méthode alternative: {len(job_listings)} offres trouvées dans l'onglet {page}")
+                                    processed_result = process_job_listings(job_listings, seen, pipeline, watermark, checker)
+                                    new_offers_count += processed_result['new']
+                                    existing_offers_count += processed_result['existing']
+                                    watermark_reached = processed_result['watermark_reached']
+                                    
+                                    if processed_result['new'] > 0:
+                                        consecutive_existing_count = 0
+                                    else:
+                                        consecutive_existing_count += processed_result['existing']
+                        except Exception as e:
+                            logger.error(f"Échec de la méthode alternative pour l'onglet {page}: {str(e)}")
+                        if not recovered:
+                            watermark.fail()
+                    
+                except Exception as e:
+                    logger.error(f"Erreur lors du traitement de l'onglet {page}: {str(e)}")
+                    watermark.fail()
+                    continue
+            else:
+                # Tous les onglets ont été parcourus (les onglets en erreur sont comptés par watermark.fail())
+                crawl_complete = True
         
+        new_offers_count = pipeline.written
+        # Validateurs des pages de liste enregistrés seulement si toutes les offres vues ont été écrites :
+        # sinon la collecte suivante s'arrêterait sur une page inchangée sans reprendre les offres manquées
+        if crawl_complete and watermark.save(pipeline.failed):
+            httpClient.save_validators(listing_validators)
         logger.info(f"Scraping terminé. {new_offers_count} nouvelles offres ajoutées. {existing_offers_count} offres déjà existantes ignorées.")
+        if checker:
+            logger.info(f"Rafraîchissement: {checker.changed}/{checker.checked} offres existantes recontrôlées, "
+                        f"{pipeline.refreshed} mises à jour")
         return new_offers_count
         
     except Exception as e:
         logger.error(f"Erreur générale lors du scraping: {str(e)}")
         return 0
 
-def process_job_listings(job_listings, existing_links, existing_titles):
+def process_job_listings(job_listings, seen, pipeline, watermark, checker=None):
     """
     Traite une liste d'offres d'emploi et les ajoute à la base de données si elles n'existent pas déjà
     
     Args:
         job_listings: Liste des éléments HTML représentant les offres
-        existing_links: Ensemble des liens d'offres existantes
-        existing_titles: Ensemble des titres d'offres existantes
+        seen: Magasin des offres existantes (voir utils.seenStore), vérifié une fois par page
+        pipeline: Pipeline (voir utils.pipeline) qui récupère, analyse et enregistre les nouvelles offres
+        watermark: Repère de la précédente collecte complète (voir utils.crawlWatermark)
+        checker: Sélection des offres existantes à rafraîchir (voir utils.fingerprint), None hors rafraîchissement
         
     Returns:
-        dict: Dictionnaire contenant le nombre de nouvelles offres et d'offres existantes traitées
+        dict: Dictionnaire contenant le nombre de nouvelles offres (envoyées au pipeline), d'offres existantes
+        traitées et si le repère a été atteint
     """
     new_count = 0
     existing_count = 0
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/93.0.4577.82 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-    }
+    watermark_reached = False
+    page_cards = []
     
     for job in job_listings:
         try:
-            # Extraction des informations de base
-            titre = job.get('data-title', '').strip()
-            entreprise = job.get('data-company', '').strip()
-            lieu = job.get('data-address', '').strip()
-            lien_image = job.get('data-image', '')
-            
-            # Si pas de titre, essayer d'extraire depuis le HTML
-            if not titre:
-                titre_elem = job.select_one('h4')
-                if titre_elem:
-                    titre = titre_elem.get_text(strip=True).split('\n')[0]
-            
-            if not titre:
-                logger.warning("Offre sans titre détectée, ignorée")
-                continue
-            
-            # Extraction du lien de l'offre
-            lien_elem = job.select_one('a')
-            if not lien_elem or 'href' not in lien_elem.attrs:
-                logger.warning(f"Pas de lien trouvé pour l'offre: {titre}")
+            carte = parse_listing_card(job)
+            if carte is None:
                 continue
                 
-            lien_offre = lien_elem['href']
+            keys = {'lien_offre': carte['lien_offre'], 'titre_normalise': normalize_title(carte['titre'])}
+            page_cards.append((job, carte, keys))
             
-            # Extraction du type de contrat
-            type_contrat_elem = job.get('data-job_type', '')
-            type_contrat = ''
-            if type_contrat_elem:
-                # Utilisation d'une expression régulière pour extraire le texte entre les balises <span>
-                match = re.search(r'>(.*?)<', type_contrat_elem)
-                if match:
-                    type_contrat = match.group(1)
+        except Exception as e:
+            logger.error(f"Erreur lors du traitement de l'offre: {str(e)}")
+            continue
+    
+    # Une seule vérification en base pour toutes les offres de la page
+    seen.prefetch([keys for _, _, keys in page_cards])
+    if checker:
+        checker.prefetch([carte['lien_offre'] for _, carte, _ in page_cards])
+    
+    for job, carte, keys in page_cards:
+        try:
+            titre = carte['titre']
+            lien_offre = carte['lien_offre']
             
-            # Si pas de type de contrat via data-attribute, essayer via le HTML
-            if not type_contrat:
-                type_elem = job.select_one('.job-type')
-                if type_elem:
-                    type_contrat = type_elem.get_text(strip=True)
+            # Arrêt dès que l'on atteint le repère (les offres mises en avant sont listées en premier)
+            if not is_featured(job):
+                if not checker and watermark.reached(lien_offre=lien_offre):
+                    logger.info(f"Repère de collecte atteint sur l'offre {titre}")
+                    watermark_reached = True
+                    break
+                watermark.observe(lien_offre=lien_offre)
             
             # Vérifier si l'offre existe déjà
-            if lien_offre in existing_links or titre.lower() in [t.lower() for t in existing_titles]:
+            if seen.contains(keys):
                 logger.debug(f"Offre déjà existante: {titre} ({lien_offre})")
                 existing_count += 1
+                # Mode rafraîchissement : offre renvoyée au pipeline si sa carte a changé
+                if checker:
+                    offre = build_offer(job, carte)
+                    if checker.needs_refresh(offre):
+                        pipeline.put(offre, refresh=True)
                 continue
             
-            # Extraction de la description courte
-            description_elem = job.select_one('.listing-desc p')
-            description_courte = description_elem.text.strip() if description_elem else ""
-            
-            # Extraction de la date de publication
-            date_elem = job.select_one('.listing-date time') or job.select_one('.listing-date')
-            date_publication = timezone.now()  # Par défaut, date actuelle
-            
-            if date_elem:
-                date_text = date_elem.get_text(strip=True).lower()
-                
-                if 'nouveau' in date_text:
-                    date_publication = timezone.now()
-                elif 'publié il y a' in date_text:
-                    try:
-                        # Extraire le nombre de jours/semaines/mois
-                        parts = date_text.replace('publié il y a', '').strip().split()
-                        if len(parts) >= 2:
-                            number = int(parts[0])
-                            period = parts[1]
-                            
-                            if 'jour' in period:
-                                date_publication = timezone.now() - timezone.timedelta(days=number)
-                            elif 'semaine' in period:
-                                date_publication = timezone.now() - timezone.timedelta(weeks=number)
-                            elif 'mois' in period:
-                                date_publication = timezone.now() - timezone.timedelta(days=number*30)
-                    except Exception as e:
-                        logger.error(f"Erreur lors du parsing de la date: {str(e)}")
-            
-            logger.info(f"Récupération des détails pour l'offre: {titre}")
+            # Envoyer l'offre au pipeline (détail, analyse, écriture)
+            pipeline.put(build_offer(job, carte))
             
-            # Récupérer les détails complets de l'offre
-            time.sleep(2)  # Attente entre les requêtes
+            new_count += 1
             
-            details_response = requests.get(lien_offre, headers=headers, timeout=30)
-            if details_response.status_code != 200:
-                logger.error(f"Erreur lors de la récupération des détails: {details_response.status_code}")
-                description_complete = ""
-                closing_date = None
-            else:
-                details_soup = BeautifulSoup(details_response.content, 'html.parser')
-                
-                # Extraction de la description complète avec conservation des balises HTML
-                description_complete = ""
-                job_description = details_soup.select_one('.job_description')
-                
-                if job_description:
-                    # Récupérer le contenu HTML de la description
-                    description_complete = str(job_description)
-                else:
-                    # Fallback: essayer d'autres sélecteurs courants
-                    content_selectors = [
-                        'article.single_job_listing .job_description',
-                        '.job-overview .job-description',
-                        '.single-job-content',
-                        '.job-details'
-                    ]
-                    
-                    for selector in content_selectors:
-                        content_elem = details_soup.select_one(selector)
-                        if content_elem:
-                            description_complete = str(content_elem)
-                            break
-                    
-                    # Si toujours rien, prendre tout le contenu HTML de l'article
-                    if not description_complete:
-                        article_content = details_soup.select_one('article.single_job_listing')
-                        if article_content:
-                            description_complete = str(article_content)
-                
-                # Extraction de la date de clôture (si disponible)
-                closing_date = None
-                closing_date_elem = details_soup.select_one('.job-overview .date-expiration')
-                if closing_date_elem:
-                    try:
-                        closing_date_text = closing_date_elem.text.strip()
-                        if "Closing date:" in closing_date_text:
-                            date_str = closing_date_text.replace("Closing date:", "").strip()
-                            closing_date = datetime.strptime(date_str, '%d %b %Y').date()
-                    except Exception as e:
-                        logger.error(f"Erreur lors du parsing de la date de clôture: {str(e)}")
-                
-                # Chercher dans la description complète
-                if not closing_date and description_complete and "Closing date:" in description_complete:
-                    try:
-                        match = re.search(r'Closing date:\s*(\d{1,2}\s+\w+\s+\d{4})', description_complete)
-                        if match:
-                            date_str = match.group(1)
-                            closing_date = datetime.strptime(date_str, '%d %b %Y').date()
-                    except Exception as e:
-                        logger.error(f"Erreur lors du parsing de la date de clôture dans la description: {str(e)}")
-                        
-            # Créer l'offre dans la base de données
-            with transaction.atomic():
-                offre = OffreEmploiSN(
-                    titre=titre,
-                    entreprise=entreprise,
-                    lieu=lieu,
-                    type_contrat=type_contrat,
-                    date_publication=date_publication,
-                    lien_offre=lien_offre,
-                    lien_image=lien_image,
-                    description_courte=description_courte,
-                    description_complete=description_complete,
-                    date_cloture=closing_date
-                )
-                offre.save()
-                
-                # Ajouter aux ensembles pour éviter les doublons dans la même session
-                existing_links.add(lien_offre)
-                existing_titles.add(titre)
-                
-                new_count += 1
-                logger.info(f"Nouvelle offre ajoutée: {titre}")
+            # Mémoriser l'offre pour éviter les doublons dans la même session
+            seen.add(keys)
                 
         except Exception as e:
             logger.error(f"Erreur lors du traitement de l'offre: {str(e)}")
+            watermark.fail()
             continue
     
-    return {'new': new_count, 'existing': existing_count}
\ No newline at end of file
+    return {'new': new_count, 'existing': existing_count, 'watermark_reached': watermark_reached}
+
+
+def build_offer(job, carte, now=None):
+    """
+    Offre envoyée au pipeline : titre et lien complétés par les autres informations de l'élément
+
+    now: date de récupération de la liste (dates relatives), maintenant par défaut
+    """
+    return {
+        'titre': carte['titre'],
+        'lien_offre': carte['lien_offre'],
+        **parse_card_details(job, now=now),
+    }
+
+
+def parse_offer_detail(offre_data, details_response):
+    """
+    Complète une offre de la liste avec la description et la date de clôture de sa page de détail
+    
+    Args:
+        offre_data: Champs extraits de l'élément de la liste
+        details_response: Réponse de la page de détail (None si la requête a échoué)
+        
+    Returns:
+        dict: Champs du modèle OffreEmploiSN, ou None si l'offre doit être ignorée
+    """
+    if details_response is None:
+        return None
+    
+    logger.info(f"Récupération des détails pour l'offre: {offre_data['titre']}")
+    
+    if details_response.status_code != 200:
+        logger.error(f"Erreur lors de la récupération des détails: {details_response.status_code}")
+        description_complete = ""
+        closing_date = None
+    else:
+        details_soup = make_soup(details_response.content, parse_only=DETAIL_STRAINER)
+        
+        # Description complète (balises HTML conservées), à défaut l'article entier, et date de clôture
+        details = DETAIL_PAGE.extract(details_soup)
+        description_complete = details['description_complete']
+        
+        # Extraction de la date de clôture (si disponible)
+        closing_date = None
+        closing_date_text = details['date_cloture']
+        if closing_date_text:
+            try:
+                if "Closing date:" in closing_date_text:
+                    date_str = closing_date_text.replace("Closing date:", "").strip()
+                    closing_date = datetime.strptime(date_str, '%d %b %Y').date()
+            except Exception as e:
+                logger.error(f"Erreur lors du parsing de la date de clôture: {str(e)}")
+        
+        # Libérer l'arbre dès que les champs sont extraits
+        details_soup.decompose()
+        
+        # Chercher dans la description complète
+        if not closing_date and description_complete and "Closing date:" in description_complete:
+            try:
+                match = re.search(r'Closing date:\s*(\d{1,2}\s+\w+\s+\d{4})', description_complete)
+                if match:
+                    date_str = match.group(1)
+                    closing_date = datetime.strptime(date_str, '%d %b %Y').date()
+            except Exception as e:
+                logger.error(f"Erreur lors du parsing de la date de clôture dans la description: {str(e)}")
+    
+    return {
+        **offre_data,
+        'description_complete': description_complete,
+        'date_cloture': closing_date,
+    }
+
+
+def find_cards(soup):
+    """
+    Éléments des offres d'une page complète de la liste (les réponses AJAX ne contiennent que les <li>)
+    """
+    return CARDS.select(soup)
+
+
+def parse_listing_card(job):
+    """
+    Extrait d'un élément de la liste le titre et le lien de l'offre
+    
+    Returns:
+        dict: titre et lien_offre, ou None si l'offre n'a pas de titre ou de lien
+    """
+    carte = LISTING_CARD.extract(job)
+    
+    # Si pas de titre dans les attributs, utiliser celui du HTML
+    titre = carte['titre'] or carte['titre_html'].split('\n')[0]
+    if not titre:
+        logger.warning("Offre sans titre détectée, ignorée")
+        return None
+    
+    if carte['lien_offre'] is None:
+        logger.warning(f"Pas de lien trouvé pour l'offre: {titre}")
+        return None
+    
+    return {'titre': titre, 'lien_offre': carte['lien_offre']}
+
+
+def parse_card_details(job, now=None):
+    """
+    Extrait les autres informations d'un élément de la liste (seulement pour les nouvelles offres)
+    
+    Args:
+        job: Élément HTML de l'offre
+        now: Date de référence des dates relatives ("publié il y a 3 jours"), maintenant par défaut
+    """
+    details = CARD_DETAILS.extract(job)
+    
+    # Extraction du type de contrat
+    type_contrat_elem = details.pop('type_contrat_data')
+    type_contrat = ''
+    if type_contrat_elem:
+        # Utilisation d'une expression régulière pour extraire le texte entre les balises <span>
+        match = re.search(r'>(.*?)<', type_contrat_elem)
+        if match:
+            type_contrat = match.group(1)
+    
+    # Si pas de type de contrat via data-attribute, utiliser celui du HTML
+    type_contrat_html = details.pop('type_contrat_html')
+    if not type_contrat:
+        type_contrat = type_contrat_html
+    
+    # Extraction de la date de publication
+    date_text = details.pop('date_texte')
+    now = now or timezone.now()
+    date_publication = now  # Par défaut, date actuelle
+    
+    if date_text is not None:
+        date_text = date_text.lower()
+        
+        if 'nouveau' in date_text:
+            date_publication = now
+        elif 'publié il y a' in date_text:
+            try:
+                # Extraire le nombre de jours/semaines/mois
+                parts = date_text.replace('publié il y a', '').strip().split()
+                if len(parts) >= 2:
+                    number = int(parts[0])
+                    period = parts[1]
+                    
+                    if 'jour' in period:
+                        date_publication = now - timezone.timedelta(days=number)
+                    elif 'semaine' in period:
+                        date_publication = now - timezone.timedelta(weeks=number)
+                    elif 'mois' in period:
+                        date_publication = now - timezone.timedelta(days=number*30)
+            except Exception as e:
+                logger.error(f"Erreur lors du parsing de la date: {str(e)}")
+    
+    return {
+        **details,
+        'type_contrat': type_contrat,
+        'date_publication': date_publication,
+    }
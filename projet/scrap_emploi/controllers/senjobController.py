@@ -1,226 +1,361 @@
 from datetime import datetime, timedelta
 import logging
+import soupsieve
+from ..models.crawlStateModel import CrawlState
 from ..models.senjobModel import SenjobModel
-import requests
-from bs4 import BeautifulSoup
-from django.db import transaction
-import time
+from ..utils.crawlWatermark import Watermark, is_featured
+from ..utils.fingerprint import RefreshChecker
+from ..utils.extractor import Extractor, Field, attr, html, parse_date, text, texts
+from ..utils import httpClient
+from ..utils.htmlParser import class_strainer, make_soup
+from ..utils.pageArchive import KIND_LISTING, archive_page
+from ..utils.pipeline import OfferPipeline
+from ..utils.seenStore import get_seen_store
+from ..utils.textNormalizer import normalize_title
 
 logger = logging.getLogger(__name__)
 
-def scrape_senjob():
+# Colonnes indexées identifiant une offre déjà en base (voir utils.seenStore)
+SEEN_KEYS = ('lien_offre', 'titre_normalise')
+
+# Seul sous-arbre utile d'une page de détail
+DETAIL_STRAINER = class_strainer('view', name='div')
+
+
+def absolute_url(href):
+    return href if href.startswith('http') else 'https://senjob.com/sn/' + href.lstrip('/')
+
+
+# Sélecteurs des lignes et des pages de détail, compilés une seule fois
+CARDS = soupsieve.compile('tr[style*="height:70px"]')
+LISTING_CARD = Extractor(
+    titre=Field('a[href*="jobseekers"]', text),
+    lien_offre=Field('a[href*="jobseekers"]', attr('href'), absolute_url),
+    date_publication=Field('td span[style="display:none"]', text, parse_date('%Y-%m-%d')),
+)
+CARD_DETAILS = Extractor(
+    localisation=Field('td[style*="font-size:14px"] span.green_text_normal', text, default="Non spécifié"),
+    dates=Field('td span[style="display:none"]', texts, many=True, default=[]),
+)
+DETAIL_PAGE = Extractor(
+    description_poste=Field('div.view', html),
+    infos=Field('div.view div', texts, many=True, default=[]),
+)
+
+def scrape_senjob(refresh=None):
+    """
+    Collecte les nouvelles offres de Senjob.
+    
+    refresh: 'cartes' ou 'complet' pour recontrôler aussi les offres déjà en base (voir utils.fingerprint) ;
+    la liste est alors parcourue en entier
+    """
     logger.info("Démarrage du scraping Senjob")
     
-    # Récupérer tous les liens et titres d'offres existants une seule fois au début
-    existing_links = set(SenjobModel.objects.values_list('lien_offre', flat=True))
-    existing_titles = set(SenjobModel.objects.values_list('titre', flat=True))
+    # Détection des offres déjà en base (par lien ou titre)
+    seen = get_seen_store(SenjobModel, SEEN_KEYS)
+    
+    # Repère de la dernière collecte complète (offres listées de la plus récente à la plus ancienne)
+    watermark = Watermark(CrawlState.SOURCE_SENJOB)
+    watermark_reached = False
+    crawl_complete = False
+    # Validateurs des pages de liste traitées, enregistrés en fin de collecte
+    listing_validators = []
+    
+    # Mode rafraîchissement : les offres connues dont la carte a changé sont récupérées à nouveau
+    checker = RefreshChecker(SenjobModel, refresh) if refresh else None
     
-    logger.info(f"Nombre d'offres déjà en base: {len(existing_links)}")
+    logger.info(f"Détection des doublons: {seen}, {checker or watermark}")
     
-    total_offres = 0
     existing_offres_count = 0
     consecutive_existing_offres = 0
     max_consecutive_existing = 15  # Arrêter après 15 offres consécutives déjà existantes
     
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    
     page_number = 1
     has_next_page = True
     
-    while has_next_page:
-        try:
-            # Construction de l'URL
-            page_url = f"https://senjob.com/sn/offres-d-emploi.php{'?page=' + str(page_number) if page_number > 1 else ''}"
-            logger.info(f"Analyse de la page {page_number} : {page_url}")
-            
-            # Attente entre les requêtes
-            time.sleep(2)
-            
-            # Récupération de la page
-            response = requests.get(page_url, headers=headers)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Recherche des offres
-            offres = soup.select('tr[style*="height:70px"]')
-            if not offres:
-                logger.info("Aucune offre trouvée sur cette page")
-                break
+    # Les pages de détail sont récupérées, analysées et sauvegardées en parallèle du parcours des listes
+    with OfferPipeline(SenjobModel, parse_offer_detail, source=CrawlState.SOURCE_SENJOB) as pipeline:
+        while has_next_page:
+            try:
+                # Construction de l'URL
+                page_url = f"https://senjob.com/sn/offres-d-emploi.php{'?page=' + str(page_number) if page_number > 1 else ''}"
+                logger.info(f"Analyse de la page {page_number} : {page_url}")
                 
-            logger.info(f"Nombre d'offres trouvées sur la page {page_number} : {len(offres)}")
-            
-            page_has_new_offres = False
-            
-            # Traitement de chaque offre
-            for offre in offres:
-                try:
-                    logger.info("Début du traitement d'une nouvelle offre")
-                    
-                    # Extraction du lien et du titre
-                    lien_element = offre.select_one('a[href*="jobseekers"]')
-                    if not lien_element:
-                        logger.warning("Pas de lien trouvé pour cette offre")
-                        continue
-                        
-                    lien_offre = lien_element.get('href', '')
-                    if not lien_offre.startswith('http'):
-                        lien_offre = 'https://senjob.com/sn/' + lien_offre.lstrip('/')
-                    titre = lien_element.get_text(strip=True)
+                # Récupération de la page
+                # Hors rafraîchissement, une page inchangée depuis la dernière collecte arrête le parcours
+                response = httpClient.get(page_url, conditional=not checker)
+                response.raise_for_status()
+                if response.not_modified:
+                    logger.info(f"Page {page_number} inchangée depuis la dernière collecte, aucune nouvelle offre")
+                    crawl_complete = True
+                    break
+                
+                soup = make_soup(response.content)
+                
+                # Recherche des offres
+                offres = find_cards(soup)
+                if not offres:
+                    logger.info("Aucune offre trouvée sur cette page")
+                    crawl_complete = True
+                    break
                     
-                    # Vérification si l'offre existe déjà (par lien ou titre)
-                    if lien_offre in existing_links or titre.lower() in [t.lower() for t in existing_titles]:
-                        logger.info(f"L'offre {titre} existe déjà")
-                        existing_offres_count += 1
-                        consecutive_existing_offres += 1
+                logger.info(f"Nombre d'offres trouvées sur la page {page_number} : {len(offres)}")
+                
+                page_has_new_offres = False
+                
+                # Extraction du lien et du titre de chaque offre
+                page_cards = []
+                for offre in offres:
+                    try:
+                        carte = parse_listing_card(offre)
+                        if carte is None:
+                            logger.warning("Pas de lien trouvé pour cette offre")
+                            continue
+                            
+                        keys = {'lien_offre': carte['lien_offre'], 'titre_normalise': normalize_title(carte['titre'])}
+                        page_cards.append((offre, carte, keys))
+                    except Exception as e:
+                        logger.error(f"Erreur lors du traitement de l'offre : {str(e)}")
+                        logger.exception(e)
                         continue
-                    else:
-                        # Réinitialiser le compteur d'offres consécutives existantes
-                        consecutive_existing_offres = 0
-                        page_has_new_offres = True
+                
+                # Une seule vérification en base pour toutes les offres de la page
+                seen.prefetch([keys for _, _, keys in page_cards])
+                if checker:
+                    checker.prefetch([carte['lien_offre'] for _, carte, _ in page_cards])
+                
+                # Traitement de chaque offre
+                for offre, carte, keys in page_cards:
+                    try:
+                        logger.info("Début du traitement d'une nouvelle offre")
+                        titre = carte['titre']
+                        lien_offre = carte['lien_offre']
+                        date_carte = carte['date_publication']
                         
-                    # Extraction de la localisation
-                    localisation = offre.select_one('td[style*="font-size:14px"] span.green_text_normal')
-                    localisation = localisation.get_text(strip=True) if localisation else "Non spécifié"
-                    
-                    # Extraction des dates
-                    date_cells = offre.select('td')
-                    date_publication = None
-                    date_expiration = None
-                    
-                    for cell in date_cells:
-                        hidden_span = cell.select_one('span[style="display:none"]')
-                        if hidden_span:
-                            date_text = hidden_span.get_text(strip=True)
-                            if not date_publication:
-                                date_publication = date_text
-                            else:
-                                date_expiration = date_text
+                        # Arrêt dès que l'on atteint le repère de la précédente collecte complète
+                        if not is_featured(offre):
+                            if not checker and watermark.reached(date_carte, lien_offre=lien_offre):
+                                logger.info(f"Repère de collecte atteint sur l'offre {titre}")
+                                watermark_reached = True
                                 break
-                    
-                    # Conversion des dates
-                    try:
-                        date_pub = datetime.strptime(date_publication, '%Y-%m-%d').date() if date_publication else None
-                        date_exp = datetime.strptime(date_expiration, '%Y-%m-%d').date() if date_expiration else None
+                            watermark.observe(date_carte, lien_offre=lien_offre)
                         
-                        if date_pub and not date_exp:
-                            date_exp = date_pub + timedelta(days=30)
-                        elif not date_pub and not date_exp:
-                            date_pub = datetime.now().date()
-                            date_exp = date_pub + timedelta(days=30)
-                    except ValueError as e:
-                        logger.error(f"Erreur lors du parsing des dates: {str(e)}")
-                        date_pub = datetime.now().date()
-                        date_exp = date_pub + timedelta(days=30)
-                    
-                    # Récupération des détails de l'offre
-                    logger.info(f"Récupération des détails depuis {lien_offre}")
-                    time.sleep(2)
-                    details_response = requests.get(lien_offre, headers=headers)
-                    details_response.raise_for_status()
-                    details_soup = BeautifulSoup(details_response.text, 'html.parser')
+                        # Vérification si l'offre existe déjà (par lien ou titre)
+                        if seen.contains(keys):
+                            logger.info(f"L'offre {titre} existe déjà")
+                            existing_offres_count += 1
+                            consecutive_existing_offres += 1
+                            # Mode rafraîchissement : offre renvoyée au pipeline si sa carte a changé
+                            if checker:
+                                offre_connue = build_offer(offre, carte)
+                                if checker.needs_refresh(offre_connue):
+                                    pipeline.put(offre_connue, refresh=True)
+                            continue
+                        else:
+                            # Réinitialiser le compteur d'offres consécutives existantes
+                            consecutive_existing_offres = 0
+                            page_has_new_offres = True
+                            
+                        # Envoi de l'offre au pipeline (détail, analyse, sauvegarde)
+                        pipeline.put(build_offer(offre, carte))
                         
-                    # Extraction des détails
-                    view_div = details_soup.select_one('div.view')
-                    if not view_div:
-                        logger.warning(f"Pas de contenu trouvé pour {lien_offre}")
+                        # Mémoriser l'offre pour éviter les doublons dans la même session
+                        seen.add(keys)
+
+                    except Exception as e:
+                        logger.error(f"Erreur lors du traitement de l'offre : {str(e)}")
+                        logger.exception(e)
+                        watermark.fail()
                         continue
-                        
-                    # Extraction du contenu HTML de la div avec la classe "view"
-                    description = str(view_div)
-                    
-                    # Extraction des informations complémentaires
-                    entreprise = "Non spécifié"
-                    type_contrat = "Non spécifié"
-                    
-                    info_divs = view_div.select('div')
-                    for div in info_divs:
-                        text = div.get_text(strip=True)
-                        if "A PROPOS DE" in text.upper():
-                            entreprise = text.split(":")[-1].strip()
-                        elif "TYPE DE CONTRAT" in text.upper():
-                            type_contrat = text.split(":")[-1].strip()
-                    
-                    # Sauvegarde de l'offre
-                    logger.info(f"Tentative de sauvegarde de l'offre : {titre}")
-                    with transaction.atomic():
-                        offre_obj = SenjobModel(
-                            titre=titre,
-                            entreprise=entreprise,
-                            localisation=localisation,
-                            type_contrat=type_contrat,
-                            date_publication=date_pub,
-                            date_expiration=date_exp,
-                            description_poste=description,
-                            lien_offre=lien_offre
-                        )
-                        offre_obj.save()
-                        
-                        # Ajouter aux ensembles pour éviter les doublons dans la même session
-                        existing_links.add(lien_offre)
-                        existing_titles.add(titre)
-                        
-                        total_offres += 1
-                        logger.info(f"Offre sauvegardée avec succès : {titre}")
-
-                except Exception as e:
-                    logger.error(f"Erreur lors du traitement de l'offre : {str(e)}")
-                    logger.exception(e)
-                    continue
-            
-            # Arrêter si on a trouvé trop d'offres consécutives déjà existantes
-            if consecutive_existing_offres >= max_consecutive_existing:
-                logger.info(f"Arrêt du scraping après {consecutive_existing_offres} offres consécutives déjà existantes")
-                break
                 
-            # Si la page ne contient que des offres déjà existantes, on continue quand même à la page suivante
-            if not page_has_new_offres and existing_offres_count > 0:
-                logger.info("Page ne contenant que des offres déjà existantes, passage à la page suivante")
-            
-            # Analyse de la structure de pagination
-            logger.info("Analyse de la structure de pagination...")
-            pagination_td = soup.find('td', recursive=True)
-            if pagination_td:
-                logger.info("TD de pagination trouvé")
-                pagination_divs = pagination_td.find_all('div', class_='resultsOffre')
-                logger.info(f"Nombre de divs de pagination trouvés : {len(pagination_divs)}")
+                # Pipeline arrêté par une erreur (relevée à sa fermeture) : inutile de parcourir la suite
+                if pipeline.aborted:
+                    break
                 
-                # Recherche le dernier numéro de page
-                last_page = 1
-                for div in pagination_divs:
-                    link = div.find('a')
-                    if link:
-                        try:
-                            text = link.text.strip()
-                            if text.isdigit():
-                                page_num = int(text)
-                                if page_num > last_page:
-                                    last_page = page_num
-                        except ValueError:
-                            continue
+                # Page traitée : archivée, ses validateurs seront enregistrés pour la prochaine collecte
+                archive_page(response, CrawlState.SOURCE_SENJOB, KIND_LISTING)
+                listing_validators.append(httpClient.page_validator(response))
                 
-                logger.info(f"Dernier numéro de page trouvé : {last_page}")
+                # Les offres suivantes sont plus anciennes que le repère
+                if watermark_reached:
+                    crawl_complete = True
+                    break
                 
-                # Si nous ne sommes pas à la dernière page
-                current_page = int(page_url.split('page=')[-1]) if 'page=' in page_url else 1
-                logger.info(f"Page courante : {current_page}")
+                # Sinon, arrêter si on a trouvé trop d'offres consécutives déjà existantes
+                if not checker and consecutive_existing_offres >= max_consecutive_existing:
+                    logger.info(f"Arrêt du scraping après {consecutive_existing_offres} offres consécutives déjà existantes")
+                    crawl_complete = True
+                    break
+                    
+                # Si la page ne contient que des offres déjà existantes, on continue quand même à la page suivante
+                if not page_has_new_offres and existing_offres_count > 0:
+                    logger.info("Page ne contenant que des offres déjà existantes, passage à la page suivante")
                 
-                if current_page < last_page:
-                    page_number += 1
-                    has_next_page = True
-                    logger.info(f"Passage à la page suivante : {page_number}")
+                # Analyse de la structure de pagination
+                logger.info("Analyse de la structure de pagination...")
+                pagination_td = soup.find('td', recursive=True)
+                if pagination_td:
+                    logger.info("TD de pagination trouvé")
+                    pagination_divs = pagination_td.find_all('div', class_='resultsOffre')
+                    logger.info(f"Nombre de divs de pagination trouvés : {len(pagination_divs)}")
+                    
+                    # Recherche le dernier numéro de page
+                    last_page = 1
+                    for div in pagination_divs:
+                        link = div.find('a')
+                        if link:
+                            try:
+                                text = link.text.strip()
+                                if text.isdigit():
+                                    page_num = int(text)
+                                    if page_num > last_page:
+                                        last_page = page_num
+                            except ValueError:
+                                continue
+                    
+                    logger.info(f"Dernier numéro de page trouvé : {last_page}")
+                    
+                    # Si nous ne sommes pas à la dernière page
+                    current_page = int(page_url.split('page=')[-1]) if 'page=' in page_url else 1
+                    logger.info(f"Page courante : {current_page}")
+                    
+                    if current_page < last_page:
+                        page_number += 1
+                        has_next_page = True
+                        logger.info(f"Passage à la page suivante : {page_number}")
+                    else:
+                        logger.info("Plus de pages à analyser")
+                        has_next_page = False
+                        crawl_complete = True
                 else:
-                    logger.info("Plus de pages à analyser")
+                    logger.info("Aucun TD de pagination trouvé")
                     has_next_page = False
-            else:
-                logger.info("Aucun TD de pagination trouvé")
-                has_next_page = False
-            
-        except Exception as e:
-            logger.error(f"Erreur lors du scraping de la page {page_number}: {str(e)}")
-            logger.exception(e)
-            break
+                    crawl_complete = True
+                
+            except Exception as e:
+                logger.error(f"Erreur lors du scraping de la page {page_number}: {str(e)}")
+                logger.exception(e)
+                break
     
+    total_offres = pipeline.written
+    # Validateurs des pages de liste enregistrés seulement si toutes les offres vues ont été écrites :
+    # sinon la collecte suivante s'arrêterait sur une page inchangée sans reprendre les offres manquées
+    if crawl_complete and watermark.save(pipeline.failed):
+        httpClient.save_validators(listing_validators)
     logger.info(f"Scraping terminé. Total des nouvelles offres ajoutées : {total_offres}. Offres déjà existantes ignorées : {existing_offres_count}")
-    return total_offres
\ No newline at end of file
+    if checker:
+        logger.info(f"Rafraîchissement: {checker.changed}/{checker.checked} offres existantes recontrôlées, "
+                    f"{pipeline.refreshed} mises à jour")
+    return total_offres
+
+
+def find_cards(soup):
+    """Lignes des offres d'une page de la liste."""
+    return CARDS.select(soup)
+
+
+def parse_listing_card(offre):
+    """
+    Extrait d'une ligne les champs utilisés pour la détection des doublons et le repère de collecte.
+    
+    Returns:
+        dict: titre, lien_offre et date_publication (date, None si absente),
+        ou None si la ligne n'a pas de lien
+    """
+    carte = LISTING_CARD.extract(offre)
+    if carte['lien_offre'] is None:
+        return None
+    return carte
+
+
+def parse_card_details(offre):
+    """Extrait les autres informations de la ligne (seulement pour les nouvelles offres)."""
+    details = CARD_DETAILS.extract(offre)
+    
+    # Dates cachées de la ligne : publication puis expiration
+    dates = details['dates']
+    date_publication = dates[0] if dates else None
+    date_expiration = dates[1] if len(dates) > 1 else None
+    
+    # Conversion des dates
+    try:
+        date_pub = datetime.strptime(date_publication, '%Y-%m-%d').date() if date_publication else None
+        date_exp = datetime.strptime(date_expiration, '%Y-%m-%d').date() if date_expiration else None
+        
+        if date_pub and not date_exp:
+            date_exp = date_pub + timedelta(days=30)
+        elif not date_pub and not date_exp:
+            date_pub = datetime.now().date()
+            date_exp = date_pub + timedelta(days=30)
+    except ValueError as e:
+        logger.error(f"Erreur lors du parsing des dates: {str(e)}")
+        date_pub = datetime.now().date()
+        date_exp = date_pub + timedelta(days=30)
+    
+    return {
+        'localisation': details['localisation'],
+        'date_publication': date_pub,
+        'date_expiration': date_exp,
+    }
+
+
+def build_offer(offre, carte):
+    """Offre envoyée au pipeline : titre et lien complétés par les autres informations de la ligne."""
+    return {
+        'titre': carte['titre'],
+        'lien_offre': carte['lien_offre'],
+        **parse_card_details(offre),
+    }
+
+
+def parse_offer_detail(offre_data, details_response):
+    """
+    Complète une offre de la liste avec le contenu de sa page de détail.
+    
+    Args:
+        offre_data: champs extraits de la ligne de l'offre
+        details_response: réponse de la page de détail (None si la requête a échoué)
+        
+    Returns:
+        dict: champs du modèle SenjobModel, ou None si l'offre doit être ignorée
+    """
+    if details_response is None:
+        return None
+    
+    lien_offre = offre_data['lien_offre']
+    
+    # Récupération des détails de l'offre
+    logger.info(f"Récupération des détails depuis {lien_offre}")
+    details_response.raise_for_status()
+    details_soup = make_soup(details_response.text, parse_only=DETAIL_STRAINER)
+        
+    # Extraction du contenu HTML de la div avec la classe "view"
+    details = DETAIL_PAGE.extract(details_soup)
+    description = details['description_poste']
+    if description is None:
+        logger.warning(f"Pas de contenu trouvé pour {lien_offre}")
+        return None
+    
+    # Extraction des informations complémentaires
+    entreprise = "Non spécifié"
+    type_contrat = "Non spécifié"
+    
+    for info in details['infos']:
+        if "A PROPOS DE" in info.upper():
+            entreprise = info.split(":")[-1].strip()
+        elif "TYPE DE CONTRAT" in info.upper():
+            type_contrat = info.split(":")[-1].strip()
+    
+    # Libérer l'arbre dès que les champs sont extraits
+    details_soup.decompose()
+    
+    return {
+        'titre': offre_data['titre'],
+        'entreprise': entreprise,
+        'localisation': offre_data['localisation'],
+        'type_contrat': type_contrat,
+        'date_publication': offre_data['date_publication'],
+        'date_expiration': offre_data['date_expiration'],
+        'description_poste': description,
+        'lien_offre': lien_offre,
+    }
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from ...controllers import SOURCE_MODELS
+from ...models.offreIndexModel import OffreIndex
+from ...utils.ingestion import OfferWriter
+
+
+class Command(BaseCommand):
+    help = ("Reconstruit l'index commun des offres (OffreIndex) et leur texte de recherche à partir des tables "
+            "des sources : lignes ajoutées ou mises à jour par lots, lignes des offres supprimées retirées")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', choices=list(SOURCE_MODELS), action='append',
+                            help="Source à indexer (toutes par défaut, option répétable)")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Nombre d'offres lues et écrites par lot")
+
+    def handle(self, *args, **options):
+        for source in options['source'] or SOURCE_MODELS:
+            self.backfill(source, options['batch_size'])
+
+    def backfill(self, source, batch_size):
+        model = SOURCE_MODELS[source]
+        writer = OfferWriter(model, batch_size=batch_size)
+        # Parcours par identifiant croissant : chaque lot est une lecture d'index bornée ; descriptions
+        # lues avec les offres pour le texte de recherche
+        queryset = model.objects.select_related('contenu').order_by('pk')
+        indexed, last = 0, 0
+        while True:
+            offres = list(queryset.filter(pk__gt=last)[:batch_size])
+            if not offres:
+                break
+            writer.write_index(offres, True, {offre.lien_offre: offre.pk for offre in offres})
+            indexed += len(offres)
+            last = offres[-1].pk
+        removed, _ = OffreIndex.objects.filter(source=source).exclude(offre_id__in=model.objects.values('pk')).delete()
+        self.stdout.write(f"{source}: {indexed} offres indexées, {removed} lignes retirées")
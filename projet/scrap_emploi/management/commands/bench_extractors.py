@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...controllers import SOURCE_MODULES
+from ...utils.htmlParser import make_soup
+from ...utils.pageFixtures import load_page
+
+
+class Command(BaseCommand):
+    help = ("Mesure le coût d'extraction par offre des pages enregistrées (arbre déjà construit), "
+            "avec les sélecteurs précompilés et avec les sélecteurs évalués à partir de leur texte")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=500, help="Nombre d'extractions de chaque élément")
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+
+        self.stdout.write(f"{'source':<18}{'élément':<10}{'texte':>12}{'compilé':>12}{'gain':>9}")
+        for source, module in SOURCE_MODULES.items():
+            cards = module.find_cards(make_soup(load_page(source, 'listing')))
+            detail = make_soup(load_page(source, 'detail'))
+            specs = {
+                'carte': ([module.LISTING_CARD, module.CARD_DETAILS], cards),
+                'détail': ([module.DETAIL_PAGE], [detail]),
+            }
+            for element, (extractors, targets) in specs.items():
+                timings = [self.measure(extractors, targets, iterations, precompiled) for precompiled in (False, True)]
+                gain = timings[0] / timings[1] if timings[1] else 0
+                self.stdout.write(
+                    f"{source:<18}{element:<10}" + ''.join(f'{t * 1e6:>9.1f} µs' for t in timings) + f"{gain:>8.1f}x"
+                )
+
+    def measure(self, extractors, targets, iterations, precompiled):
+        """Temps moyen (en secondes) d'extraction des champs d'un élément."""
+        start = time.perf_counter()
+        for _ in range(iterations):
+            for target in targets:
+                for extractor in extractors:
+                    extractor.extract(target, precompiled)
+        return (time.perf_counter() - start) / (iterations * len(targets))
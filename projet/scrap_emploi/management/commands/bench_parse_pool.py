@@ -0,0 +1,55 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from ...controllers import SOURCE_MODULES
+from ...utils.pageFixtures import extract_listing, load_page, make_response
+from ...utils.parsePool import ParsePool
+
+
+class Command(BaseCommand):
+    help = "Mesure le débit d'analyse des pages de détail enregistrées selon le nombre de processus d'analyse"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=200, help="Nombre de pages de détail analysées par source")
+        parser.add_argument('--processes', type=int, nargs='+', help="Nombres de processus à comparer (0 : sans pool)")
+
+    def handle(self, *args, **options):
+        cpu_count = os.cpu_count() or 1
+        counts = options['processes'] or sorted({0, 1, 2, 4, cpu_count})
+        now = timezone.now()
+
+        # Pages de toutes les sources, réparties de façon égale
+        pages = []
+        for source, module in SOURCE_MODULES.items():
+            details_kwargs = {'now': now} if source == 'offre_emploi_sn' else {}
+            offre = extract_listing(module, load_page(source, 'listing'), **details_kwargs)[0]
+            response = make_response(load_page(source, 'detail'), url=offre['lien_offre'])
+            pages.extend([(module.parse_offer_detail, offre, response)] * options['pages'])
+
+        self.stdout.write(f"{len(pages)} pages, {cpu_count} cœurs")
+        self.stdout.write(f"{'processus':>10}{'pages/s':>12}{'accélération':>15}")
+        reference = None
+        for processes in counts:
+            rate = len(pages) / self.measure(pages, processes)
+            reference = reference or rate
+            self.stdout.write(f"{processes:>10}{rate:>12.1f}{rate / reference:>14.1f}x")
+
+    def measure(self, pages, processes):
+        """Durée (en secondes) de l'analyse de toutes les pages."""
+        if not processes:
+            start = time.perf_counter()
+            for parse_detail, offre, response in pages:
+                parse_detail(dict(offre), response)
+            return time.perf_counter() - start
+        with ParsePool(processes) as pool:
+            # Démarrage des processus exclu de la mesure
+            for future in [pool.submit(parse_detail, offre, response) for parse_detail, offre, response in pages[:processes]]:
+                future.result()
+            start = time.perf_counter()
+            futures = [pool.submit(parse_detail, offre, response) for parse_detail, offre, response in pages]
+            for future in futures:
+                future.result()
+            return time.perf_counter() - start
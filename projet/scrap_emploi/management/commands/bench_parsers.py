@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from ...controllers import SOURCE_MODULES
+from ...utils.pageFixtures import extract_detail, extract_listing, load_page
+
+
+class Command(BaseCommand):
+    help = ("Compare le temps d'analyse des pages enregistrées (liste et détail) selon l'analyseur HTML, "
+            "et celui des pages de détail analysées en entier ou partiellement")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50, help="Nombre d'analyses de chaque page")
+        parser.add_argument('--parsers', nargs='+', default=['html.parser', 'lxml'], help="Analyseurs à comparer")
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        parsers = options['parsers']
+        now = timezone.now()
+
+        self.stdout.write(f"{'source':<18}{'page':<9}" + ''.join(f'{name:>14}' for name in parsers) + f"{'gain':>9}")
+        for source, module in SOURCE_MODULES.items():
+            details_kwargs = {'now': now} if source == 'offre_emploi_sn' else {}
+            listing = load_page(source, 'listing')
+            detail = load_page(source, 'detail')
+            offre = extract_listing(module, listing, **details_kwargs)[0]
+            pages = {
+                'liste': (lambda: extract_listing(module, listing, **details_kwargs), True),
+                'détail': (lambda: extract_detail(module, detail, dict(offre)), False),
+                'partiel': (lambda: extract_detail(module, detail, dict(offre)), True),
+            }
+            for page, (extract, partial) in pages.items():
+                timings = [self.measure(extract, parser, iterations, partial) for parser in parsers]
+                gain = timings[0] / timings[-1] if timings[-1] else 0
+                self.stdout.write(
+                    f"{source:<18}{page:<9}" + ''.join(f'{t * 1000:>11.2f} ms' for t in timings) + f"{gain:>8.1f}x"
+                )
+
+    def measure(self, extract, parser, iterations, partial=True):
+        """Temps moyen (en secondes) d'analyse et d'extraction d'une page."""
+        with override_settings(SCRAP_HTML_PARSER=parser, SCRAP_PARTIAL_PARSING=partial):
+            extract()
+            start = time.perf_counter()
+            for _ in range(iterations):
+                extract()
+            return (time.perf_counter() - start) / iterations
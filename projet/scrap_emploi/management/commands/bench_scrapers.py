@@ -0,0 +1,161 @@
+import json
+import random
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from ...controllers import SOURCE_MODELS, SOURCE_MODULES
+from ...models.offreIndexModel import OffreIndex
+from ...utils.htmlParser import make_soup
+from ...utils.ingestion import OfferWriter
+from ...utils.pageFixtures import make_response
+from ...utils.seenStore import get_seen_store
+from ...utils.syntheticCorpus import SyntheticOffer, listing_page
+from ...utils.textNormalizer import normalize_title
+
+# Étapes mesurées pour chaque source et chaque taille de table
+STAGES = ('doublons', 'liste', 'detail', 'ecriture')
+CARDS_PER_PAGE = 25
+# Numéros des nouvelles offres, au-delà de ceux des offres déjà en base
+NEW_OFFSET = 10 ** 8
+
+
+class Command(BaseCommand):
+    help = ("Mesure chaque étape des contrôleurs (détection des doublons, analyse des listes et des pages de détail, "
+            "écriture) avec des tables remplies de N offres synthétiques. Les données sont écrites dans une "
+            "transaction annulée à la fin : la base n'est pas modifiée.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000],
+                            help="Nombres d'offres par table à mesurer (ex. 10000 100000 500000)")
+        parser.add_argument('--source', choices=list(SOURCE_MODULES), action='append',
+                            help="Source à mesurer (toutes par défaut, option répétable)")
+        parser.add_argument('--pages', type=int, default=20,
+                            help=f"Pages de liste de {CARDS_PER_PAGE} offres (moitié déjà en base) par mesure")
+        parser.add_argument('--details', type=int, default=100, help="Pages de détail analysées par mesure")
+        parser.add_argument('--output', help="Fichier JSON des résultats")
+
+    def handle(self, *args, **options):
+        sources = options['source'] or list(SOURCE_MODULES)
+        self.rng = random.Random(0)
+        self.filled = dict.fromkeys(sources, 0)
+        results = []
+
+        self.stdout.write(f"{'source':<18}{'offres':>9}" + ''.join(f'{stage:>12}' for stage in STAGES) + '  (µs/offre)')
+        with transaction.atomic():
+            for size in sorted(options['sizes']):
+                for source in sources:
+                    self.fill(source, size)
+                    rows = [self.measure(source, size, stage, options) for stage in STAGES]
+                    results.extend(rows)
+                    self.stdout.write(f"{source:<18}{size:>9}" + ''.join(f"{row['us_par_offre']:>12.1f}" for row in rows))
+            transaction.set_rollback(True)
+
+        if options['output']:
+            report = {
+                'date': timezone.now().isoformat(),
+                'base': connection.vendor,
+                'magasin_doublons': settings.SCRAP_SEEN_STORE,
+                'analyseur': settings.SCRAP_HTML_PARSER,
+                'resultats': results,
+            }
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            self.stdout.write(f"Résultats écrits dans {options['output']}")
+
+    def fill(self, source, size):
+        """Complète la table de la source jusqu'à size offres."""
+        model = SOURCE_MODELS[source]
+        missing = size - model.objects.count()
+        start = time.perf_counter()
+        writer = OfferWriter(model)
+        for first in range(0, max(missing, 0), 2000):
+            numbers = range(self.filled[source], self.filled[source] + min(2000, missing - first))
+            for n in numbers:
+                writer.add(SyntheticOffer(source, n).model_instance(model))
+            writer.flush()
+            self.filled[source] = numbers.stop
+        if missing > 0:
+            self.stderr.write(f"{source}: {missing} offres ajoutées en {time.perf_counter() - start:.1f}s")
+
+    def sample(self, source, options):
+        """Pages de liste mêlant offres déjà en base et nouvelles offres."""
+        pages = []
+        for page in range(options['pages']):
+            known = self.rng.sample(range(self.filled[source]), min(CARDS_PER_PAGE // 2, self.filled[source]))
+            new = range(NEW_OFFSET + page * CARDS_PER_PAGE, NEW_OFFSET + (page + 1) * CARDS_PER_PAGE - len(known))
+            pages.append([SyntheticOffer(source, n) for n in [*known, *new]])
+        return pages
+
+    def parse_listing(self, module, markup):
+        """Offres d'une page de liste, comme dans la boucle du contrôleur."""
+        soup = make_soup(markup)
+        offres = []
+        for card in module.find_cards(soup):
+            carte = module.parse_listing_card(card)
+            if carte is not None:
+                offres.append(module.build_offer(card, carte))
+        soup.decompose()
+        return offres
+
+    def measure(self, source, size, stage, options):
+        module, model = SOURCE_MODULES[source], SOURCE_MODELS[source]
+        pages = self.sample(source, options)
+        offres = [offre for page in pages for offre in page]
+
+        if stage == 'doublons':
+            items = [
+                [{'lien_offre': o.lien_offre, 'reference': o.slug, 'titre_normalise': normalize_title(o.titre)} for o in page]
+                for page in pages
+            ]
+            start = time.perf_counter()
+            seen = get_seen_store(model, module.SEEN_KEYS)
+            for page in items:
+                seen.prefetch(page)
+                for item in page:
+                    seen.contains(item)
+            elapsed, count = time.perf_counter() - start, len(offres)
+
+        elif stage == 'liste':
+            markups = [listing_page(source, page) for page in pages]
+            start = time.perf_counter()
+            for markup in markups:
+                self.parse_listing(module, markup)
+            elapsed, count = time.perf_counter() - start, len(offres)
+
+        elif stage == 'detail':
+            selected = offres[:options['details']]
+            # Offres de la liste telles qu'envoyées au pipeline, avec leur page de détail
+            cards = self.parse_listing(module, listing_page(source, selected))
+            responses = [make_response(o.detail_page().encode('utf-8'), url=o.lien_offre) for o in selected]
+            start = time.perf_counter()
+            for offre, response in zip(cards, responses):
+                module.parse_offer_detail(offre, response)
+            elapsed, count = time.perf_counter() - start, len(selected)
+
+        else:
+            new = [o for o in offres if o.number >= NEW_OFFSET]
+            writer = OfferWriter(model, batch_size=settings.SCRAP_PIPELINE_BATCH_SIZE)
+            start = time.perf_counter()
+            for offre in new:
+                writer.add(model(**offre.model_fields()))
+                if len(writer) >= writer.batch_size:
+                    writer.flush()
+            writer.flush()
+            elapsed, count = time.perf_counter() - start, len(new)
+            # La table garde sa taille pour les mesures suivantes
+            liens = [o.lien_offre for o in new]
+            model.objects.filter(lien_offre__in=liens).delete()
+            OffreIndex.objects.filter(source=source, lien_offre__in=liens).delete()
+
+        return {
+            'source': source,
+            'offres': size,
+            'etape': stage,
+            'elements': count,
+            'secondes': round(elapsed, 6),
+            'us_par_offre': round(elapsed / count * 1e6, 2) if count else 0.0,
+        }
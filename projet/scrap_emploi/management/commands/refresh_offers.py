@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ...controllers import SOURCE_SCRAPERS
+from ...utils.fingerprint import REFRESH_MODES
+
+
+class Command(BaseCommand):
+    help = ("Parcourt la liste complète des sources et réécrit les offres déjà en base dont le contenu a changé "
+            "(en plus de collecter les nouvelles offres)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', choices=list(SOURCE_SCRAPERS), action='append',
+                            help="Source à rafraîchir (toutes par défaut, option répétable)")
+        parser.add_argument('--mode', choices=REFRESH_MODES, default=None,
+                            help="'cartes' : détail récupéré si la carte a changé ; 'complet' : détail de chaque offre "
+                                 "(SCRAP_REFRESH_MODE par défaut)")
+
+    def handle(self, *args, **options):
+        mode = options['mode'] or settings.SCRAP_REFRESH_MODE
+        for source in options['source'] or SOURCE_SCRAPERS:
+            self.stdout.write(f"Rafraîchissement {mode} de {source}...")
+            new_offers = SOURCE_SCRAPERS[source](refresh=mode)
+            self.stdout.write(f"{source}: {new_offers} nouvelles offres")
@@ -0,0 +1,122 @@
+import json
+import os
+from datetime import date, datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ...controllers import SOURCE_MODELS, SOURCE_MODULES
+from ...models.crawlStateModel import CrawlState
+from ...utils.htmlParser import make_soup
+from ...utils.pageArchive import KIND_DETAIL, PageArchive
+from ...utils.pipeline import OfferPipeline
+
+
+def listing_cards(module, soup, ajax):
+    """Éléments des offres d'une page de liste archivée."""
+    cards = module.find_cards(soup)
+    # Onglets AJAX d'offre-emploi.sn : seuls les <li> des offres sont renvoyés
+    if not cards and ajax:
+        cards = soup.select('li')
+    return cards
+
+
+def latest_listings(entries):
+    """
+    Pages de liste archivées dans l'ordre de récupération, une page récupérée
+    plusieurs fois sans changement n'étant gardée qu'à sa dernière récupération.
+
+    Les pages sont identifiées par leur requête : méthode, URL et corps (les
+    onglets AJAX partagent la même URL et ne diffèrent que par le formulaire).
+    """
+    latest = {}
+    for entry in entries:
+        key = (entry.get('methode', 'GET'), entry['url'], entry.get('corps', ''), entry['empreinte'])
+        # Réinsertion : la page prend la place de sa dernière récupération
+        latest.pop(key, None)
+        latest[key] = entry
+    return list(latest.values())
+
+
+def listing_offers(module, content, details_kwargs):
+    """Offres d'une page de liste archivée (HTML, ou JSON des API AJAX de WP Job Manager)."""
+    try:
+        markup = json.loads(content)['html']
+        ajax = True
+    except (ValueError, KeyError, TypeError):
+        markup = content
+        ajax = False
+    if not markup:
+        return []
+    soup = make_soup(markup)
+    offres = []
+    for card in listing_cards(module, soup, ajax):
+        carte = module.parse_listing_card(card)
+        if carte is not None:
+            offres.append(module.build_offer(card, carte, **details_kwargs))
+    soup.decompose()
+    return offres
+
+
+class Command(BaseCommand):
+    help = ("Réanalyse les pages archivées (voir utils.pageArchive) sans requête réseau : les offres sont "
+            "reconstruites depuis les listes, complétées par leur dernière page de détail et mises à jour en base")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', choices=list(SOURCE_MODULES), action='append',
+                            help="Source à réanalyser (toutes par défaut, option répétable)")
+        parser.add_argument('--depuis', type=date.fromisoformat, default=None,
+                            help="Date (AAAA-MM-JJ) à partir de laquelle les pages archivées sont lues")
+        parser.add_argument('--processes', type=int, default=os.cpu_count(),
+                            help="Nombre de processus d'analyse des pages de détail (0 : analyse dans le pipeline)")
+        parser.add_argument('--archive', default=None, help="Répertoire de l'archive (SCRAP_ARCHIVE_DIR par défaut)")
+
+    def handle(self, *args, **options):
+        root = options['archive'] or settings.SCRAP_ARCHIVE_DIR
+        if not root:
+            raise CommandError("Aucune archive : définir SCRAP_ARCHIVE_DIR ou --archive")
+        archive = PageArchive(root)
+        for source in options['source'] or SOURCE_MODULES:
+            self.reparse(archive, source, options['depuis'], options['processes'])
+
+    def reparse(self, archive, source, since, processes):
+        module, model = SOURCE_MODULES[source], SOURCE_MODELS[source]
+
+        # Dernière version archivée de chaque page de détail ; listes dans l'ordre de récupération
+        listings, details = [], {}
+        for entry in archive.entries(source, since):
+            if entry['statut'] != 200:
+                continue
+            if entry['type'] == KIND_DETAIL:
+                details[entry['url']] = entry
+            else:
+                listings.append(entry)
+        listings = latest_listings(listings)
+
+        # La carte la plus récente de chaque offre l'emporte
+        offres = {}
+        for entry in listings:
+            # Dates relatives (offre-emploi.sn) calculées à la date de récupération de la liste
+            details_kwargs = {'now': datetime.fromisoformat(entry['date'])} if source == 'offre_emploi_sn' else {}
+            for offre in listing_offers(module, archive.load(entry['empreinte']), details_kwargs):
+                offres[offre['lien_offre']] = offre
+
+        links = [lien for lien in offres if lien in details]
+        existing = set()
+        for i in range(0, len(links), 500):
+            existing.update(model.objects.filter(lien_offre__in=links[i:i + 500]).values_list('lien_offre', flat=True))
+
+        def fetch_archived(url, **kwargs):
+            return archive.response(details[url])
+
+        self.stdout.write(f"{source}: {len(listings)} pages de liste, {len(details)} pages de détail, "
+                          f"{len(offres)} offres ({len(offres) - len(links)} sans page de détail archivée)")
+        pipeline = OfferPipeline(model, module.parse_offer_detail, parse_processes=processes, fetcher=fetch_archived,
+                                 conditional=False, fingerprint_exclude=getattr(module, 'FINGERPRINT_EXCLUDE', ()))
+        with pipeline:
+            for lien in links:
+                pipeline.put(offres[lien], refresh=lien in existing)
+        if pipeline.written or pipeline.refreshed:
+            # Pipeline sans source (pas de nouvel archivage) : pages en cache invalidées ici
+            CrawlState.bump_version(source)
+        self.stdout.write(f"{source}: {pipeline.written} offres ajoutées, {pipeline.refreshed} offres mises à jour")
@@ -0,0 +1,48 @@
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...controllers import SOURCE_SCRAPERS
+from ...utils.httpReplay import recording, replaying
+
+
+class Command(BaseCommand):
+    help = ("Lance les scrapers en enregistrant les réponses des sites dans une cassette (--record), "
+            "ou sans réseau en rejouant une cassette enregistrée (--replay)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', choices=list(SOURCE_SCRAPERS), action='append',
+                            help="Source à collecter (toutes par défaut, option répétable)")
+        mode = parser.add_mutually_exclusive_group()
+        mode.add_argument('--record', metavar='REPERTOIRE', help="Enregistre les réponses dans la cassette du répertoire")
+        mode.add_argument('--replay', metavar='REPERTOIRE', help="Rejoue la cassette du répertoire à la place du réseau")
+        parser.add_argument('--latency', type=float, default=0.0, help="Rejeu : délai (en secondes) de chaque réponse")
+        parser.add_argument('--error-rate', type=float, default=0.0,
+                            help="Rejeu : proportion de requêtes en échec (erreurs injectées)")
+        parser.add_argument('--error-status', type=int, default=None,
+                            help="Rejeu : statut HTTP des erreurs injectées (erreur de connexion par défaut)")
+        parser.add_argument('--seed', type=int, default=None, help="Rejeu : graine du tirage des erreurs injectées")
+
+    def handle(self, *args, **options):
+        if options['record']:
+            transport = recording(options['record'])
+        elif options['replay']:
+            if not (Path(options['replay']) / 'index.jsonl').exists():
+                raise CommandError(f"Aucune cassette dans {options['replay']}")
+            transport = replaying(options['replay'], latency=options['latency'], error_rate=options['error_rate'],
+                                  error_status=options['error_status'], seed=options['seed'])
+        elif options['latency'] or options['error_rate']:
+            raise CommandError("--latency et --error-rate ne s'appliquent qu'au rejeu (--replay)")
+        else:
+            transport = nullcontext()
+
+        with transport as cassette:
+            for source in options['source'] or SOURCE_SCRAPERS:
+                start = time.monotonic()
+                new_offers = SOURCE_SCRAPERS[source]()
+                self.stdout.write(f"{source}: {new_offers} nouvelles offres en {time.monotonic() - start:.2f}s")
+        if cassette is not None:
+            self.stdout.write(str(cassette) if options['record'] else
+                              f"{cassette.requests} requêtes rejouées, {cassette.errors} erreurs injectées")
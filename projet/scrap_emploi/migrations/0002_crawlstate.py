@@ -0,0 +1,31 @@
+# Generated by Django 5.2.2 on 2026-10-18 08:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scrap_emploi', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CrawlState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('emploidakar', 'EmploiDakar'), ('emploisenegal', 'EmploiSenegal'), ('senjob', 'Senjob'), ('offre_emploi_sn', 'OffreEmploiSN')], max_length=50, unique=True)),
+                ('derniere_actualisation', models.DateTimeField(blank=True, null=True)),
+                ('actualisation_demandee', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'État de collecte',
+                'verbose_name_plural': 'États de collecte',
+            },
+        ),
+        migrations.AddField(
+            model_name='offreemploisn',
+            name='reference',
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.2 on 2026-10-18 08:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scrap_emploi', '0002_crawlstate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RateLimitState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('host', models.CharField(max_length=255, unique=True)),
+                ('prochaine_requete', models.FloatField(default=0)),
+                ('penalite', models.FloatField(default=1)),
+                ('latence_moyenne', models.FloatField(default=0)),
+            ],
+            options={
+                'verbose_name': 'État du limiteur de débit',
+                'verbose_name_plural': 'États du limiteur de débit',
+            },
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.2 on 2026-10-18 08:39
+
+import unicodedata
+
+from django.db import migrations, models
+
+
+def normalize_title(titre):
+    """
+    Copie de textNormalizer.normalize_title à la date de la migration (accents
+    supprimés, casse repliée, espaces réduits, 255 caractères au plus) : la
+    migration ne dépend pas des évolutions du code de l'application.
+    """
+    if not titre:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', titre)
+    key = ' '.join(''.join(c for c in decomposed if not unicodedata.combining(c)).casefold().split())
+    return key[:255]
+
+
+def remplir_titre_normalise(apps, schema_editor):
+    for model_name in ('EmploiDakar', 'EmploiSenegal', 'OffreEmploiSN', 'SenjobModel'):
+        Model = apps.get_model('scrap_emploi', model_name)
+        batch = []
+        for offre in Model.objects.only('id', 'titre').iterator(chunk_size=2000):
+            offre.titre_normalise = normalize_title(offre.titre)
+            batch.append(offre)
+            if len(batch) >= 2000:
+                Model.objects.bulk_update(batch, ['titre_normalise'])
+                batch = []
+        if batch:
+            Model.objects.bulk_update(batch, ['titre_normalise'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scrap_emploi', '0003_ratelimitstate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emploidakar',
+            name='titre_normalise',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='emploisenegal',
+            name='titre_normalise',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='offreemploisn',
+            name='titre_normalise',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='senjobmodel',
+            name='titre_normalise',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(remplir_titre_normalise, migrations.RunPython.noop),
+    ]
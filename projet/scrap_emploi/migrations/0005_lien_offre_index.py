@@ -0,0 +1,28 @@
+# Generated by Django 5.2.2 on 2026-10-18 08:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scrap_emploi', '0004_titre_normalise'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='emploidakar',
+            name='lien_offre',
+            field=models.URLField(db_index=True, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='emploisenegal',
+            name='lien_offre',
+            field=models.URLField(db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='senjobmodel',
+            name='lien_offre',
+            field=models.URLField(db_index=True, max_length=500),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.2 on 2026-10-18 08:42
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def supprimer_doublons(apps, schema_editor):
+    """Conserve la plus ancienne ligne de chaque lien_offre avant de poser la contrainte d'unicité."""
+    for model_name in ('EmploiDakar', 'EmploiSenegal', 'SenjobModel'):
+        Model = apps.get_model('scrap_emploi', model_name)
+        doublons = (
+            Model.objects.values('lien_offre')
+            .annotate(nombre=Count('id'), premier=Min('id'))
+            .filter(nombre__gt=1)
+        )
+        for doublon in doublons:
+            Model.objects.filter(lien_offre=doublon['lien_offre']).exclude(id=doublon['premier']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scrap_emploi', '0005_lien_offre_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(supprimer_doublons, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='emploidakar',
+            name='lien_offre',
+            field=models.URLField(max_length=255, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='emploisenegal',
+            name='lien_offre',
+            field=models.URLField(unique=True),
+        ),
+        migrations.AlterField(
+            model_name='senjobmodel',
+            name='lien_offre',
+            field=models.URLField(max_length=500, unique=True),
+        ),
+    ]
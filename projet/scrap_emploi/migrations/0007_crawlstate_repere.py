@@ -0,0 +1,28 @@
+# Generated by Django 5.2.2 on 2026-10-18 08:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scrap_emploi', '0006_lien_offre_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='crawlstate',
+            name='repere_date_publication',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='crawlstate',
+            name='repere_lien',
+            field=models.URLField(blank=True, default='', max_length=500),
+        ),
+        migrations.AddField(
+            model_name='crawlstate',
+            name='repere_reference',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.2 on 2026-10-18 09:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scrap_emploi', '0007_crawlstate_repere'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emploidakar',
+            name='empreinte_carte',
+            field=models.CharField(blank=True, default='', editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='emploidakar',
+            name='empreinte_detail',
+            field=models.CharField(blank=True, default='', editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='emploisenegal',
+            name='empreinte_carte',
+            field=models.CharField(blank=True, default='', editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='emploisenegal',
+            name='empreinte_detail',
+            field=models.CharField(blank=True, default='', editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='offreemploisn',
+            name='empreinte_carte',
+            field=models.CharField(blank=True, default='', editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='offreemploisn',
+            name='empreinte_detail',
+            field=models.CharField(blank=True, default='', editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='senjobmodel',
+            name='empreinte_carte',
+            field=models.CharField(blank=True, default='', editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='senjobmodel',
+            name='empreinte_detail',
+            field=models.CharField(blank=True, default='', editable=False, max_length=32),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.2 on 2026-10-18 09:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scrap_emploi', '0008_empreintes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PageValidator',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cle', models.CharField(max_length=32, unique=True)),
+                ('url', models.URLField(max_length=500)),
+                ('etag', models.CharField(blank=True, default='', max_length=255)),
+                ('last_modified', models.CharField(blank=True, default='', max_length=64)),
+                ('empreinte', models.CharField(blank=True, default='', max_length=32)),
+                ('date_verification', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Validateur de page',
+                'verbose_name_plural': 'Validateurs de pages',
+            },
+        ),
+    ]
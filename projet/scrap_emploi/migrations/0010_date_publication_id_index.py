@@ -0,0 +1,29 @@
+# Generated by Django 5.2.2 on 2026-10-18 09:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scrap_emploi', '0009_pagevalidator'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='emploidakar',
+            index=models.Index(fields=['-date_publication', '-id'], name='emploidakar_pub_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='emploisenegal',
+            index=models.Index(fields=['-date_publication', '-id'], name='emploisenegal_pub_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='offreemploisn',
+            index=models.Index(fields=['-date_publication', '-id'], name='offreemploisn_pub_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='senjobmodel',
+            index=models.Index(fields=['-date_publication', '-id'], name='senjob_pub_id_idx'),
+        ),
+    ]
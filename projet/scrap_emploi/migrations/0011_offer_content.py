@@ -0,0 +1,120 @@
+# Generated by Django 5.2.2 on 2026-10-18 09:26
+
+import django.db.models.deletion
+import scrap_emploi.models.offerContent
+from django.db import migrations, models
+
+# Modèle d'offre, modèle de contenu et descriptions déplacées dans le contenu
+CONTENT_FIELDS = [
+    ('emploidakar', 'emploidakarcontenu', ['description_poste', 'profil_recherche']),
+    ('emploisenegal', 'emploisenegalcontenu', ['description_poste', 'profil_recherche', 'description_entreprise']),
+    ('senjobmodel', 'senjobcontenu', ['description_poste']),
+    ('offreemploisn', 'offreemploisncontenu', ['description_complete']),
+]
+BATCH_SIZE = 500
+
+
+def move_descriptions(apps, schema_editor):
+    """Copie les descriptions de chaque offre dans sa table de contenu, par lots."""
+    for offer_name, content_name, fields in CONTENT_FIELDS:
+        offer_model = apps.get_model('scrap_emploi', offer_name)
+        content_model = apps.get_model('scrap_emploi', content_name)
+        last_pk = 0
+        while True:
+            rows = list(offer_model.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', *fields)[:BATCH_SIZE])
+            if not rows:
+                break
+            content_model.objects.bulk_create([
+                content_model(offre_id=row[0], **{field: value for field, value in zip(fields, row[1:]) if value is not None})
+                for row in rows
+            ])
+            last_pk = rows[-1][0]
+
+
+def restore_descriptions(apps, schema_editor):
+    for offer_name, content_name, fields in CONTENT_FIELDS:
+        offer_model = apps.get_model('scrap_emploi', offer_name)
+        content_model = apps.get_model('scrap_emploi', content_name)
+        for contenu in content_model.objects.iterator(chunk_size=BATCH_SIZE):
+            values = {field: getattr(contenu, field) for field in fields if getattr(contenu, field) is not None}
+            if values:
+                offer_model.objects.filter(pk=contenu.offre_id).update(**values)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scrap_emploi', '0010_date_publication_id_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmploiDakarContenu',
+            fields=[
+                ('offre', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='contenu', serialize=False, to='scrap_emploi.emploidakar')),
+                ('description_poste', scrap_emploi.models.offerContent.CompressedTextField(blank=True, null=True)),
+                ('profil_recherche', scrap_emploi.models.offerContent.CompressedTextField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='EmploiSenegalContenu',
+            fields=[
+                ('offre', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='contenu', serialize=False, to='scrap_emploi.emploisenegal')),
+                ('description_poste', scrap_emploi.models.offerContent.CompressedTextField(default='')),
+                ('profil_recherche', scrap_emploi.models.offerContent.CompressedTextField(default='')),
+                ('description_entreprise', scrap_emploi.models.offerContent.CompressedTextField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='OffreEmploiSNContenu',
+            fields=[
+                ('offre', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='contenu', serialize=False, to='scrap_emploi.offreemploisn')),
+                ('description_complete', scrap_emploi.models.offerContent.CompressedTextField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SenjobContenu',
+            fields=[
+                ('offre', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='contenu', serialize=False, to='scrap_emploi.senjobmodel')),
+                ('description_poste', scrap_emploi.models.offerContent.CompressedTextField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'senjob_contenu',
+            },
+        ),
+        migrations.RunPython(move_descriptions, restore_descriptions),
+        # Valeur par défaut permettant de recréer la colonne lors d'un retour arrière
+        migrations.AlterField(
+            model_name='emploisenegal',
+            name='description_poste',
+            field=models.TextField(default=''),
+        ),
+        migrations.RemoveField(
+            model_name='emploidakar',
+            name='description_poste',
+        ),
+        migrations.RemoveField(
+            model_name='emploidakar',
+            name='profil_recherche',
+        ),
+        migrations.RemoveField(
+            model_name='emploisenegal',
+            name='description_entreprise',
+        ),
+        migrations.RemoveField(
+            model_name='emploisenegal',
+            name='description_poste',
+        ),
+        migrations.RemoveField(
+            model_name='emploisenegal',
+            name='profil_recherche',
+        ),
+        migrations.RemoveField(
+            model_name='offreemploisn',
+            name='description_complete',
+        ),
+        migrations.RemoveField(
+            model_name='senjobmodel',
+            name='description_poste',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.2 on 2026-10-18 09:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scrap_emploi', '0011_offer_content'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='crawlstate',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
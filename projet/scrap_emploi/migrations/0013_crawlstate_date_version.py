@@ -0,0 +1,18 @@
+# Generated by Django 5.2.2 on 2026-10-18 09:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scrap_emploi', '0012_crawlstate_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='crawlstate',
+            name='date_version',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
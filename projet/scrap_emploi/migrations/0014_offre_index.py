@@ -0,0 +1,36 @@
+# Generated by Django 5.2.2 on 2026-10-18 09:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scrap_emploi', '0013_crawlstate_date_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OffreIndex',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('emploidakar', 'EmploiDakar'), ('emploisenegal', 'EmploiSenegal'), ('senjob', 'Senjob'), ('offre_emploi_sn', 'OffreEmploiSN')], max_length=50)),
+                ('offre_id', models.PositiveBigIntegerField()),
+                ('titre', models.CharField(max_length=255)),
+                ('titre_normalise', models.CharField(blank=True, default='', max_length=255)),
+                ('entreprise', models.CharField(blank=True, default='', max_length=255)),
+                ('lieu', models.CharField(blank=True, default='', max_length=255)),
+                ('type_contrat', models.CharField(blank=True, default='', max_length=100)),
+                ('date_publication', models.DateTimeField(blank=True, null=True)),
+                ('lien_offre', models.URLField(max_length=500)),
+            ],
+            options={
+                'verbose_name': 'Offre (index)',
+                'verbose_name_plural': 'Offres (index)',
+                'db_table': 'offre_index',
+                'ordering': ['-date_publication'],
+                'indexes': [models.Index(fields=['-date_publication', '-id'], name='offre_index_pub_id_idx'), models.Index(fields=['source', '-date_publication', '-id'], name='offre_index_source_pub_idx')],
+                'constraints': [models.UniqueConstraint(fields=('source', 'offre_id'), name='offre_index_source_offre_uniq')],
+            },
+        ),
+    ]
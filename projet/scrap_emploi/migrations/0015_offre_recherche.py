@@ -0,0 +1,66 @@
+# Generated by Django 5.2.2 on 2026-10-18 09:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Index en texte intégral d'offre_recherche, selon la base (voir utils/offerSearch.py)
+MYSQL_INDEXES = [
+    'ALTER TABLE offre_recherche ADD FULLTEXT INDEX offre_recherche_titre_ft (titre)',
+    'ALTER TABLE offre_recherche ADD FULLTEXT INDEX offre_recherche_ft (titre, texte)',
+]
+MYSQL_DROP = [
+    'ALTER TABLE offre_recherche DROP INDEX offre_recherche_ft',
+    'ALTER TABLE offre_recherche DROP INDEX offre_recherche_titre_ft',
+]
+# Table FTS5 à contenu externe (les textes restent dans offre_recherche), tenue à jour par des déclencheurs
+SQLITE_INDEXES = [
+    "CREATE VIRTUAL TABLE offre_recherche_fts USING fts5("
+    "titre, texte, content='offre_recherche', content_rowid='offre_id')",
+    "CREATE TRIGGER offre_recherche_ai AFTER INSERT ON offre_recherche BEGIN "
+    "INSERT INTO offre_recherche_fts(rowid, titre, texte) VALUES (new.offre_id, new.titre, new.texte); END",
+    "CREATE TRIGGER offre_recherche_ad AFTER DELETE ON offre_recherche BEGIN "
+    "INSERT INTO offre_recherche_fts(offre_recherche_fts, rowid, titre, texte) "
+    "VALUES ('delete', old.offre_id, old.titre, old.texte); END",
+    "CREATE TRIGGER offre_recherche_au AFTER UPDATE ON offre_recherche BEGIN "
+    "INSERT INTO offre_recherche_fts(offre_recherche_fts, rowid, titre, texte) "
+    "VALUES ('delete', old.offre_id, old.titre, old.texte); "
+    "INSERT INTO offre_recherche_fts(rowid, titre, texte) VALUES (new.offre_id, new.titre, new.texte); END",
+]
+SQLITE_DROP = [
+    'DROP TRIGGER offre_recherche_au',
+    'DROP TRIGGER offre_recherche_ad',
+    'DROP TRIGGER offre_recherche_ai',
+    'DROP TABLE offre_recherche_fts',
+]
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scrap_emploi', '0014_offre_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OffreRecherche',
+            fields=[
+                ('offre', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='recherche', serialize=False, to='scrap_emploi.offreindex')),
+                ('titre', models.TextField(blank=True, default='')),
+                ('texte', models.TextField(blank=True, default='')),
+            ],
+            options={
+                'db_table': 'offre_recherche',
+            },
+        ),
+        migrations.RunPython(
+            run({'mysql': MYSQL_INDEXES, 'sqlite': SQLITE_INDEXES}),
+            run({'mysql': MYSQL_DROP, 'sqlite': SQLITE_DROP}),
+        ),
+    ]
@@ -1,6 +1,12 @@
-from .emploisenegalModel import EmploiSenegal
-from .emploidakarModel import EmploiDakar
-from .senjobModel import SenjobModel
-from .offreEmploiSNModel import OffreEmploiSN
+from .emploisenegalModel import EmploiSenegal, EmploiSenegalContenu
+from .emploidakarModel import EmploiDakar, EmploiDakarContenu
+from .senjobModel import SenjobModel, SenjobContenu
+from .offreEmploiSNModel import OffreEmploiSN, OffreEmploiSNContenu
+from .crawlStateModel import CrawlState
+from .rateLimitStateModel import RateLimitState
+from .pageValidatorModel import PageValidator
+from .offreIndexModel import OffreIndex, OffreRecherche
 
-__all__ = ['EmploiSenegal', 'EmploiDakar', 'SenjobModel', 'OffreEmploiSN']
\ No newline at end of file
+__all__ = ['EmploiSenegal', 'EmploiDakar', 'SenjobModel', 'OffreEmploiSN', 'EmploiSenegalContenu', 'EmploiDakarContenu',
+           'SenjobContenu', 'OffreEmploiSNContenu', 'CrawlState', 'RateLimitState', 'PageValidator',
+           'OffreIndex', 'OffreRecherche']
@@ -0,0 +1,143 @@
+from datetime import timedelta
+
+from django.db import models
+from django.db.models import F, Q
+from django.utils import timezone
+
+
+class CrawlState(models.Model):
+    """
+    État de collecte d'une source : date de la dernière actualisation réussie,
+    verrou empêchant plusieurs actualisations simultanées et repère de la plus
+    récente offre vue (date de publication, référence et lien), en deçà duquel
+    une collecte incrémentale peut s'arrêter.
+
+    La version est incrémentée à chaque écriture d'offres de la source et à
+    chaque actualisation : elle fait partie de la clé des pages mises en cache,
+    qui sont ainsi invalidées sans parcourir le cache.
+    """
+    SOURCE_EMPLOIDAKAR = 'emploidakar'
+    SOURCE_EMPLOISENEGAL = 'emploisenegal'
+    SOURCE_SENJOB = 'senjob'
+    SOURCE_OFFRE_EMPLOI_SN = 'offre_emploi_sn'
+
+    SOURCE_CHOICES = [
+        (SOURCE_EMPLOIDAKAR, 'EmploiDakar'),
+        (SOURCE_EMPLOISENEGAL, 'EmploiSenegal'),
+        (SOURCE_SENJOB, 'Senjob'),
+        (SOURCE_OFFRE_EMPLOI_SN, 'OffreEmploiSN'),
+    ]
+
+    source = models.CharField(max_length=50, choices=SOURCE_CHOICES, unique=True)
+    derniere_actualisation = models.DateTimeField(null=True, blank=True)
+    actualisation_demandee = models.DateTimeField(null=True, blank=True)
+    repere_date_publication = models.DateTimeField(null=True, blank=True)
+    repere_reference = models.CharField(max_length=100, blank=True, default='')
+    repere_lien = models.URLField(max_length=500, blank=True, default='')
+    version = models.PositiveIntegerField(default=0)
+    # Date du dernier changement de version (Last-Modified des pages de liste)
+    date_version = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "État de collecte"
+        verbose_name_plural = "États de collecte"
+
+    def __str__(self):
+        return f"{self.source} - {self.derniere_actualisation}"
+
+    @classmethod
+    def last_refreshed(cls, source):
+        """Date de la dernière actualisation réussie de la source (ou None)."""
+        return cls.objects.filter(source=source).values_list('derniere_actualisation', flat=True).first()
+
+    @classmethod
+    def claim_refresh(cls, source, lock_timeout):
+        """
+        Réserve l'actualisation de la source de manière atomique.
+
+        Une seule requête concurrente obtient la réservation : les autres voient
+        le verrou posé tant qu'il n'a pas expiré (tâche perdue ou worker arrêté).
+
+        Returns:
+            datetime: date de la réservation, à rendre à release_refresh et
+            mark_refreshed (None si la source est déjà réservée)
+        """
+        now = timezone.now()
+        cls.objects.get_or_create(source=source)
+        claimed = cls.objects.filter(source=source).filter(
+            Q(actualisation_demandee__isnull=True) |
+            Q(actualisation_demandee__lt=now - timedelta(seconds=lock_timeout))
+        ).update(actualisation_demandee=now)
+        return now if claimed == 1 else None
+
+    @classmethod
+    def mark_refreshed(cls, source, claim=None):
+        """
+        Enregistre la fin d'une actualisation réussie et invalide les pages en
+        cache ; le verrou n'est libéré que s'il est encore celui de la réservation
+        claim (voir claim_refresh).
+        """
+        now = timezone.now()
+        cls.objects.get_or_create(source=source)
+        cls.objects.filter(source=source).update(
+            derniere_actualisation=now, version=F('version') + 1, date_version=now
+        )
+        if claim is not None:
+            cls.release_refresh(source, claim)
+
+    @classmethod
+    def get_version(cls, source):
+        """Version des données de la source (0 si elle n'a jamais été collectée)."""
+        return cls.get_version_info(source)[0]
+
+    @classmethod
+    def get_version_info(cls, source):
+        """Version des données de la source et date de son dernier changement (0, None si elle n'a jamais été collectée)."""
+        return cls.objects.filter(source=source).values_list('version', 'date_version').first() or (0, None)
+
+    @classmethod
+    def get_combined_version_info(cls):
+        """
+        Version des données de toutes les sources (leurs versions jointes, dans
+        l'ordre de SOURCE_CHOICES) et date du dernier changement de l'une d'elles.
+        """
+        rows = {source: (version, date_version) for source, version, date_version
+                in cls.objects.values_list('source', 'version', 'date_version')}
+        versions = [rows.get(source, (0, None)) for source, _ in cls.SOURCE_CHOICES]
+        dates = [date_version for _, date_version in versions if date_version is not None]
+        return '.'.join(str(version) for version, _ in versions), max(dates, default=None)
+
+    @classmethod
+    def bump_version(cls, source):
+        """Signale une modification des offres de la source (invalide ses pages en cache)."""
+        now = timezone.now()
+        if not cls.objects.filter(source=source).update(version=F('version') + 1, date_version=now):
+            cls.objects.get_or_create(source=source, defaults={'version': 1, 'date_version': now})
+
+    @classmethod
+    def release_refresh(cls, source, claim):
+        """
+        Libère le verrou d'actualisation sans modifier la date de fraîcheur, s'il
+        est encore celui de la réservation claim : un verrou expiré puis repris
+        par une autre actualisation est conservé.
+        """
+        cls.objects.filter(source=source, actualisation_demandee=claim).update(actualisation_demandee=None)
+
+    @classmethod
+    def get_watermark(cls, source):
+        """Repère (date_publication, reference, lien_offre) de la source, ou None."""
+        return cls.objects.filter(source=source).values_list(
+            'repere_date_publication', 'repere_reference', 'repere_lien'
+        ).first()
+
+    @classmethod
+    def set_watermark(cls, source, date_publication, reference, lien_offre):
+        """Enregistre la plus récente offre vue lors d'une collecte complète."""
+        cls.objects.update_or_create(
+            source=source,
+            defaults={
+                'repere_date_publication': date_publication,
+                'repere_reference': reference or '',
+                'repere_lien': lien_offre or '',
+            }
+        )
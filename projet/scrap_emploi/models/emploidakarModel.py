@@ -1,18 +1,46 @@
 from django.db import models
+from ..utils.textNormalizer import normalize_title
+from .crawlStateModel import CrawlState
+from .offerContent import CompressedTextField, OfferContentMixin, content_property
+from .offreIndexModel import IndexedOfferMixin
+
+class EmploiDakar(IndexedOfferMixin, OfferContentMixin, models.Model):
+    CRAWL_SOURCE = CrawlState.SOURCE_EMPLOIDAKAR
 
-class EmploiDakar(models.Model):
     titre = models.CharField(max_length=200)
-    description_poste = models.TextField(null=True, blank=True)
-    profil_recherche = models.TextField(null=True, blank=True)
+    # Descriptions HTML, stockées dans EmploiDakarContenu
+    description_poste = content_property('description_poste')
+    profil_recherche = content_property('profil_recherche')
     entreprise = models.CharField(max_length=200)
     localisation = models.CharField(max_length=200)
     type_contrat = models.CharField(max_length=50)
     date_publication = models.DateTimeField(null=True, blank=True)
-    lien_offre = models.URLField(max_length=255)
+    lien_offre = models.URLField(max_length=255, unique=True)
     reference = models.CharField(max_length=100, unique=True, null=True, blank=True)
+    titre_normalise = models.CharField(max_length=255, db_index=True, blank=True, default='', editable=False)
+    # Empreintes du contenu de la carte et de l'offre complète (détection des modifications)
+    empreinte_carte = models.CharField(max_length=32, blank=True, default='', editable=False)
+    empreinte_detail = models.CharField(max_length=32, blank=True, default='', editable=False)
 
     def __str__(self):
         return f"{self.titre} - {self.entreprise}"
 
+    def populate_derived_fields(self):
+        """Calcule les champs dérivés du contenu de l'offre."""
+        self.titre_normalise = normalize_title(self.titre)
+
+    def save(self, *args, **kwargs):
+        self.populate_derived_fields()
+        super().save(*args, **kwargs)
+
     class Meta:
-        ordering = ['-date_publication'] 
\ No newline at end of file
+        ordering = ['-date_publication']
+        # Pagination par curseur des listes (voir utils/keysetPaginator.py)
+        indexes = [models.Index(fields=['-date_publication', '-id'], name='emploidakar_pub_id_idx')] 
+
+
+class EmploiDakarContenu(models.Model):
+    """Descriptions HTML d'une offre EmploiDakar, lues seulement dans la vue de détail."""
+    offre = models.OneToOneField(EmploiDakar, on_delete=models.CASCADE, primary_key=True, related_name='contenu')
+    description_poste = CompressedTextField(null=True, blank=True)
+    profil_recherche = CompressedTextField(null=True, blank=True)
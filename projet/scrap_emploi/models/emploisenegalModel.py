@@ -1,12 +1,20 @@
 from django.db import models
+from ..utils.textNormalizer import normalize_title
+from .crawlStateModel import CrawlState
+from .offerContent import CompressedTextField, OfferContentMixin, content_property
+from .offreIndexModel import IndexedOfferMixin
+
+class EmploiSenegal(IndexedOfferMixin, OfferContentMixin, models.Model):
+    CRAWL_SOURCE = CrawlState.SOURCE_EMPLOISENEGAL
 
-class EmploiSenegal(models.Model):
     titre = models.CharField(max_length=200)
-    description_poste = models.TextField()
-    profil_recherche = models.TextField(default='')
+    # Descriptions HTML, stockées dans EmploiSenegalContenu
+    description_poste = content_property('description_poste')
+    profil_recherche = content_property('profil_recherche')
+    description_entreprise = content_property('description_entreprise')
     entreprise = models.CharField(max_length=100)
     localisation = models.CharField(max_length=100)
-    lien_offre = models.URLField()
+    lien_offre = models.URLField(unique=True)
     source = models.CharField(max_length=100, default='emploisenegal.com')
     date_publication = models.DateField()
     date_creation = models.DateTimeField(auto_now_add=True)
@@ -16,10 +24,31 @@ class EmploiSenegal(models.Model):
     competences = models.CharField(max_length=200, blank=True)
     secteur_activite = models.CharField(max_length=200, blank=True, null=True)
     site_internet = models.URLField(blank=True, null=True)
-    description_entreprise = models.TextField(blank=True, null=True)
+    titre_normalise = models.CharField(max_length=255, db_index=True, blank=True, default='', editable=False)
+    # Empreintes du contenu de la carte et de l'offre complète (détection des modifications)
+    empreinte_carte = models.CharField(max_length=32, blank=True, default='', editable=False)
+    empreinte_detail = models.CharField(max_length=32, blank=True, default='', editable=False)
 
     def __str__(self):
         return f"{self.titre} - {self.entreprise}"
 
+    def populate_derived_fields(self):
+        """Calcule les champs dérivés du contenu de l'offre."""
+        self.titre_normalise = normalize_title(self.titre)
+
+    def save(self, *args, **kwargs):
+        self.populate_derived_fields()
+        super().save(*args, **kwargs)
+
     class Meta:
-        ordering = ['-date_publication']
\ No newline at end of file
+        ordering = ['-date_publication']
+        # Pagination par curseur des listes (voir utils/keysetPaginator.py)
+        indexes = [models.Index(fields=['-date_publication', '-id'], name='emploisenegal_pub_id_idx')]
+
+
+class EmploiSenegalContenu(models.Model):
+    """Descriptions HTML d'une offre EmploiSenegal, lues seulement dans la vue de détail."""
+    offre = models.OneToOneField(EmploiSenegal, on_delete=models.CASCADE, primary_key=True, related_name='contenu')
+    description_poste = CompressedTextField(default='')
+    profil_recherche = CompressedTextField(default='')
+    description_entreprise = CompressedTextField(blank=True, null=True)
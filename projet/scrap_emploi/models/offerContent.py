@@ -0,0 +1,104 @@
+import zlib
+
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import models
+
+# Préfixe des valeurs stockées : compressées (zlib) ou non
+COMPRESSED = b'z'
+PLAIN = b't'
+
+
+def compress_text(text):
+    """Valeur stockée d'un texte, compressée si SCRAP_CONTENT_COMPRESSION_LEVEL est non nul."""
+    data = text.encode('utf-8')
+    level = settings.SCRAP_CONTENT_COMPRESSION_LEVEL
+    if level:
+        return COMPRESSED + zlib.compress(data, level)
+    return PLAIN + data
+
+
+def decompress_text(value):
+    """Texte d'une valeur stockée (quel que soit le réglage de compression lors de l'écriture)."""
+    if value is None:
+        return None
+    value = bytes(value)
+    if not value:
+        return ''
+    if value[:1] == COMPRESSED:
+        return zlib.decompress(value[1:]).decode('utf-8')
+    return value[1:].decode('utf-8')
+
+
+class CompressedTextField(models.BinaryField):
+    """Texte (HTML des descriptions) stocké compressé en base, lu et écrit comme un TextField."""
+    description = "Texte compressé"
+
+    def _check_str_default_value(self):
+        # Valeur par défaut textuelle (''), compressée comme les autres valeurs
+        return []
+
+    def from_db_value(self, value, expression, connection):
+        return decompress_text(value)
+
+    def to_python(self, value):
+        if isinstance(value, (bytes, memoryview)):
+            return decompress_text(value)
+        return value
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if isinstance(value, str):
+            value = compress_text(value)
+        return super().get_db_prep_value(value, connection, prepared)
+
+    def value_to_string(self, obj):
+        return self.value_from_object(obj)
+
+
+def content_property(name):
+    """Champ du contenu de l'offre exposé comme un attribut de l'offre (y compris à la construction)."""
+
+    def getter(offre):
+        return getattr(offre.get_contenu(), name)
+
+    def setter(offre, value):
+        setattr(offre.get_contenu(), name, value)
+
+    return property(getter, setter)
+
+
+class OfferContentMixin:
+    """
+    Offre dont les descriptions HTML sont dans une table de contenu liée (relation
+    un-à-un « contenu »).
+
+    Les listes ne chargent ainsi que les colonnes des cartes ; le contenu n'est lu
+    qu'à l'accès à l'un de ses champs (select_related('contenu') dans les vues de
+    détail) et enregistré avec l'offre.
+    """
+
+    @classmethod
+    def content_model(cls):
+        return cls._meta.get_field('contenu').related_model
+
+    @classmethod
+    def content_fields(cls):
+        return [field.name for field in cls.content_model()._meta.concrete_fields if not field.primary_key]
+
+    def get_contenu(self):
+        try:
+            return self.contenu
+        except ObjectDoesNotExist:
+            self.contenu = self.content_model()(offre=self)
+            return self.contenu
+
+    def has_contenu(self):
+        """Vrai si le contenu a été chargé ou renseigné (et doit donc être enregistré avec l'offre)."""
+        # Contenu absent lu par select_related : None en cache
+        return type(self).contenu.related.get_cached_value(self, default=None) is not None
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        if self.has_contenu():
+            self.contenu.offre = self
+            self.contenu.save()
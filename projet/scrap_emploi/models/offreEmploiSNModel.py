@@ -1,7 +1,15 @@
 from django.db import models
 from django.utils.text import slugify
+from ..utils.textNormalizer import normalize_title
+from .crawlStateModel import CrawlState
+from .offerContent import CompressedTextField, OfferContentMixin, content_property
+from .offreIndexModel import IndexedOfferMixin
+
+class OffreEmploiSN(IndexedOfferMixin, OfferContentMixin, models.Model):
+    CRAWL_SOURCE = CrawlState.SOURCE_OFFRE_EMPLOI_SN
+    LIEU_FIELD = 'lieu'
+    SEARCH_FIELDS = ('description_courte',)
 
-class OffreEmploiSN(models.Model):
     titre = models.CharField(max_length=255)
     entreprise = models.CharField(max_length=255)
     lieu = models.CharField(max_length=255, null=True, blank=True)
@@ -10,21 +18,39 @@ class OffreEmploiSN(models.Model):
     lien_offre = models.URLField(unique=True)
     lien_image = models.URLField(null=True, blank=True)
     description_courte = models.TextField(null=True, blank=True)
-    description_complete = models.TextField(null=True, blank=True)
+    # Description HTML, stockée dans OffreEmploiSNContenu
+    description_complete = content_property('description_complete')
     date_cloture = models.DateField(null=True, blank=True)
     slug = models.SlugField(max_length=255, unique=True, null=True, blank=True)
     date_scraping = models.DateTimeField(auto_now_add=True)
     reference = models.CharField(max_length=100, unique=True, null=True, blank=True)
+    titre_normalise = models.CharField(max_length=255, db_index=True, blank=True, default='', editable=False)
+    # Empreintes du contenu de la carte et de l'offre complète (détection des modifications)
+    empreinte_carte = models.CharField(max_length=32, blank=True, default='', editable=False)
+    empreinte_detail = models.CharField(max_length=32, blank=True, default='', editable=False)
     
     class Meta:
         verbose_name = "Offre Emploi SN"
         verbose_name_plural = "Offres Emploi SN"
         ordering = ['-date_publication']
+        # Pagination par curseur des listes (voir utils/keysetPaginator.py)
+        indexes = [models.Index(fields=['-date_publication', '-id'], name='offreemploisn_pub_id_idx')]
     
-    def save(self, *args, **kwargs):
+    def populate_derived_fields(self):
+        """Calcule les champs dérivés du contenu de l'offre."""
         if not self.slug:
             self.slug = slugify(f"{self.titre}-{self.entreprise}")
+        self.titre_normalise = normalize_title(self.titre)
+
+    def save(self, *args, **kwargs):
+        self.populate_derived_fields()
         super().save(*args, **kwargs)
     
     def __str__(self):
-        return f"{self.titre} - {self.entreprise}" 
\ No newline at end of file
+        return f"{self.titre} - {self.entreprise}" 
+
+
+class OffreEmploiSNContenu(models.Model):
+    """Description HTML d'une offre offre-emploi.sn, lue seulement dans la vue de détail."""
+    offre = models.OneToOneField(OffreEmploiSN, on_delete=models.CASCADE, primary_key=True, related_name='contenu')
+    description_complete = CompressedTextField(null=True, blank=True)
@@ -0,0 +1,148 @@
+from datetime import date, datetime, time
+
+from django.db import models
+from django.urls import reverse
+from django.utils import timezone
+
+from ..utils.textNormalizer import search_text
+from .crawlStateModel import CrawlState
+
+# Page de détail de chaque source
+DETAIL_URLS = {
+    CrawlState.SOURCE_EMPLOIDAKAR: 'emploi_dakar_detail',
+    CrawlState.SOURCE_EMPLOISENEGAL: 'emploi_senegal_detail',
+    CrawlState.SOURCE_SENJOB: 'senjob_detail',
+    CrawlState.SOURCE_OFFRE_EMPLOI_SN: 'offre_emploi_sn_detail',
+}
+
+
+def as_datetime(value):
+    """Date de publication commune : les DateField (minuit, fuseau courant) sont comparables aux DateTimeField."""
+    if isinstance(value, date) and not isinstance(value, datetime):
+        value = datetime.combine(value, time.min)
+        if timezone.is_naive(value):
+            value = timezone.make_aware(value)
+    return value
+
+
+class OffreIndex(models.Model):
+    """
+    Index commun des offres des quatre sources.
+
+    Chaque ligne reprend, sous des noms de colonnes communs, les champs des cartes
+    d'une offre (lieu pour localisation, date de publication toujours datée) et
+    désigne l'offre par sa source et son identifiant dans la table de la source.
+    La liste de toutes les offres, triée ou filtrée par source, est ainsi une
+    seule requête sur un index composite.
+
+    Les lignes (et le texte de recherche, OffreRecherche) sont écrites avec les
+    offres (OfferWriter, save() des modèles) ; la commande backfill_offres
+    reconstruit l'index à partir des tables.
+    """
+    source = models.CharField(max_length=50, choices=CrawlState.SOURCE_CHOICES)
+    offre_id = models.PositiveBigIntegerField()
+    titre = models.CharField(max_length=255)
+    titre_normalise = models.CharField(max_length=255, blank=True, default='')
+    entreprise = models.CharField(max_length=255, blank=True, default='')
+    lieu = models.CharField(max_length=255, blank=True, default='')
+    type_contrat = models.CharField(max_length=100, blank=True, default='')
+    date_publication = models.DateTimeField(null=True, blank=True)
+    lien_offre = models.URLField(max_length=500)
+
+    class Meta:
+        verbose_name = "Offre (index)"
+        verbose_name_plural = "Offres (index)"
+        db_table = 'offre_index'
+        ordering = ['-date_publication']
+        constraints = [models.UniqueConstraint(fields=['source', 'offre_id'], name='offre_index_source_offre_uniq')]
+        # Pagination par curseur de toutes les offres, et des offres d'une source
+        indexes = [
+            models.Index(fields=['-date_publication', '-id'], name='offre_index_pub_id_idx'),
+            models.Index(fields=['source', '-date_publication', '-id'], name='offre_index_source_pub_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.titre} - {self.entreprise} ({self.source})"
+
+    def get_absolute_url(self):
+        return reverse(DETAIL_URLS[self.source], args=[self.offre_id])
+
+    @classmethod
+    def index_fields(cls):
+        """Champs recopiés des offres (tous sauf la clé et l'identification de l'offre)."""
+        return [field.name for field in cls._meta.concrete_fields if field.name not in ('id', 'source', 'offre_id')]
+
+    @classmethod
+    def entry(cls, offre, pk=None):
+        """Ligne d'index (non sauvegardée) d'une offre enregistrée sous l'identifiant pk (par défaut offre.pk)."""
+        return cls(source=offre.CRAWL_SOURCE, offre_id=offre.pk if pk is None else pk, **offre.index_values())
+
+
+class OffreRecherche(models.Model):
+    """
+    Texte de recherche d'une offre de l'index : mots normalisés (voir
+    textNormalizer.search_tokens) du titre, et de l'entreprise, du lieu et des
+    descriptions. Les colonnes sont indexées en texte intégral (index FULLTEXT
+    sous MySQL, table FTS5 sous SQLite, voir utils/offerSearch.py).
+    """
+    offre = models.OneToOneField(OffreIndex, on_delete=models.CASCADE, primary_key=True, related_name='recherche')
+    titre = models.TextField(blank=True, default='')
+    texte = models.TextField(blank=True, default='')
+
+    class Meta:
+        db_table = 'offre_recherche'
+
+    @classmethod
+    def search_fields(cls):
+        return ['titre', 'texte']
+
+
+class IndexedOfferMixin:
+    """
+    Offre recopiée dans OffreIndex (et OffreRecherche).
+
+    CRAWL_SOURCE: source de l'offre (CrawlState.SOURCE_*)
+    LIEU_FIELD: champ de l'offre repris comme lieu
+    SEARCH_FIELDS: champs de l'offre recherchés en plus de l'entreprise, du lieu et des descriptions
+    """
+    CRAWL_SOURCE = None
+    LIEU_FIELD = 'localisation'
+    SEARCH_FIELDS = ()
+
+    def index_values(self):
+        """Champs communs de l'offre, sous les noms de colonnes d'OffreIndex."""
+        return {
+            'titre': self.titre,
+            'titre_normalise': self.titre_normalise,
+            'entreprise': self.entreprise or '',
+            'lieu': getattr(self, self.LIEU_FIELD) or '',
+            'type_contrat': self.type_contrat or '',
+            'date_publication': as_datetime(self.date_publication),
+            'lien_offre': self.lien_offre,
+        }
+
+    def search_values(self, contenu=None):
+        """
+        Texte de recherche de l'offre, sous les noms de colonnes d'OffreRecherche.
+
+        contenu: descriptions de l'offre (par défaut, celles chargées ou renseignées sur l'offre)
+        """
+        if contenu is None and self.has_contenu():
+            contenu = self.contenu
+        textes = [self.entreprise, getattr(self, self.LIEU_FIELD)]
+        textes += [getattr(self, name) for name in self.SEARCH_FIELDS]
+        if contenu is not None:
+            textes += [getattr(contenu, name) for name in self.content_fields()]
+        return {'titre': search_text(self.titre), 'texte': search_text(*textes)}
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        entry, _ = OffreIndex.objects.update_or_create(source=self.CRAWL_SOURCE, offre_id=self.pk,
+                                                       defaults=self.index_values())
+        # Descriptions non chargées : lues en base sans être attachées à l'offre
+        contenu = None if self.has_contenu() else self.content_model().objects.filter(offre_id=self.pk).first()
+        OffreRecherche.objects.update_or_create(offre=entry, defaults=self.search_values(contenu))
+
+    def delete(self, *args, **kwargs):
+        OffreIndex.objects.filter(source=self.CRAWL_SOURCE, offre_id=self.pk).delete()
+        return super().delete(*args, **kwargs)
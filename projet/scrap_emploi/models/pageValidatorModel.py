@@ -0,0 +1,25 @@
+from django.db import models
+
+
+class PageValidator(models.Model):
+    """
+    Validateurs HTTP de la dernière version traitée d'une page (liste ou détail).
+
+    Ils sont renvoyés dans If-None-Match / If-Modified-Since lors de la collecte
+    suivante ; l'empreinte du contenu sert de repli pour les sites qui n'envoient
+    ni ETag ni Last-Modified.
+    """
+    # Empreinte de la requête (méthode, URL et paramètres du formulaire des requêtes AJAX)
+    cle = models.CharField(max_length=32, unique=True)
+    url = models.URLField(max_length=500)
+    etag = models.CharField(max_length=255, blank=True, default='')
+    last_modified = models.CharField(max_length=64, blank=True, default='')
+    empreinte = models.CharField(max_length=32, blank=True, default='')
+    date_verification = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Validateur de page"
+        verbose_name_plural = "Validateurs de pages"
+
+    def __str__(self):
+        return self.url
@@ -0,0 +1,22 @@
+from django.db import models
+
+
+class RateLimitState(models.Model):
+    """
+    État partagé du limiteur de débit pour un site, utilisé pour coordonner
+    plusieurs workers Celery qui interrogent le même hôte.
+    """
+    host = models.CharField(max_length=255, unique=True)
+    # Date (timestamp) théorique à partir de laquelle le prochain créneau est libre
+    prochaine_requete = models.FloatField(default=0)
+    # Multiplicateur de l'intervalle entre requêtes (1 = débit nominal)
+    penalite = models.FloatField(default=1)
+    # Moyenne mobile du temps de réponse, en secondes
+    latence_moyenne = models.FloatField(default=0)
+
+    class Meta:
+        verbose_name = "État du limiteur de débit"
+        verbose_name_plural = "États du limiteur de débit"
+
+    def __str__(self):
+        return f"{self.host} (pénalité x{self.penalite:.2f})"
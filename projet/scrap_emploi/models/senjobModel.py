@@ -1,20 +1,50 @@
 from django.db import models
+from ..utils.textNormalizer import normalize_title
+from .crawlStateModel import CrawlState
+from .offerContent import CompressedTextField, OfferContentMixin, content_property
+from .offreIndexModel import IndexedOfferMixin
+
+class SenjobModel(IndexedOfferMixin, OfferContentMixin, models.Model):
+    CRAWL_SOURCE = CrawlState.SOURCE_SENJOB
 
-class SenjobModel(models.Model):
     titre = models.CharField(max_length=255)
     entreprise = models.CharField(max_length=255, null=True, blank=True)
     localisation = models.CharField(max_length=100)
     type_contrat = models.CharField(max_length=100, null=True, blank=True)
     date_publication = models.DateField()
     date_expiration = models.DateField()
-    lien_offre = models.URLField(max_length=500)
-    description_poste = models.TextField(null=True, blank=True)
+    lien_offre = models.URLField(max_length=500, unique=True)
+    # Description HTML, stockée dans SenjobContenu
+    description_poste = content_property('description_poste')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    titre_normalise = models.CharField(max_length=255, db_index=True, blank=True, default='', editable=False)
+    # Empreintes du contenu de la carte et de l'offre complète (détection des modifications)
+    empreinte_carte = models.CharField(max_length=32, blank=True, default='', editable=False)
+    empreinte_detail = models.CharField(max_length=32, blank=True, default='', editable=False)
 
     class Meta:
         db_table = 'senjob'
         ordering = ['-date_publication']
+        # Pagination par curseur des listes (voir utils/keysetPaginator.py)
+        indexes = [models.Index(fields=['-date_publication', '-id'], name='senjob_pub_id_idx')]
 
     def __str__(self):
-        return self.titre 
\ No newline at end of file
+        return self.titre
+
+    def populate_derived_fields(self):
+        """Calcule les champs dérivés du contenu de l'offre."""
+        self.titre_normalise = normalize_title(self.titre)
+
+    def save(self, *args, **kwargs):
+        self.populate_derived_fields()
+        super().save(*args, **kwargs) 
+
+
+class SenjobContenu(models.Model):
+    """Description HTML d'une offre Senjob, lue seulement dans la vue de détail."""
+    offre = models.OneToOneField(SenjobModel, on_delete=models.CASCADE, primary_key=True, related_name='contenu')
+    description_poste = CompressedTextField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'senjob_contenu'
@@ -1,64 +1,98 @@
 from celery import shared_task
+from django.conf import settings
+from django.utils.dateparse import parse_datetime
+from .controllers import SOURCE_SCRAPERS
 from .controllers.emploidakarController import scrape_emplois_dakar
 from .controllers.emploisenegalController import scrape_emplois
 from .controllers.senjobController import scrape_senjob
 from .controllers.offreEmploiSNController import scrape_offre_emploi_sn
+from .models.crawlStateModel import CrawlState
+from .utils.pageCache import prewarm
 import logging
 
 logger = logging.getLogger(__name__)
 
-@shared_task
-def scrape_emploidakar_periodic():
+
+def prewarm_source(source):
+    """Préchauffe le cache des premières pages de la source (un échec n'interrompt pas la tâche)."""
+    try:
+        pages = prewarm(source)
+        logger.info(f"{pages} pages de {source} mises en cache")
+    except Exception as e:
+        logger.error(f"Échec du préchauffage du cache de {source}: {str(e)}")
+
+
+def run_scrape(source, name, scraper, claim=None, refresh=None):
     """
-    Tâche périodique pour scraper les offres d'EmploiDakar
+    Collecte de la source sous sa réservation d'actualisation (voir
+    CrawlState.claim_refresh).
+
+    claim: réservation déjà obtenue par la vue qui a mis la tâche en file (date
+    ISO) ; sans elle (tâches périodiques), la source est réservée ici et la
+    collecte n'a pas lieu si une autre actualisation est en cours.
+    refresh: mode de rafraîchissement des offres déjà en base passé au scraper
+    ('cartes' ou 'complet', voir utils.fingerprint)
     """
+    claim = parse_datetime(claim) if claim else CrawlState.claim_refresh(source, settings.SCRAP_REFRESH_LOCK_TIMEOUT)
+    if claim is None:
+        logger.info(f"Actualisation de {name} déjà en cours, collecte ignorée")
+        return 0
     try:
-        logger.info("Démarrage du scraping périodique EmploiDakar")
-        new_offers = scrape_emplois_dakar()
-        logger.info(f"Scraping EmploiDakar terminé. {new_offers} nouvelles offres ajoutées.")
+        logger.info(f"Démarrage du {f'rafraîchissement {refresh}' if refresh else 'scraping périodique'} {name}")
+        new_offers = scraper(refresh=refresh) if refresh else scraper()
+        CrawlState.mark_refreshed(source, claim)
+        prewarm_source(source)
+        logger.info(f"Scraping {name} terminé. {new_offers} nouvelles offres ajoutées.")
         return new_offers
     except Exception as e:
-        logger.error(f"Erreur lors du scraping EmploiDakar: {str(e)}")
+        logger.error(f"Erreur lors du scraping {name}: {str(e)}")
         raise
+    finally:
+        CrawlState.release_refresh(source, claim)
 
 @shared_task
-def scrape_emploisenegal_periodic():
+def scrape_emploidakar_periodic(claim=None):
+    """
+    Tâche périodique pour scraper les offres d'EmploiDakar
+    """
+    return run_scrape(CrawlState.SOURCE_EMPLOIDAKAR, 'EmploiDakar', scrape_emplois_dakar, claim)
+
+@shared_task
+def scrape_emploisenegal_periodic(claim=None):
     """
     Tâche périodique pour scraper les offres d'EmploiSenegal
     """
-    try:
-        logger.info("Démarrage du scraping périodique EmploiSenegal")
-        new_offers = scrape_emplois()
-        logger.info(f"Scraping EmploiSenegal terminé. {new_offers} nouvelles offres ajoutées.")
-        return new_offers
-    except Exception as e:
-        logger.error(f"Erreur lors du scraping EmploiSenegal: {str(e)}")
-        raise
+    return run_scrape(CrawlState.SOURCE_EMPLOISENEGAL, 'EmploiSenegal', scrape_emplois, claim)
 
 @shared_task
-def scrape_senjob_periodic():
+def scrape_senjob_periodic(claim=None):
     """
     Tâche périodique pour scraper les offres de Senjob
     """
-    try:
-        logger.info("Démarrage du scraping périodique Senjob")
-        new_offers = scrape_senjob()
-        logger.info(f"Scraping Senjob terminé. {new_offers} nouvelles offres ajoutées.")
-        return new_offers
-    except Exception as e:
-        logger.error(f"Erreur lors du scraping Senjob: {str(e)}")
-        raise
+    return run_scrape(CrawlState.SOURCE_SENJOB, 'Senjob', scrape_senjob, claim)
 
 @shared_task
-def scrape_offre_emploi_sn_periodic():
+def scrape_offre_emploi_sn_periodic(claim=None):
     """
     Tâche périodique pour scraper les offres d'OffreEmploiSN
     """
-    try:
-        logger.info("Démarrage du scraping périodique OffreEmploiSN")
-        new_offers = scrape_offre_emploi_sn()
-        logger.info(f"Scraping OffreEmploiSN terminé. {new_offers} nouvelles offres ajoutées.")
-        return new_offers
-    except Exception as e:
-        logger.error(f"Erreur lors du scraping OffreEmploiSN: {str(e)}")
-        raise 
\ No newline at end of file
+    return run_scrape(CrawlState.SOURCE_OFFRE_EMPLOI_SN, 'OffreEmploiSN', scrape_offre_emploi_sn, claim)
+
+@shared_task
+def refresh_offers_periodic(source=None, mode=None):
+    """
+    Tâche périodique de rafraîchissement des offres déjà en base (toutes les sources par défaut)
+
+    Chaque source est rafraîchie sous sa réservation d'actualisation (voir
+    run_scrape) : une source déjà en cours de collecte est ignorée.
+    """
+    mode = mode or settings.SCRAP_REFRESH_MODE
+    sources = [source] if source else list(SOURCE_SCRAPERS)
+    new_offers = 0
+    for source in sources:
+        try:
+            new_offers += run_scrape(source, source, SOURCE_SCRAPERS[source], refresh=mode)
+        except Exception:
+            # Erreur journalisée par run_scrape : les sources suivantes sont rafraîchies
+            continue
+    return new_offers
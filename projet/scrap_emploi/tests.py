@@ -1,3 +1,1116 @@
-from django.test import TestCase
+import array
+import datetime
+import importlib
+import io
+import json
+import tempfile
+import threading
+from types import SimpleNamespace
 
-# Create your tests here.
+import requests
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from .controllers import SOURCE_MODELS, SOURCE_MODULES, SOURCE_SCRAPERS, emploidakarController, offreEmploiSNController
+from .management.commands.reparse_archive import latest_listings
+from .models.crawlStateModel import CrawlState
+from .models.emploidakarModel import EmploiDakar
+from .models.offreEmploiSNModel import OffreEmploiSN
+from .models.offreIndexModel import OffreIndex
+from .models.pageValidatorModel import PageValidator
+from .models.rateLimitStateModel import RateLimitState
+from .models.senjobModel import SenjobModel
+from .tasks import refresh_offers_periodic, run_scrape
+from .utils import httpClient, rateLimiter
+from .utils.crawlWatermark import Watermark, as_datetime
+from .utils.extractor import Extractor, Field, attr, text, texts
+from .utils.fetchEngine import PagePrefetcher
+from .utils.fingerprint import fingerprint
+from .utils.htmlParser import make_soup
+from .utils.httpReplay import Cassette, RecordingAdapter, ReplayAdapter, replaying
+from .utils.ingestion import OfferWriter
+from .utils.keysetPaginator import KeysetPaginator
+from .utils.offerSearch import boolean_query, search
+from .utils.pageCache import prewarm
+from .utils.pageArchive import KIND_DETAIL, KIND_LISTING, PageArchive
+from .utils.pageFixtures import extract_detail, extract_listing, load_page, make_response
+from .utils.parsePool import ParsePool
+from .utils.pipeline import OfferPipeline
+from .utils.rateLimiter import DatabaseBackend, MemoryBackend, RateLimiter
+from .utils.seenStore import DatabaseSeenStore, HashSeenStore, hash64
+from .utils.syntheticCorpus import SyntheticOffer, listing_page
+from .utils.textNormalizer import normalize_title, search_tokens
+from .views import revalidate_source
+
+try:
+    import lxml  # noqa: F401
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+
+def extract_fixtures(source, parser, now):
+    """Champs extraits des pages enregistrées d'une source avec l'analyseur donné."""
+    module = SOURCE_MODULES[source]
+    details_kwargs = {'now': now} if source == 'offre_emploi_sn' else {}
+    with override_settings(SCRAP_HTML_PARSER=parser):
+        offres = extract_listing(module, load_page(source, 'listing'), **details_kwargs)
+        detail = extract_detail(module, load_page(source, 'detail'), dict(offres[0]))
+    return offres, detail
+
+
+def form_body(build_request, page):
+    """Corps de la requête AJAX d'une page de liste, tel qu'envoyé par requests."""
+    method, url, kwargs = build_request(page)
+    return url, requests.Request(method, url, data=kwargs['data']).prepare().body
+
+
+def fixture_cassette(failing=(), failing_tabs=()):
+    """
+    Cassette des quatre sites construite à partir des pages enregistrées : une
+    page de liste par source (les suivantes sont vides) et la page de détail
+    enregistrée pour chacune de ses offres.
+
+    failing: liens des offres dont la première demande de la page de détail échoue (statut 500)
+    failing_tabs: onglets d'offre-emploi.sn dont la première demande échoue (statut 500)
+    """
+    cassette = Cassette()
+    url, body = form_body(emploidakarController.listing_request, 1)
+    listing = load_page('emploidakar', 'listing').decode('utf-8')
+    cassette.add('POST', url, json.dumps({'html': listing, 'max_num_pages': 1}), body=body)
+    cassette.add('GET', 'https://www.emploisenegal.com/recherche-jobs-senegal?page=0', load_page('emploisenegal', 'listing'))
+    cassette.add('GET', 'https://www.emploisenegal.com/recherche-jobs-senegal?page=1', '<html><body></body></html>')
+    cassette.add('GET', 'https://senjob.com/sn/offres-d-emploi.php', load_page('senjob', 'listing'))
+    for page in (2, 3):
+        cassette.add('GET', f'https://senjob.com/sn/offres-d-emploi.php?page={page}', '<html><body></body></html>')
+        url, body = form_body(offreEmploiSNController.listing_request, page)
+        if page in failing_tabs:
+            cassette.add('POST', url, 'Erreur', status_code=500, body=body)
+        cassette.add('POST', url, json.dumps({'html': ''}), body=body)
+    cassette.add('GET', 'https://offre-emploi.sn/offre-emploi-au-senegal/', load_page('offre_emploi_sn', 'listing'))
+    for source, module in SOURCE_MODULES.items():
+        for offre in extract_listing(module, load_page(source, 'listing')):
+            if offre['lien_offre'] in failing:
+                cassette.add('GET', offre['lien_offre'], 'Erreur', status_code=500)
+            cassette.add('GET', offre['lien_offre'], load_page(source, 'detail'))
+    return cassette
+
+
+@override_settings(SCRAP_HTML_PARSER='html.parser')
+class HtmlParserTests(SimpleTestCase):
+
+    def test_fixtures_are_extracted(self):
+        """Les pages enregistrées produisent les champs attendus (référence html.parser)."""
+        now = timezone.now()
+        expected = {
+            'emploidakar': ('Responsable Administratif et Financier (H/F)', 'Groupe Sonatel', 'description_poste'),
+            'emploisenegal': ('Chef de projet informatique H/F', 'Orange Digital Center', 'description_poste'),
+            'senjob': ('Comptable confirmé (H/F)', 'Cabinet Ndiaye Audit & Conseil', 'description_poste'),
+            'offre_emploi_sn': ('Ingénieur réseaux et télécoms', 'Free Sénégal', 'description_complete'),
+        }
+        for source, (titre, entreprise, description_field) in expected.items():
+            with self.subTest(source=source):
+                offres, detail = extract_fixtures(source, 'html.parser', now)
+                self.assertEqual(len(offres), 3)
+                self.assertEqual(offres[0]['titre'], titre)
+                self.assertEqual(detail['entreprise'], entreprise)
+                self.assertIn('<', detail[description_field])
+
+    def test_unknown_parser_falls_back_to_html_parser(self):
+        with override_settings(SCRAP_HTML_PARSER='analyseur-inexistant'):
+            soup = make_soup('<ul><li class="job_listing">Offre</li></ul>')
+        self.assertEqual(soup.select_one('li.job_listing').get_text(), 'Offre')
+
+
+class LxmlEquivalenceTests(SimpleTestCase):
+    """lxml doit extraire exactement les mêmes champs que html.parser."""
+
+    def setUp(self):
+        if not HAS_LXML:
+            self.skipTest("lxml n'est pas installé")
+        self.now = timezone.now()
+
+    def test_listing_fields_identical(self):
+        for source in SOURCE_MODULES:
+            with self.subTest(source=source):
+                reference, _ = extract_fixtures(source, 'html.parser', self.now)
+                offres, _ = extract_fixtures(source, 'lxml', self.now)
+                self.assertEqual(offres, reference)
+
+    def test_detail_fields_identical(self):
+        for source in SOURCE_MODULES:
+            with self.subTest(source=source):
+                _, reference = extract_fixtures(source, 'html.parser', self.now)
+                _, detail = extract_fixtures(source, 'lxml', self.now)
+                self.assertEqual(detail, reference)
+
+
+class PartialParsingTests(SimpleTestCase):
+    """L'analyse partielle des pages de détail doit extraire les mêmes champs que l'analyse complète."""
+
+    def test_detail_fields_identical(self):
+        now = timezone.now()
+        parsers = ['html.parser', 'lxml'] if HAS_LXML else ['html.parser']
+        for parser in parsers:
+            for source in SOURCE_MODULES:
+                with self.subTest(source=source, parser=parser):
+                    with override_settings(SCRAP_PARTIAL_PARSING=False):
+                        _, reference = extract_fixtures(source, parser, now)
+                    with override_settings(SCRAP_PARTIAL_PARSING=True):
+                        _, detail = extract_fixtures(source, parser, now)
+                    self.assertEqual(detail, reference)
+
+
+class ParsePoolTests(SimpleTestCase):
+    """Les processus d'analyse retournent les mêmes champs que l'analyse dans le processus principal."""
+
+    def test_detail_fields_identical(self):
+        now = timezone.now()
+        with ParsePool(2) as pool:
+            for source, module in SOURCE_MODULES.items():
+                with self.subTest(source=source):
+                    offres, reference = extract_fixtures(source, 'html.parser', now)
+                    response = make_response(load_page(source, 'detail'), url=offres[0]['lien_offre'])
+                    fields = pool.submit(module.parse_offer_detail, dict(offres[0]), response).result()
+                    self.assertEqual(fields, reference)
+
+
+def senjob_fields(offre, response):
+    return {'titre': offre['titre'], 'localisation': 'Dakar', 'date_publication': datetime.date(2026, 10, 1),
+            'date_expiration': datetime.date(2026, 11, 1), 'lien_offre': offre['lien_offre']}
+
+
+class PipelineFailureTests(SimpleTestCase):
+    """Une erreur inattendue d'un étage arrête le pipeline sans bloquer la collecte."""
+
+    def make_pipeline(self, fetcher=None):
+        fetcher = fetcher or (lambda url, conditional=False: SimpleNamespace(not_modified=False))
+        return OfferPipeline(SenjobModel, senjob_fields, fetch_workers=2, queue_size=2, batch_size=1, parse_processes=0,
+                             fetcher=fetcher)
+
+    def run_pipeline(self, pipeline, count=50):
+        """Envoie count offres au pipeline puis le ferme ; retourne l'erreur relevée."""
+        result = {}
+
+        def scrape():
+            try:
+                with pipeline:
+                    for n in range(count):
+                        pipeline.put({'titre': f'Poste {n}', 'lien_offre': f'https://senjob.com/sn/{n}.html'})
+            except Exception as e:
+                result['error'] = e
+
+        thread = threading.Thread(target=scrape, daemon=True)
+        thread.start()
+        thread.join(10)
+        self.assertFalse(thread.is_alive(), "pipeline bloqué")
+        return result.get('error')
+
+    def test_write_error_is_raised_by_close(self):
+        pipeline = self.make_pipeline()
+        error = RuntimeError("base indisponible")
+
+        def flush():
+            raise error
+
+        pipeline.flush = flush
+        with self.assertLogs('scrap_emploi', 'ERROR'):
+            self.assertIs(self.run_pipeline(pipeline), error)
+        self.assertTrue(pipeline.aborted)
+
+    def test_parse_stage_error_is_raised_by_close(self):
+        # Réponse sans not_modified : erreur hors de l'analyse de l'offre
+        pipeline = self.make_pipeline(fetcher=lambda url, conditional=False: object())
+        with self.assertLogs('scrap_emploi', 'ERROR'):
+            self.assertIsInstance(self.run_pipeline(pipeline), AttributeError)
+
+
+class PipelineValidatorTests(TransactionTestCase):
+
+    def test_validators_of_offers_not_written_are_not_saved(self):
+        for n in (1, 2):
+            SenjobModel.objects.create(titre=f'Poste {n}', localisation='Dakar', date_publication=datetime.date(2026, 10, 1),
+                                       date_expiration=datetime.date(2026, 11, 1), lien_offre=f'https://senjob.com/sn/{n}.html')
+
+        def fetcher(url, conditional=False):
+            return SimpleNamespace(not_modified=False, validator=PageValidator(cle=httpClient.validator_key('GET', url), url=url))
+
+        # Titre manquant : le rafraîchissement de l'offre 1 échoue (bulk_update refusé par la base)
+        pipeline = OfferPipeline(SenjobModel, senjob_fields, fetch_workers=1, batch_size=1, parse_processes=0, fetcher=fetcher)
+        with self.assertLogs('scrap_emploi', 'ERROR'), pipeline:
+            pipeline.put({'titre': None, 'lien_offre': 'https://senjob.com/sn/1.html'}, refresh=True)
+            pipeline.put({'titre': 'Poste 2 (mis à jour)', 'lien_offre': 'https://senjob.com/sn/2.html'}, refresh=True)
+        self.assertEqual(pipeline.failed, {'https://senjob.com/sn/1.html'})
+        self.assertEqual(list(PageValidator.objects.values_list('url', flat=True)), ['https://senjob.com/sn/2.html'])
+
+
+class ExtractorTests(SimpleTestCase):
+
+    def test_fallback_selectors_and_defaults(self):
+        extractor = Extractor(
+            titre=Field(('h2', 'h3'), text),
+            lien=Field('a', attr('href'), default=''),
+            source=Field(None, attr('data-source')),
+            tags=Field('li', text, many=True, default=[]),
+            secteurs=Field(('ul.secteurs span', 'ol.secteurs span'), texts, many=True, default=[]),
+        )
+        card = make_soup('<div data-source="sn"><h3> Offre </h3><a>sans lien</a>'
+                         '<ol class="secteurs"><span>Banque</span><span>Audit</span></ol></div>').div
+        self.assertEqual(extractor.extract(card), {'titre': 'Offre', 'lien': '', 'source': 'sn', 'tags': [],
+                                                   'secteurs': ['Banque', 'Audit']})
+        self.assertEqual(extractor.extract(card), extractor.extract(card, precompiled=False))
+
+
+class SyntheticCorpusTests(SimpleTestCase):
+    """Les pages générées pour les mesures sont analysées comme les pages des sites."""
+
+    def test_pages_are_parsed_back(self):
+        for source, module in SOURCE_MODULES.items():
+            with self.subTest(source=source):
+                offres = [SyntheticOffer(source, n) for n in range(3)]
+                cards = extract_listing(module, listing_page(source, offres).encode('utf-8'))
+                self.assertEqual([carte['lien_offre'] for carte in cards], [offre.lien_offre for offre in offres])
+                detail = extract_detail(module, offres[0].detail_page().encode('utf-8'), dict(cards[0]))
+                self.assertEqual(detail['titre'], offres[0].titre)
+                self.assertEqual(detail['entreprise'], offres[0].entreprise)
+
+
+class TitleNormalizerTests(SimpleTestCase):
+    titles = ['Comptable Sénior', '  COMPTABLE   senior ', 'Développeur C++ (H/F)', 'Ingénieur\tQualité\nSécurité',
+              'Œuvre — Chef d\'équipe', '', None, 'x' * 300]
+
+    def test_accents_case_and_spaces_are_folded(self):
+        self.assertEqual(normalize_title('Comptable Sénior'), 'comptable senior')
+        self.assertEqual(normalize_title('  COMPTABLE   senior '), 'comptable senior')
+        self.assertEqual(normalize_title('Ingénieur\tQualité\nSécurité'), 'ingenieur qualite securite')
+        self.assertEqual(normalize_title('STRASSE Maß'), 'strasse mass')
+
+    def test_punctuation_is_kept(self):
+        self.assertEqual(normalize_title('Développeur C++ (H/F)'), 'developpeur c++ (h/f)')
+        self.assertNotEqual(normalize_title('Chef-Comptable'), normalize_title('Chef Comptable'))
+
+    def test_empty_and_long_titles(self):
+        self.assertEqual(normalize_title(None), '')
+        self.assertEqual(normalize_title('   '), '')
+        self.assertEqual(len(normalize_title('x' * 300)), 255)
+
+    def test_migration_copy_matches(self):
+        migration = importlib.import_module('scrap_emploi.migrations.0004_titre_normalise')
+        for titre in self.titles:
+            self.assertEqual(migration.normalize_title(titre), normalize_title(titre), titre)
+
+
+class OfferRefreshTests(TestCase):
+
+    def make_offre(self, n, localisation='Dakar'):
+        fields = {
+            'titre': f'Poste {n}',
+            'localisation': localisation,
+            'date_publication': datetime.date(2026, 10, 1),
+            'date_expiration': datetime.date(2026, 11, 1),
+            'lien_offre': f'https://senjob.com/sn/jobseekers/offre-{n}.html',
+        }
+        return SenjobModel(**fields, empreinte_carte=fingerprint(fields), empreinte_detail=fingerprint(fields))
+
+    def test_only_changed_offers_are_rewritten(self):
+        writer = OfferWriter(SenjobModel)
+        for n in range(3):
+            writer.add(self.make_offre(n))
+        self.assertEqual(writer.flush(), 3)
+        created_at = SenjobModel.objects.get(titre='Poste 1').created_at
+
+        for n in range(3):
+            writer.add_refresh(self.make_offre(n, localisation='Thiès' if n == 1 else 'Dakar'))
+        writer.add_refresh(self.make_offre(9))
+        self.assertEqual(writer.flush(), 0)
+
+        self.assertEqual(writer.refreshed, 1)
+        self.assertEqual(SenjobModel.objects.count(), 3)
+        offre = SenjobModel.objects.get(titre='Poste 1')
+        self.assertEqual(offre.localisation, 'Thiès')
+        self.assertEqual(offre.created_at, created_at)
+        self.assertEqual(offre.titre_normalise, 'poste 1')
+
+    def test_duplicates_in_a_batch_count_once(self):
+        writer = OfferWriter(SenjobModel)
+        writer.add(self.make_offre(0))
+        writer.flush()
+
+        for n in (0, 1, 1, 2, 0):
+            writer.add(self.make_offre(n))
+        self.assertEqual(writer.flush(), 2)
+        self.assertEqual(SenjobModel.objects.count(), 3)
+
+        updater = OfferWriter(SenjobModel, update_fields=['localisation'])
+        updater.add(self.make_offre(3, localisation='Thiès'))
+        updater.add(self.make_offre(3, localisation='Ziguinchor'))
+        self.assertEqual(updater.flush(), 1)
+        self.assertEqual(SenjobModel.objects.get(titre='Poste 3').localisation, 'Ziguinchor')
+
+    def test_offers_that_cannot_be_written_are_reported(self):
+        writer = OfferWriter(SenjobModel)
+        writer.add(self.make_offre(0))
+        writer.flush()
+
+        invalide = self.make_offre(1)
+        invalide.titre = None
+        for offre in (self.make_offre(0), invalide, self.make_offre(2)):
+            writer.add(offre)
+        with self.assertLogs('scrap_emploi', 'ERROR'):
+            self.assertEqual(writer.flush(), 1)
+        # L'offre déjà en base n'est pas perdue
+        self.assertEqual(writer.failed, {invalide.lien_offre})
+
+    def test_changed_description_is_rewritten(self):
+        writer = OfferWriter(SenjobModel)
+        offre = self.make_offre(0)
+        offre.description_poste = '<div class="view">Version 1</div>'
+        writer.add(offre)
+        writer.flush()
+
+        offre = self.make_offre(0)
+        offre.description_poste = '<div class="view">Version 2</div>'
+        offre.empreinte_detail = 'modifiee'
+        writer.add_refresh(offre)
+        writer.flush()
+        self.assertEqual(SenjobModel.objects.get().description_poste, '<div class="view">Version 2</div>')
+
+    def test_fingerprint_ignores_excluded_fields(self):
+        offre = {'titre': 'Poste', 'date_publication': datetime.date(2026, 10, 1)}
+        autre = {'titre': 'Poste', 'date_publication': datetime.date(2026, 10, 2)}
+        self.assertNotEqual(fingerprint(offre), fingerprint(autre))
+        self.assertEqual(fingerprint(offre, exclude=('date_publication',)), fingerprint(autre, exclude=('date_publication',)))
+
+
+class WatermarkTests(TestCase):
+    source = CrawlState.SOURCE_SENJOB
+
+    def test_reached_by_link_reference_or_older_date(self):
+        CrawlState.set_watermark(self.source, timezone.make_aware(datetime.datetime(2026, 10, 10, 12)), 'REF-1',
+                                 'https://senjob.com/sn/1.html')
+        watermark = Watermark(self.source)
+        self.assertTrue(watermark.reached(lien_offre='https://senjob.com/sn/1.html'))
+        self.assertTrue(watermark.reached(reference='REF-1'))
+        self.assertTrue(watermark.reached(timezone.make_aware(datetime.datetime(2026, 10, 10, 11))))
+        self.assertTrue(watermark.reached(datetime.date(2026, 10, 9)))
+        # Date sans heure du jour du repère : l'offre peut être plus récente
+        self.assertFalse(watermark.reached(datetime.date(2026, 10, 10)))
+        self.assertFalse(watermark.reached(timezone.make_aware(datetime.datetime(2026, 10, 10, 13)), 'REF-2',
+                                           'https://senjob.com/sn/2.html'))
+        self.assertFalse(Watermark(self.source, compare_dates=False).reached(datetime.date(2026, 1, 1)))
+
+    def test_no_watermark_is_never_reached(self):
+        self.assertFalse(Watermark(self.source).reached(datetime.date(2000, 1, 1), 'REF-1', 'https://senjob.com/sn/1.html'))
+
+    def test_newest_offer_is_saved(self):
+        watermark = Watermark(self.source)
+        for day, n in [(9, 1), (10, 2), (10, 3), (8, 4)]:
+            watermark.observe(datetime.date(2026, 10, day), f'REF-{n}', f'https://senjob.com/sn/{n}.html')
+        watermark.save()
+        self.assertEqual(CrawlState.get_watermark(self.source),
+                         (as_datetime(datetime.date(2026, 10, 10)), 'REF-2', 'https://senjob.com/sn/2.html'))
+
+        # Liens seuls : la première offre de la liste
+        watermark = Watermark(self.source, compare_dates=False)
+        for n in (5, 6):
+            watermark.observe(datetime.date(2026, 10, n), lien_offre=f'https://senjob.com/sn/{n}.html')
+        watermark.save()
+        self.assertEqual(CrawlState.get_watermark(self.source), (None, '', 'https://senjob.com/sn/5.html'))
+
+    def test_watermark_is_kept_when_offers_were_missed(self):
+        CrawlState.set_watermark(self.source, None, '', 'https://senjob.com/sn/1.html')
+        failed = Watermark(self.source, compare_dates=False)
+        failed.observe(lien_offre='https://senjob.com/sn/2.html')
+        skipped = Watermark(self.source, compare_dates=False)
+        skipped.observe(lien_offre='https://senjob.com/sn/3.html')
+        skipped.fail()
+        with self.assertLogs('scrap_emploi', 'WARNING'):
+            failed.save(failed={'https://senjob.com/sn/2.html'})
+            skipped.save()
+        Watermark(self.source).save()
+        self.assertEqual(CrawlState.get_watermark(self.source)[2], 'https://senjob.com/sn/1.html')
+
+
+class SeenStoreTests(TestCase):
+    fields = ('lien_offre', 'titre_normalise')
+
+    def add_offres(self, numbers):
+        SenjobModel.objects.bulk_create(
+            SenjobModel(titre=f'Poste {n}', titre_normalise=f'poste {n}', localisation='Dakar',
+                        date_publication=datetime.date(2026, 10, 1), date_expiration=datetime.date(2026, 11, 1),
+                        lien_offre=f'https://senjob.com/sn/{n}.html')
+            for n in numbers)
+
+    def test_known_offers_are_found_by_any_key(self):
+        self.add_offres(range(3))
+        items = [{'lien_offre': 'https://senjob.com/sn/1.html', 'titre_normalise': 'autre'},
+                 {'lien_offre': 'https://senjob.com/sn/9.html', 'titre_normalise': 'poste 2'},
+                 {'lien_offre': 'https://senjob.com/sn/9.html', 'titre_normalise': 'poste 9'}]
+        for store in (DatabaseSeenStore(SenjobModel, self.fields), HashSeenStore(SenjobModel, self.fields)):
+            store.prefetch(items)
+            self.assertEqual([store.contains(item) for item in items], [True, True, False], store)
+            store.add(items[2])
+            self.assertTrue(store.contains({'lien_offre': 'https://senjob.com/sn/9.html'}), store)
+            self.assertFalse(store.contains({'lien_offre': '', 'titre_normalise': None}), store)
+
+    def test_hashes_are_loaded_in_chunks_and_sorted(self):
+        self.add_offres(range(6000))
+        store = HashSeenStore(SenjobModel, self.fields)
+        self.assertEqual(len(store.hashes), 12000)
+        self.assertEqual(list(store.hashes), sorted(store.hashes))
+        self.assertTrue(all(store.contains({'titre_normalise': f'poste {n}'}) for n in (0, 2999, 5999)))
+        self.assertFalse(store.contains({'titre_normalise': 'poste 6000'}))
+        # Bornes de la recherche dichotomique
+        self.assertFalse(store.has_hash(store.hashes[0] - 1))
+        self.assertFalse(store.has_hash(store.hashes[-1] + 1))
+
+    def test_hash_collisions(self):
+        # Une même valeur sous deux champs donne deux empreintes distinctes
+        self.assertNotEqual(hash64('lien_offre', 'poste 1'), hash64('titre_normalise', 'poste 1'))
+        self.add_offres([1])
+        store = HashSeenStore(SenjobModel, self.fields)
+        self.assertFalse(store.contains({'lien_offre': 'poste 1'}))
+        # Clé en base de même empreinte qu'une nouvelle clé : l'offre est tenue pour
+        # connue (faux positif accepté, probabilité de l'ordre de n² / 2^64)
+        colliding = {'titre_normalise': 'poste en collision'}
+        store.hashes = array.array('q', sorted([*store.hashes, hash64('titre_normalise', 'poste en collision')]))
+        self.assertTrue(store.contains(colliding))
+        self.assertFalse(DatabaseSeenStore(SenjobModel, self.fields).contains(colliding))
+
+
+class OfferContentTests(TestCase):
+
+    def test_descriptions_are_stored_compressed_apart(self):
+        description = '<div class="view">' + '<p>Mission et profil recherché.</p>' * 200 + '</div>'
+        SenjobModel.objects.create(titre='Poste', localisation='Dakar', date_publication=datetime.date(2026, 10, 1),
+                                   date_expiration=datetime.date(2026, 11, 1), lien_offre='https://senjob.com/sn/1.html',
+                                   description_poste=description)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT description_poste FROM senjob_contenu')
+            stored = bytes(cursor.fetchone()[0])
+        self.assertLess(len(stored), len(description) // 10)
+
+        with self.assertNumQueries(1):
+            offres = list(SenjobModel.objects.only('titre', 'date_publication'))
+        self.assertNotIn('contenu', str(SenjobModel.objects.only('titre').query))
+        with self.assertNumQueries(1):
+            self.assertEqual(offres[0].description_poste, description)
+        self.assertEqual(SenjobModel.objects.select_related('contenu').get().description_poste, description)
+
+    def test_uncompressed_values_remain_readable(self):
+        with override_settings(SCRAP_CONTENT_COMPRESSION_LEVEL=0):
+            offre = EmploiDakar.objects.create(titre='Poste', entreprise='ACME', localisation='Dakar', type_contrat='CDI',
+                                               lien_offre='https://www.emploidakar.com/offre-emploi/1/',
+                                               description_poste='<p>Texte brut</p>')
+        offre = EmploiDakar.objects.get(pk=offre.pk)
+        self.assertEqual(offre.description_poste, '<p>Texte brut</p>')
+        self.assertIsNone(offre.profil_recherche)
+
+
+class KeysetPaginationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def walk(self, paginator):
+        """Identifiants des pages parcourues en avant puis en arrière, et ceux de la première page revue."""
+        pages, params = [], {}
+        while True:
+            page = paginator.get_page(params)
+            pages.append([offre.id for offre in page])
+            if not page.has_next:
+                break
+            params = {'apres': page.next_cursor}
+        back = []
+        while page.has_previous:
+            page = paginator.get_page({'avant': page.previous_cursor})
+            back.append([offre.id for offre in page])
+        return pages, back
+
+    def test_pages_follow_date_then_id(self):
+        for n in range(23):
+            SenjobModel.objects.create(titre=f'Poste {n}', localisation='Dakar', date_publication=datetime.date(2026, 10, 1 + n % 4),
+                                       date_expiration=datetime.date(2026, 11, 1), lien_offre=f'https://senjob.com/sn/{n}.html')
+        expected = list(SenjobModel.objects.order_by('-date_publication', '-id').values_list('id', flat=True))
+        pages, back = self.walk(KeysetPaginator(SenjobModel.objects.all(), 10))
+        self.assertEqual([len(page) for page in pages], [10, 10, 3])
+        self.assertEqual(sum(pages, []), expected)
+        self.assertEqual(back, pages[-2::-1])
+
+    def test_missing_dates_come_last(self):
+        for n in range(7):
+            EmploiDakar.objects.create(titre=f'Poste {n}', entreprise='ACME', localisation='Dakar', type_contrat='CDI',
+                                       lien_offre=f'https://www.emploidakar.com/offre-emploi/{n}/',
+                                       date_publication=None if n % 3 == 0 else timezone.now() - datetime.timedelta(days=n))
+        pages, back = self.walk(KeysetPaginator(EmploiDakar.objects.all(), 2))
+        ids = sum(pages, [])
+        self.assertEqual(len(ids), 7)
+        self.assertEqual([EmploiDakar.objects.get(id=i).date_publication is None for i in ids], [False] * 4 + [True] * 3)
+        self.assertEqual(back, pages[-2::-1])
+
+    def test_invalid_cursor_shows_first_page(self):
+        paginator = KeysetPaginator(SenjobModel.objects.all(), 10)
+        page = paginator.get_page({'apres': 'pas-un-curseur'})
+        self.assertFalse(page.has_previous)
+        self.assertEqual(paginator.count, 0)
+
+
+class SenjobPagesTestCase(TestCase):
+    """Pages Senjob servies par les vues, source à jour (aucune actualisation mise en file)."""
+
+    def setUp(self):
+        cache.clear()
+        CrawlState.mark_refreshed(CrawlState.SOURCE_SENJOB)
+
+    def add_offres(self, numbers):
+        writer = OfferWriter(SenjobModel, source=CrawlState.SOURCE_SENJOB)
+        for n in numbers:
+            writer.add(SenjobModel(titre=f'Poste {n}', localisation='Dakar', date_publication=datetime.date(2026, 10, 1),
+                                   date_expiration=datetime.date(2026, 11, 1), lien_offre=f'https://senjob.com/sn/{n}.html'))
+        writer.flush()
+
+
+class PageCacheTests(SenjobPagesTestCase):
+
+    def test_pages_are_cached_until_offers_change(self):
+        self.add_offres(range(3))
+        self.assertContains(self.client.get('/senjob/'), 'Poste 2')
+        # Pages en cache : seules la date d'actualisation et la version de la source sont lues
+        with self.assertNumQueries(2):
+            self.assertContains(self.client.get('/senjob/'), 'Poste 2')
+
+        self.add_offres([3])
+        self.assertContains(self.client.get('/senjob/'), 'Poste 3')
+        # Offres déjà en base : rien n'est écrit, les pages restent valides
+        version = CrawlState.get_version(CrawlState.SOURCE_SENJOB)
+        self.add_offres([3])
+        self.assertEqual(CrawlState.get_version(CrawlState.SOURCE_SENJOB), version)
+
+    def test_first_pages_are_prewarmed(self):
+        self.add_offres(range(25))
+        self.assertEqual(prewarm(CrawlState.SOURCE_SENJOB, pages=5), 3)
+
+        response = self.client.get('/senjob/')
+        with self.assertNumQueries(4):
+            for _ in range(2):
+                response = self.client.get(next(link.split(';')[0].strip(' <>') for link in response['Link'].split(',')
+                                                if 'rel="next"' in link))
+        self.assertNotIn('rel="next"', response['Link'])
+
+
+class ConditionalResponseTests(SenjobPagesTestCase):
+
+    def test_unchanged_list_answers_304(self):
+        self.add_offres(range(3))
+        response = self.client.get('/senjob/')
+        etag, last_modified = response['ETag'], response['Last-Modified']
+        # Date d'actualisation et version de la source seulement
+        with self.assertNumQueries(2):
+            self.assertEqual(self.client.get('/senjob/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get('/senjob/', HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+        self.add_offres([3])
+        response = self.client.get('/senjob/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_unchanged_detail_answers_304(self):
+        offre = SenjobModel(titre='Poste', localisation='Dakar', date_publication=datetime.date(2026, 10, 1),
+                            date_expiration=datetime.date(2026, 11, 1), lien_offre='https://senjob.com/sn/1.html',
+                            empreinte_carte='a' * 32, empreinte_detail='b' * 32)
+        offre.save()
+        url = f'/senjob/{offre.pk}/'
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        SenjobModel.objects.filter(pk=offre.pk).update(empreinte_detail='c' * 32)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class FakeTask:
+    """Tâche Celery enregistrant ses mises en file."""
+
+    def __init__(self):
+        self.calls = []
+
+    def delay(self, **kwargs):
+        self.calls.append(kwargs)
+
+
+class RefreshClaimTests(TestCase):
+    source = CrawlState.SOURCE_SENJOB
+
+    def lock(self):
+        return CrawlState.objects.get(source=self.source).actualisation_demandee
+
+    def expire(self):
+        CrawlState.objects.filter(source=self.source).update(
+            actualisation_demandee=timezone.now() - datetime.timedelta(seconds=120))
+
+    def test_claim_is_exclusive_until_it_expires(self):
+        claim = CrawlState.claim_refresh(self.source, 60)
+        self.assertIsNotNone(claim)
+        self.assertIsNone(CrawlState.claim_refresh(self.source, 60))
+
+        self.expire()
+        self.assertIsNotNone(CrawlState.claim_refresh(self.source, 60))
+
+    def test_release_keeps_a_claim_taken_over(self):
+        claim = CrawlState.claim_refresh(self.source, 60)
+        self.expire()
+        other = CrawlState.claim_refresh(self.source, 60)
+        CrawlState.release_refresh(self.source, claim)
+        self.assertEqual(self.lock(), other)
+        CrawlState.mark_refreshed(self.source, claim)
+        self.assertEqual(self.lock(), other)
+
+        CrawlState.release_refresh(self.source, other)
+        self.assertIsNone(self.lock())
+
+    def test_stale_source_is_queued_once(self):
+        task = FakeTask()
+        revalidate_source(self.source, task)
+        revalidate_source(self.source, task)
+        self.assertEqual(task.calls, [{'claim': self.lock().isoformat()}])
+
+    def test_fresh_source_is_not_queued(self):
+        CrawlState.mark_refreshed(self.source)
+        task = FakeTask()
+        revalidate_source(self.source, task)
+        self.assertEqual(task.calls, [])
+        self.assertIsNone(self.lock())
+
+    def test_periodic_run_skips_a_claimed_source(self):
+        runs = []
+        task = FakeTask()
+        revalidate_source(self.source, task)
+        self.assertEqual(run_scrape(self.source, 'Senjob', lambda: runs.append('beat') or 1), 0)
+        self.assertEqual(runs, [])
+        self.assertIsNotNone(self.lock())
+
+        # Tâche mise en file par la vue : elle reprend la réservation et la libère
+        self.assertEqual(run_scrape(self.source, 'Senjob', lambda: runs.append('vue') or 1, **task.calls[0]), 1)
+        self.assertEqual(runs, ['vue'])
+        self.assertIsNone(self.lock())
+        self.assertIsNotNone(CrawlState.last_refreshed(self.source))
+
+    def test_refresh_runs_under_the_claim(self):
+        claim = CrawlState.claim_refresh(self.source, 60)
+        self.assertEqual(refresh_offers_periodic(self.source, 'complet'), 0)
+        self.assertEqual(self.lock(), claim)
+        CrawlState.release_refresh(self.source, claim)
+
+        modes = []
+        self.assertEqual(run_scrape(self.source, 'Senjob', lambda refresh=None: modes.append(refresh) or 1,
+                                    refresh='complet'), 1)
+        self.assertEqual(modes, ['complet'])
+        self.assertIsNone(self.lock())
+
+
+class OffreIndexTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_index_follows_writes(self):
+        writer = OfferWriter(SenjobModel)
+        for n in range(2):
+            writer.add(SenjobModel(titre=f'Poste {n}', localisation='Dakar', date_publication=datetime.date(2026, 10, n + 1),
+                                   date_expiration=datetime.date(2026, 11, 1), lien_offre=f'https://senjob.com/sn/{n}.html',
+                                   empreinte_carte='a', empreinte_detail='a'))
+        writer.flush()
+        writer.add_refresh(SenjobModel(titre='Poste 1', localisation='Thiès', date_publication=datetime.date(2026, 10, 2),
+                                       date_expiration=datetime.date(2026, 11, 1), lien_offre='https://senjob.com/sn/1.html',
+                                       empreinte_carte='b', empreinte_detail='a'))
+        writer.flush()
+        sn = OffreEmploiSN.objects.create(titre='Comptable', entreprise='Banque', lieu='Thiès', lien_offre='https://offre-emploi.sn/1',
+                                          date_publication=timezone.make_aware(datetime.datetime(2026, 10, 1, 12)))
+        EmploiDakar.objects.create(titre='Chauffeur', entreprise='Transport', localisation='Dakar', type_contrat='CDD',
+                                   lien_offre='https://emploidakar.com/1')
+
+        # Toutes les sources, du plus récent au plus ancien ; offres sans date à la fin
+        offres = [(o.source, o.titre, o.lieu) for o in KeysetPaginator(OffreIndex.objects.all(), 10).get_page({})]
+        self.assertEqual(offres, [
+            ('senjob', 'Poste 1', 'Thiès'),
+            ('offre_emploi_sn', 'Comptable', 'Thiès'),
+            ('senjob', 'Poste 0', 'Dakar'),
+            ('emploidakar', 'Chauffeur', 'Dakar'),
+        ])
+        self.assertEqual(OffreIndex.objects.get(source='offre_emploi_sn').get_absolute_url(), f'/offre-emploi-sn/{sn.pk}/')
+        sn.delete()
+        self.assertFalse(OffreIndex.objects.filter(source='offre_emploi_sn').exists())
+
+    def test_backfill_rebuilds_index(self):
+        for n in range(3):
+            SenjobModel.objects.create(titre=f'Poste {n}', localisation='Dakar', date_publication=datetime.date(2026, 10, 1),
+                                       date_expiration=datetime.date(2026, 11, 1), lien_offre=f'https://senjob.com/sn/{n}.html')
+        SenjobModel.objects.filter(titre='Poste 2').delete()
+        OffreIndex.objects.filter(titre='Poste 0').delete()
+        OffreIndex.objects.filter(titre='Poste 1').update(lieu='Ancien lieu')
+
+        call_command('backfill_offres', source=['senjob'], batch_size=1, stdout=io.StringIO())
+        self.assertEqual(sorted(OffreIndex.objects.values_list('titre', 'lieu')), [('Poste 0', 'Dakar'), ('Poste 1', 'Dakar')])
+
+    def test_list_filtered_by_source(self):
+        SenjobModel.objects.create(titre='Poste Senjob', localisation='Dakar', date_publication=datetime.date(2026, 10, 1),
+                                   date_expiration=datetime.date(2026, 11, 1), lien_offre='https://senjob.com/sn/1.html')
+        EmploiDakar.objects.create(titre='Poste Dakar', entreprise='Transport', localisation='Dakar', type_contrat='CDD',
+                                   lien_offre='https://emploidakar.com/1', date_publication=timezone.now())
+        response = self.client.get('/offres/')
+        self.assertContains(response, 'Poste Senjob')
+        self.assertContains(response, 'Poste Dakar')
+        response = self.client.get('/offres/', {'source': 'senjob'})
+        self.assertContains(response, 'Poste Senjob')
+        self.assertNotContains(response, 'Poste Dakar')
+
+
+class OfferSearchTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def add_offre(self, n, titre, description, localisation='Dakar', empreinte='a', refresh=False):
+        writer = OfferWriter(SenjobModel)
+        offre = SenjobModel(titre=titre, localisation=localisation, date_publication=datetime.date(2026, 10, 1),
+                            date_expiration=datetime.date(2026, 11, 1), lien_offre=f'https://senjob.com/sn/{n}.html',
+                            empreinte_carte='a', empreinte_detail=empreinte)
+        offre.description_poste = description
+        if refresh:
+            writer.add_refresh(offre)
+        else:
+            writer.add(offre)
+        writer.flush()
+
+    def titres(self, query, source=None):
+        return [offre.titre for offre in search(query, source)]
+
+    def test_tokens_ignore_accents_case_and_plurals(self):
+        self.assertEqual(search_tokens('<p>Développeurs &amp; Commerciaux à Thiès</p>'),
+                         ['developpeur', 'commercial', 'thie'])
+
+    def test_search_ranks_and_follows_updates(self):
+        self.add_offre(1, 'Comptable', '<p>Maîtrise des logiciels de gestion, un développeur vous assistera</p>')
+        self.add_offre(2, 'Développeur Python', '<p>Équipe produit</p>', localisation='Thiès')
+        OffreEmploiSN.objects.create(titre='Chef de projet', entreprise='Sonatel', lieu='Dakar',
+                                     lien_offre='https://offre-emploi.sn/1', date_publication=timezone.now(),
+                                     description_courte='Pilotage des développeurs')
+
+        # Titre avant descriptions ; accents, casse et pluriels ignorés
+        titres = self.titres('DEVELOPPEURS')
+        self.assertEqual(titres[0], 'Développeur Python')
+        self.assertCountEqual(titres[1:], ['Comptable', 'Chef de projet'])
+        self.assertEqual(self.titres('developpeur thies'), ['Développeur Python'])
+        self.assertEqual(self.titres('sonatel'), ['Chef de projet'])
+        self.assertEqual(self.titres('logiciel'), ['Comptable'])
+        self.assertEqual(self.titres('développeur', source='offre_emploi_sn'), ['Chef de projet'])
+        self.assertEqual(self.titres('le la'), [])
+
+        # Description modifiée par un rafraîchissement, offre supprimée
+        self.add_offre(1, 'Comptable', '<p>Tenue de la paie</p>', empreinte='b', refresh=True)
+        self.assertEqual(self.titres('logiciel'), [])
+        self.assertEqual(self.titres('paie'), ['Comptable'])
+        OffreEmploiSN.objects.get().delete()
+        self.assertEqual(self.titres('sonatel'), [])
+
+    @override_settings(SCRAP_SEARCH_RANK_WINDOW=2)
+    def test_pages_beyond_the_rank_window_keep_older_offers(self):
+        for n in range(1, 4):
+            self.add_offre(n, f'Comptable {n}', '<p>Gestion de la paie</p>')
+        # Première page : les offres indexées le plus récemment ; page suivante : classement de toutes les offres
+        self.assertCountEqual([offre.titre for offre in search('paie', limit=2)], ['Comptable 2', 'Comptable 3'])
+        self.assertEqual(len(search('paie', limit=2, offset=2)), 1)
+        self.assertEqual(len(search('paie', limit=5)), 3)
+
+    def test_short_words_are_not_required_by_mysql(self):
+        self.assertEqual(boolean_query(['assistant', 'rh']), '+assistant rh')
+
+    def test_search_page(self):
+        self.add_offre(1, 'Comptable', '<p>Gestion de la paie</p>')
+        response = self.client.get('/recherche/', {'q': 'paie'})
+        self.assertContains(response, 'Comptable')
+        response = self.client.get('/recherche/', {'q': 'paie', 'source': 'emploidakar'})
+        self.assertNotContains(response, 'Comptable')
+
+
+class ConditionalRequestTests(TestCase):
+    url = 'https://senjob.com/sn/offres-d-emploi.php'
+
+    def check(self, content, status_code=200, headers=None):
+        response = make_response(content, self.url, status_code=status_code)
+        response.headers.update(headers or {})
+        httpClient.check_not_modified(response, httpClient.load_validator('GET', self.url))
+        return response
+
+    def test_unchanged_content_without_validators(self):
+        response = self.check(b'<html>page 1</html>')
+        self.assertFalse(response.not_modified)
+        httpClient.remember(response)
+
+        self.assertTrue(self.check(b'<html>page 1</html>').not_modified)
+        self.assertFalse(self.check(b'<html>page 1 modifiee</html>').not_modified)
+
+    def test_validators_are_stored_and_304_is_unchanged(self):
+        response = self.check(b'<html>page</html>', headers={'ETag': '"v1"', 'Last-Modified': 'Sun, 18 Oct 2026 08:00:00 GMT'})
+        # Validateurs enregistrés seulement une fois la page traitée
+        self.assertEqual(httpClient.load_validator('GET', self.url).etag, '')
+        httpClient.remember(response)
+
+        validator = httpClient.load_validator('GET', self.url)
+        self.assertEqual((validator.etag, validator.last_modified), ('"v1"', 'Sun, 18 Oct 2026 08:00:00 GMT'))
+        self.assertTrue(self.check(b'', status_code=304).not_modified)
+        # Les formulaires AJAX d'une même URL ont des validateurs distincts
+        self.assertNotEqual(httpClient.validator_key('POST', self.url, {'page': 1}),
+                            httpClient.validator_key('POST', self.url, {'page': 2}))
+
+
+class FakeClock:
+    """Horloge du limiteur de débit avancée par ses attentes."""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@override_settings(SCRAP_RATE_LIMITS={'default': {'rate': 1.0, 'burst': 3}}, SCRAP_HTTP_RETRIES=2, SCRAP_HTTP_BACKOFF=0)
+class RateLimiterTests(SimpleTestCase):
+    host = 'example.com'
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.backend = MemoryBackend()
+        self.limiter = RateLimiter(self.backend, clock=self.clock, sleep=self.clock.sleep)
+
+    def state(self):
+        return self.backend.states[self.host]
+
+    def use_limiter(self):
+        rateLimiter._limiter = self.limiter
+        self.addCleanup(setattr, rateLimiter, '_limiter', None)
+
+    def test_burst_then_nominal_spacing(self):
+        self.assertEqual([self.limiter.acquire(self.host) for _ in range(6)], [0, 0, 0, 1.0, 1.0, 1.0])
+        self.assertEqual(self.clock.now, 1003.0)
+
+        # Hôte inactif : la rafale est de nouveau disponible
+        self.clock.now += 10
+        self.assertEqual([self.limiter.acquire(self.host) for _ in range(4)], [0, 0, 0, 1.0])
+
+    def test_penalty_grows_on_throttling_and_decays(self):
+        for _ in range(5):
+            self.limiter.feedback(self.host, 429, 0.1)
+        self.assertEqual(self.state().penalite, 16.0)
+
+        for _ in range(3):
+            self.limiter.feedback(self.host, 200, 0.1)
+        self.assertAlmostEqual(self.state().penalite, 16.0 * 0.9 ** 3)
+        # Latence en forte hausse
+        self.limiter.feedback(self.host, 200, 1.0)
+        self.assertAlmostEqual(self.state().penalite, 16.0 * 0.9 ** 3 * 1.25)
+
+        for _ in range(30):
+            self.limiter.feedback(self.host, 200, 0.1)
+        self.assertEqual(self.state().penalite, 1.0)
+
+    def test_retry_after_delays_the_next_burst(self):
+        self.limiter.feedback(self.host, 503, 0.1, retry_after=30)
+        self.assertEqual(self.limiter.acquire(self.host), 30.0)
+        # Pénalité x2 : intervalle de 2 secondes
+        self.assertEqual(self.limiter.acquire(self.host), 2.0)
+
+    def test_each_retry_waits_for_the_limiter(self):
+        self.use_limiter()
+        cassette = Cassette()
+        cassette.add('GET', 'https://example.com/page', 'occupé', status_code=503)
+        cassette.add('GET', 'https://example.com/page', 'page')
+        with replaying(cassette) as adapter:
+            self.assertEqual(httpClient.get('https://example.com/page').text, 'page')
+            self.assertEqual(adapter.requests, 2)
+            # Deux créneaux réservés (le second avec la pénalité du 503), deux réponses transmises
+            self.assertEqual(self.state().prochaine_requete, 1000.0 + 1 + 2)
+            self.assertAlmostEqual(self.state().penalite, 2 * 0.9)
+
+            # Erreurs de connexion jusqu'à la dernière tentative
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                httpClient.get('https://example.com/absente')
+            self.assertEqual(adapter.requests, 5)
+            self.assertAlmostEqual(self.state().penalite, 2 * 0.9 * 8)
+
+
+@override_settings(SCRAP_RATE_LIMITS={'default': {'rate': 1.0, 'burst': 3}})
+class PagePrefetcherTests(SimpleTestCase):
+
+    def setUp(self):
+        rateLimiter._limiter = RateLimiter(MemoryBackend(), clock=FakeClock(), sleep=lambda seconds: None)
+        self.addCleanup(setattr, rateLimiter, '_limiter', None)
+        self.cassette = Cassette()
+        for page in range(1, 7):
+            self.cassette.add('GET', f'https://example.com/offres?page={page}', f'page {page}')
+
+    def build_request(self, page):
+        return 'GET', f'https://example.com/offres?page={page}', {}
+
+    def test_pages_are_returned_in_order_within_the_window(self):
+        with replaying(self.cassette) as adapter, PagePrefetcher(self.build_request, last_page=6, window=2) as listings:
+            for page, pending in [(1, [1, 2, 3]), (2, [2, 3, 4]), (4, [4, 5, 6]), (6, [6])]:
+                self.assertEqual(listings.get(page).text, f'page {page}')
+                self.assertEqual(sorted(listings.futures), pending)
+            # Pages toutes commencées (file du pool dans l'ordre d'envoi) : attendre la fin des requêtes
+            listings.engine.close(wait=True)
+        # Chaque page n'est demandée qu'une fois, la page 3 sautée comprise
+        self.assertEqual(adapter.requests, 6)
+
+    def test_nothing_is_prefetched_before_the_last_page_is_known(self):
+        with replaying(self.cassette) as adapter, PagePrefetcher(self.build_request, window=2) as listings:
+            self.assertEqual(listings.get(1).text, 'page 1')
+            self.assertEqual(list(listings.futures), [1])
+            listings.set_last_page(2)
+            self.assertEqual(listings.get(2).text, 'page 2')
+        self.assertEqual(adapter.requests, 2)
+
+
+class DatabaseRateLimiterTests(TestCase):
+    host = 'example.com'
+
+    def test_feedback_is_written_with_the_next_reservation(self):
+        limiter = RateLimiter(DatabaseBackend(), clock=FakeClock())
+        limiter.acquire(self.host)
+        with self.assertNumQueries(0):
+            limiter.feedback(self.host, 429, 0.1)
+        limiter.acquire(self.host)
+        state = RateLimitState.objects.get(host=self.host)
+        self.assertEqual(state.penalite, 2.0)
+        self.assertEqual(state.prochaine_requete, 1000.0 + 1 + 2)
+
+
+class PageArchiveTests(SimpleTestCase):
+
+    def test_pages_are_stored_once_and_restored(self):
+        with tempfile.TemporaryDirectory() as root:
+            archive = PageArchive(root)
+            content = load_page('senjob', 'detail')
+            url = 'https://senjob.com/sn/jobseekers/offre-1.html'
+            archive.store(make_response(b'<html>liste</html>', url='https://senjob.com/sn/offres-d-emploi.php'), 'senjob', KIND_LISTING)
+            for _ in range(2):
+                archive.store(make_response(content, url=url, encoding='iso-8859-1'), 'senjob', KIND_DETAIL)
+
+            entries = list(archive.entries('senjob'))
+            self.assertEqual([entry['type'] for entry in entries], [KIND_LISTING, KIND_DETAIL, KIND_DETAIL])
+            self.assertEqual(entries[1]['empreinte'], entries[2]['empreinte'])
+            response = archive.response(entries[2])
+            self.assertEqual((response.content, response.url, response.encoding), (content, url, 'iso-8859-1'))
+            self.assertEqual(list(archive.entries('emploidakar')), [])
+
+    def test_ajax_tabs_are_told_apart(self):
+        with tempfile.TemporaryDirectory() as root:
+            archive = PageArchive(root)
+            for page in (2, 3, 2):
+                method, url, kwargs = offreEmploiSNController.listing_request(page)
+                response = make_response(json.dumps({'html': ''}).encode('utf-8'), url=url)
+                response.request = requests.Request(method, url, data=kwargs['data']).prepare()
+                archive.store(response, 'offre_emploi_sn', KIND_LISTING)
+
+            entries = list(archive.entries('offre_emploi_sn'))
+            self.assertEqual([entry['corps'] for entry in entries],
+                             [form_body(offreEmploiSNController.listing_request, page)[1] for page in (2, 3, 2)])
+            # Onglet 2 récupéré deux fois sans changement : gardé à sa dernière récupération
+            self.assertEqual(latest_listings(entries), entries[1:])
+
+
+class CassetteTests(SimpleTestCase):
+
+    def test_recorded_responses_are_replayed_from_disk(self):
+        url = 'https://senjob.com/sn/offres-d-emploi.php'
+        source = Cassette()
+        source.add('GET', url, load_page('senjob', 'listing'), headers={'Content-Type': 'text/html; charset=utf-8',
+                                                                       'Content-Encoding': 'gzip'})
+        with tempfile.TemporaryDirectory() as root:
+            session = requests.Session()
+            session.mount('https://', RecordingAdapter(ReplayAdapter(source), Cassette(root)))
+            self.assertEqual(session.get(url).status_code, 200)
+
+            session = requests.Session()
+            session.mount('https://', ReplayAdapter(Cassette(root)))
+            response = session.get(url)
+        self.assertEqual(response.content, load_page('senjob', 'listing'))
+        self.assertEqual(response.encoding, 'utf-8')
+        # Le contenu enregistré est décompressé
+        self.assertNotIn('Content-Encoding', response.headers)
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            session.get(url + '?page=2')
+
+    def test_injected_errors(self):
+        cassette = Cassette()
+        cassette.add('GET', 'https://senjob.com/', 'ok')
+        session = requests.Session()
+        session.mount('https://', ReplayAdapter(cassette, error_rate=1.0, error_status=503))
+        self.assertEqual(session.get('https://senjob.com/').status_code, 503)
+        session.mount('https://', ReplayAdapter(cassette, error_rate=1.0))
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            session.get('https://senjob.com/')
+
+
+# Threads du pipeline : les écritures doivent être visibles hors de la transaction du test
+@override_settings(SCRAP_RATE_LIMITS={'default': {'rate': 1000.0, 'burst': 100}}, SCRAP_ARCHIVE_DIR=None)
+class OfflineScrapeTests(TransactionTestCase):
+
+    def test_scrapers_run_end_to_end(self):
+        with replaying(fixture_cassette()) as adapter:
+            for source, scrape in SOURCE_SCRAPERS.items():
+                expected = len(extract_listing(SOURCE_MODULES[source], load_page(source, 'listing')))
+                self.assertEqual(scrape(), expected, source)
+                self.assertEqual(SOURCE_MODELS[source].objects.count(), expected, source)
+            first_run = adapter.requests
+
+            # Seconde collecte : pages de liste inchangées, aucune page de détail demandée
+            for source, scrape in SOURCE_SCRAPERS.items():
+                self.assertEqual(scrape(), 0, source)
+        self.assertEqual(adapter.requests - first_run, len(SOURCE_SCRAPERS))
+
+    @override_settings(SCRAP_HTTP_RETRIES=0, SCRAP_CONDITIONAL_REQUESTS=False)
+    def test_offers_missed_by_a_run_are_collected_by_the_next(self):
+        self.assert_missed_offers_collected()
+
+    # Pages de liste inchangées à la seconde collecte : leurs validateurs ne doivent pas l'arrêter
+    @override_settings(SCRAP_HTTP_RETRIES=0, SCRAP_CONDITIONAL_REQUESTS=True)
+    def test_offers_missed_by_a_run_are_collected_by_the_next_conditional_run(self):
+        self.assert_missed_offers_collected()
+
+    def assert_missed_offers_collected(self):
+        missed = []
+        for source, scrape in SOURCE_SCRAPERS.items():
+            offres = extract_listing(SOURCE_MODULES[source], load_page(source, 'listing'))
+            # Page de détail de l'offre la plus récente en erreur lors de la première collecte
+            with replaying(fixture_cassette(failing=[offres[0]['lien_offre']])):
+                scrape()
+                if SOURCE_MODELS[source].objects.count() < len(offres):
+                    missed.append(source)
+                scrape()
+            self.assertEqual(SOURCE_MODELS[source].objects.count(), len(offres), source)
+        self.assertIn(CrawlState.SOURCE_SENJOB, missed)
+
+    @override_settings(SCRAP_HTTP_RETRIES=0, SCRAP_CONDITIONAL_REQUESTS=True)
+    def test_failed_listing_tab_keeps_the_watermark_and_validators(self):
+        source = CrawlState.SOURCE_OFFRE_EMPLOI_SN
+        CrawlState.set_watermark(source, None, '', 'https://offre-emploi.sn/offre/ancienne/')
+        marker = CrawlState.get_watermark(source)
+        with replaying(fixture_cassette(failing_tabs=[2])), self.assertLogs('scrap_emploi', 'ERROR'):
+            SOURCE_SCRAPERS[source]()
+        self.assertEqual(CrawlState.get_watermark(source), marker)
+        self.assertFalse(PageValidator.objects.exists())
+
+    @override_settings(SCRAP_HTTP_RETRIES=0)
+    def test_injected_errors_do_not_stop_the_scrapers(self):
+        with replaying(fixture_cassette(), error_rate=0.3, seed=1) as adapter, self.assertLogs('scrap_emploi', 'ERROR'):
+            for scrape in SOURCE_SCRAPERS.values():
+                self.assertGreaterEqual(scrape(), 0)
+        self.assertGreater(adapter.errors, 0)
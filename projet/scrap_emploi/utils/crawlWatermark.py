@@ -0,0 +1,94 @@
+import logging
+from datetime import datetime, time
+
+from django.utils import timezone
+
+from ..models.crawlStateModel import CrawlState
+
+logger = logging.getLogger(__name__)
+
+
+def as_datetime(value):
+    """Convertit une date de publication (date ou datetime) en datetime aware."""
+    if value is None or isinstance(value, datetime):
+        return value
+    return timezone.make_aware(datetime.combine(value, time.min))
+
+
+def is_featured(element):
+    """Offre mise en avant en tête de liste (classe *featured*, ex. job_position_featured de WP Job Manager)."""
+    return any('featured' in css_class for css_class in element.get('class', []))
+
+
+class Watermark:
+    """
+    Repère de collecte incrémentale d'une source.
+
+    Les listes étant triées de la plus récente à la plus ancienne offre, une
+    collecte peut s'arrêter dès qu'elle atteint l'offre la plus récente de la
+    collecte complète précédente (même lien ou même référence) ou une offre
+    publiée avant elle. Les offres mises en avant (épinglées en tête de liste
+    quelle que soit leur date) ne sont jamais comparées au repère.
+
+    Le nouveau repère n'est enregistré par save() que si la collecte est allée
+    jusqu'au bout (repère atteint, fin des pages ou arrêt sur offres connues)
+    et que toutes les offres vues ont été enregistrées : une collecte
+    interrompue par une erreur, ou dont une offre n'a pu être lue ou écrite,
+    ne doit pas masquer à la suivante les offres qu'elle a manquées.
+    """
+
+    def __init__(self, source, compare_dates=True):
+        self.source = source
+        self.compare_dates = compare_dates
+        self.date, self.reference, self.lien = CrawlState.get_watermark(source) or (None, '', '')
+        self.newest = None
+        self.failures = 0
+
+    def __str__(self):
+        if not (self.date or self.reference or self.lien):
+            return "aucun repère (collecte complète)"
+        return f"repère {self.date} {self.reference or self.lien}"
+
+    def reached(self, date_publication=None, reference=None, lien_offre=None):
+        """Indique si l'offre est au niveau du repère ou plus ancienne."""
+        if lien_offre and lien_offre == self.lien:
+            return True
+        if reference and reference == self.reference:
+            return True
+        if not (self.compare_dates and self.date and date_publication):
+            return False
+        if isinstance(date_publication, datetime):
+            return date_publication < self.date
+        # Date sans heure : seules les offres d'un jour antérieur sont dépassées
+        return date_publication < timezone.localtime(self.date).date()
+
+    def observe(self, date_publication=None, reference=None, lien_offre=None):
+        """Retient l'offre la plus récente rencontrée (la première à date égale)."""
+        date_publication = as_datetime(date_publication) if self.compare_dates else None
+        if self.newest is None or (date_publication and self.newest[0] and date_publication > self.newest[0]):
+            self.newest = (date_publication, reference, lien_offre)
+
+    def fail(self):
+        """Signale une offre de la liste qui n'a pu être traitée : le repère ne sera pas avancé."""
+        self.failures += 1
+
+    def save(self, failed=()):
+        """
+        Enregistre l'offre la plus récente rencontrée comme nouveau repère.
+
+        failed: liens des offres vues qui n'ont pas été écrites (voir
+        OfferPipeline.failed) ; s'il y en a, ou si fail() a été appelé, le repère
+        précédent est conservé pour que la collecte suivante les reprenne.
+
+        Returns:
+            bool: False si des offres ont été manquées (repère conservé)
+        """
+        failures = self.failures + len(failed)
+        if failures:
+            logger.warning(f"{failures} offres non enregistrées pour {self.source}, {self} conservé")
+            return False
+        if self.newest is None:
+            return True
+        CrawlState.set_watermark(self.source, *self.newest)
+        logger.info(f"Nouveau repère de collecte pour {self.source}: {self.newest[0]} {self.newest[2]}")
+        return True
@@ -0,0 +1,121 @@
+from datetime import datetime
+
+import soupsieve
+
+
+def text(element):
+    """Texte de l'élément, chaque morceau débarrassé de ses espaces (get_text(strip=True))."""
+    return element.get_text(strip=True)
+
+
+def stripped_text(element):
+    """Texte de l'élément, seuls les espaces de début et de fin sont retirés."""
+    return element.text.strip()
+
+
+def html(element):
+    """Code HTML de l'élément (structure conservée)."""
+    return str(element)
+
+
+def attr(name):
+    """Valeur d'un attribut de l'élément (None s'il est absent)."""
+    def get(element):
+        return element.get(name)
+    return get
+
+
+def strip(value):
+    return value.strip()
+
+
+def parse_date(fmt):
+    """Date au format donné (None si la valeur ne correspond pas)."""
+    def parse(value):
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            return None
+    return parse
+
+
+def texts(elements):
+    """Textes (get_text(strip=True)) d'une liste d'éléments."""
+    return [element.get_text(strip=True) for element in elements]
+
+
+class Field:
+    """
+    Champ d'un extracteur : sélecteur CSS, post-traitements et valeur par défaut.
+
+    Le sélecteur est compilé une seule fois avec soupsieve. Un tuple de
+    sélecteurs est essayé dans l'ordre jusqu'au premier élément trouvé (au
+    premier sélecteur qui trouve des éléments si many=True) ; sans
+    sélecteur, le champ porte sur l'élément lui-même (attributs data-*).
+    Les post-traitements sont appliqués à la suite : le premier reçoit
+    l'élément (ou la liste des éléments si many=True), les suivants le résultat
+    du précédent. La valeur par défaut est retournée si aucun élément n'est
+    trouvé ou si un post-traitement retourne None.
+    """
+
+    def __init__(self, selector=None, *post, default=None, many=False):
+        if isinstance(selector, str):
+            selector = (selector,)
+        self.selectors = selector or ()
+        self.patterns = [soupsieve.compile(s) for s in self.selectors]
+        self.post = post
+        self.default = default
+        self.many = many
+        self.key = (self.selectors, many)
+
+    def find(self, element, precompiled=True):
+        if not self.selectors:
+            return element
+        candidates = self.patterns if precompiled else self.selectors
+        if self.many:
+            for candidate in candidates:
+                found = candidate.select(element) if precompiled else element.select(candidate)
+                if found:
+                    return found
+            return None
+        for candidate in candidates:
+            found = candidate.select_one(element) if precompiled else element.select_one(candidate)
+            if found is not None:
+                return found
+        return None
+
+    def convert(self, value):
+        for post in self.post:
+            if value is None:
+                break
+            value = post(value)
+        return self.default if value is None else value
+
+
+class Extractor:
+    """
+    Description déclarative des champs d'une carte ou d'une page (champ → sélecteur → post-traitements).
+
+    Les spécifications sont déclarées au niveau des modules des contrôleurs et
+    exécutées par extract(), commun à toutes les sources.
+    """
+
+    def __init__(self, **fields):
+        self.fields = fields
+
+    def extract(self, element, precompiled=True):
+        """
+        Valeurs de tous les champs pour un élément.
+
+        precompiled=False évalue les sélecteurs à partir de leur texte, comme
+        Tag.select_one() ; il ne sert qu'à la mesure de bench_extractors.
+        """
+        # Plusieurs champs peuvent porter sur le même élément (texte et lien) : il n'est cherché qu'une fois
+        found = {}
+        values = {}
+        for name, field in self.fields.items():
+            if field.key not in found:
+                found[field.key] = field.find(element, precompiled)
+            values[name] = field.convert(found[field.key])
+        return values
+
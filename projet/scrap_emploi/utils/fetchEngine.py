@@ -0,0 +1,129 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import connections
+
+from . import httpClient
+
+logger = logging.getLogger(__name__)
+
+# Créneaux par hôte partagés par tous les moteurs du processus
+_host_slots = {}
+_host_slots_lock = threading.Lock()
+
+
+def get_host_slot(url):
+    """Sémaphore limitant le nombre de requêtes simultanées vers l'hôte de l'URL."""
+    host = urlsplit(url).netloc
+    with _host_slots_lock:
+        slot = _host_slots.get(host)
+        if slot is None:
+            slot = threading.BoundedSemaphore(settings.SCRAP_FETCH_PER_HOST)
+            _host_slots[host] = slot
+        return slot
+
+
+def fetch(url, method='GET', **kwargs):
+    """Exécute une requête en respectant les limites de l'hôte."""
+    with get_host_slot(url):
+        return httpClient.request(method, url, **kwargs)
+
+
+def fetch_in_pool(url, method='GET', **kwargs):
+    """
+    fetch() exécuté par un thread du pool : la connexion à la base que le thread
+    a ouverte (limiteur de débit, validateurs) est fermée après la requête.
+    """
+    try:
+        return fetch(url, method, **kwargs)
+    finally:
+        connections.close_all()
+
+
+class FetchEngine:
+    """
+    Moteur de téléchargement concurrent des pages (préchargement des listes, voir PagePrefetcher).
+
+    Les requêtes sont exécutées dans un pool de threads ; chaque hôte est limité
+    à SCRAP_FETCH_PER_HOST requêtes simultanées, le débit étant régulé par le
+    limiteur de httpClient.
+    """
+
+    def __init__(self, max_workers=None):
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or settings.SCRAP_FETCH_WORKERS,
+            thread_name_prefix='scrap-fetch'
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def close(self, wait=True):
+        self.executor.shutdown(wait=wait, cancel_futures=True)
+
+    def submit(self, url, method='GET', **kwargs):
+        """Planifie une requête et retourne un Future."""
+        return self.executor.submit(fetch_in_pool, url, method, **kwargs)
+
+
+class PagePrefetcher:
+    """
+    Préchargement des pages de listing dont le nombre est connu.
+
+    get(page) retourne la réponse de la page demandée et planifie en parallèle
+    les SCRAP_LISTING_PREFETCH pages suivantes (dans la limite de last_page),
+    le débit restant régulé par le limiteur de httpClient. À la fermeture, les
+    pages spéculatives non commencées sont annulées et les autres ignorées.
+
+    Args:
+        build_request: fonction page -> (méthode, url, kwargs de httpClient.request)
+        last_page: dernière page, si elle est déjà connue
+        window: nombre de pages préchargées en plus de la page courante
+    """
+
+    def __init__(self, build_request, last_page=None, window=None):
+        self.build_request = build_request
+        self.last_page = last_page
+        self.window = settings.SCRAP_LISTING_PREFETCH if window is None else window
+        self.engine = FetchEngine(max_workers=self.window + 1)
+        self.futures = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def close(self):
+        discarded = sum(1 for future in self.futures.values() if not future.done())
+        if discarded:
+            logger.info(f"{discarded} pages préchargées annulées ou ignorées")
+        self.futures.clear()
+        self.engine.close(wait=False)
+
+    def set_last_page(self, last_page):
+        self.last_page = last_page
+
+    def submit(self, page):
+        if page not in self.futures:
+            method, url, kwargs = self.build_request(page)
+            self.futures[page] = self.engine.submit(url, method, **kwargs)
+
+    def get(self, page):
+        """Retourne la réponse de la page (les erreurs de la requête sont relevées)."""
+        self.submit(page)
+        if self.last_page:
+            for next_page in range(page + 1, min(page + self.window, self.last_page) + 1):
+                self.submit(next_page)
+        # Les pages précédentes ne seront plus demandées
+        for old_page in [p for p in self.futures if p < page]:
+            del self.futures[old_page]
+        return self.futures[page].result()
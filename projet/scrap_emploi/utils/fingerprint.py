@@ -0,0 +1,63 @@
+import hashlib
+
+# Modes de rafraîchissement des offres déjà en base
+REFRESH_CARDS = 'cartes'    # page de détail récupérée seulement si la carte a changé
+REFRESH_FULL = 'complet'    # page de détail de chaque offre connue récupérée
+REFRESH_MODES = (REFRESH_CARDS, REFRESH_FULL)
+
+
+def fingerprint(fields, exclude=()):
+    """
+    Empreinte (32 caractères hexadécimaux) des valeurs d'un dictionnaire de champs.
+
+    Les champs volatils (date relative recalculée à chaque collecte) sont exclus
+    pour que l'empreinte ne change qu'avec le contenu de l'offre.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for name in sorted(fields):
+        if name in exclude:
+            continue
+        digest.update(name.encode())
+        digest.update(b'\0')
+        digest.update(str(fields[name]).encode())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class RefreshChecker:
+    """
+    Sélection des offres déjà en base à rafraîchir lors d'une collecte en mode rafraîchissement.
+
+    Les empreintes des cartes connues d'une page sont chargées en une requête
+    avec prefetch() ; needs_refresh() compare ensuite l'empreinte de la carte
+    collectée à celle enregistrée.
+    """
+
+    def __init__(self, model, mode=REFRESH_CARDS, exclude=()):
+        if mode not in REFRESH_MODES:
+            raise ValueError(f"Mode de rafraîchissement inconnu: {mode}")
+        self.model = model
+        self.mode = mode
+        self.exclude = exclude
+        self.stored = {}
+        self.checked = 0
+        self.changed = 0
+
+    def __str__(self):
+        return f"rafraîchissement {self.mode}"
+
+    def prefetch(self, links):
+        """Charge les empreintes enregistrées des offres de la page."""
+        if self.mode == REFRESH_FULL or not links:
+            return
+        self.stored.update(
+            self.model.objects.filter(lien_offre__in=links).values_list('lien_offre', 'empreinte_carte')
+        )
+
+    def needs_refresh(self, offre):
+        """Vrai si la page de détail de l'offre connue doit être récupérée à nouveau."""
+        self.checked += 1
+        if self.mode == REFRESH_FULL or self.stored.pop(offre['lien_offre'], None) != fingerprint(offre, self.exclude):
+            self.changed += 1
+            return True
+        return False
@@ -0,0 +1,56 @@
+import logging
+import re
+
+from bs4 import BeautifulSoup, FeatureNotFound, SoupStrainer
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Analyseur utilisé si celui demandé n'est pas installé (inclus dans Python)
+DEFAULT_PARSER = 'html.parser'
+
+_unavailable = set()
+
+
+def get_parser_name(parser=None):
+    """
+    Nom de l'analyseur HTML de BeautifulSoup à utiliser.
+
+    SCRAP_HTML_PARSER vaut 'html.parser' (pur Python) ou 'lxml' (en C, bien plus
+    rapide). Si lxml n'est pas installé, on se replie sur html.parser.
+    """
+    parser = parser or settings.SCRAP_HTML_PARSER
+    if parser in _unavailable:
+        return DEFAULT_PARSER
+    return parser
+
+
+def class_strainer(*classes, name=None):
+    """
+    SoupStrainer ne conservant que les balises portant l'une des classes CSS données.
+
+    Pendant l'analyse, l'attribut class n'est pas encore découpé en liste : une
+    expression régulière sur les mots de la valeur brute retient aussi les balises
+    à plusieurs classes (class="card card-block-company").
+    """
+    pattern = re.compile(r'(?:^|\s)(?:%s)(?:\s|$)' % '|'.join(re.escape(c) for c in classes))
+    return SoupStrainer(name, class_=pattern)
+
+
+def make_soup(markup, parser=None, parse_only=None, **kwargs):
+    """
+    Construit l'arbre BeautifulSoup d'une page avec l'analyseur configuré.
+
+    parse_only (SoupStrainer) limite l'arbre aux seuls sous-arbres utiles : le
+    reste de la page (navigation, scripts, pied de page) n'est jamais construit.
+    Il est ignoré si SCRAP_PARTIAL_PARSING est désactivé.
+    """
+    if parse_only is not None and settings.SCRAP_PARTIAL_PARSING:
+        kwargs['parse_only'] = parse_only
+    name = get_parser_name(parser)
+    try:
+        return BeautifulSoup(markup, name, **kwargs)
+    except FeatureNotFound:
+        logger.warning(f"Analyseur HTML '{name}' indisponible, utilisation de {DEFAULT_PARSER}")
+        _unavailable.add(name)
+        return BeautifulSoup(markup, DEFAULT_PARSER, **kwargs)
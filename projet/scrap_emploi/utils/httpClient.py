@@ -0,0 +1,218 @@
+import hashlib
+import logging
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from django.db import connection
+from requests.adapters import HTTPAdapter
+from urllib3.util import make_headers
+
+from .rateLimiter import get_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+# En-têtes communs à tous les scrapers. Accept-Encoding n'annonce que les
+# compressions que urllib3 sait décoder (gzip/deflate, plus br si brotli est installé).
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/93.0.4577.82 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'fr,fr-FR;q=0.8,en-US;q=0.5,en;q=0.3',
+    'Accept-Encoding': make_headers(accept_encoding=True)['accept-encoding'],
+    'Connection': 'keep-alive',
+}
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Une session (et donc un pool de connexions persistantes) par hôte
+_sessions = {}
+_sessions_lock = threading.Lock()
+# Remplacement du transport HTTP (enregistrement ou rejeu des pages, voir utils.httpReplay)
+_transport = None
+
+
+def build_session():
+    """
+    Crée une session avec keep-alive et pool de connexions. Les relances sont
+    faites par request(), chacune après un passage par le limiteur de débit.
+    """
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=settings.SCRAP_HTTP_POOL_SIZE,
+        max_retries=0,
+    )
+    if _transport is not None:
+        adapter = _transport(adapter)
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def set_transport(transport):
+    """
+    Remplace le transport HTTP de toutes les sessions.
+
+    transport: fonction adaptateur réel -> adaptateur utilisé (None : réseau)
+    Les sessions existantes sont recréées avec le nouveau transport.
+    """
+    global _transport
+    with _sessions_lock:
+        _transport = transport
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def get_session(url):
+    """Retourne la session partagée associée à l'hôte de l'URL."""
+    host = urlsplit(url).netloc
+    with _sessions_lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = build_session()
+            _sessions[host] = session
+        return session
+
+
+def parse_retry_after(response):
+    """Retourne le délai de l'en-tête Retry-After en secondes (None s'il est absent ou daté)."""
+    value = response.headers.get('Retry-After', '')
+    return float(value) if value.isdigit() else None
+
+
+def validator_key(method, url, data=None):
+    """Empreinte d'une requête : méthode, URL et paramètres du formulaire (pages AJAX en POST)."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f'{method.upper()} {url}'.encode())
+    if data:
+        digest.update(repr(data).encode())
+    return digest.hexdigest()
+
+
+def load_validator(method, url, data=None):
+    """Validateurs enregistrés de la requête (instance non sauvegardée si la page n'a jamais été traitée)."""
+    from ..models.pageValidatorModel import PageValidator
+
+    key = validator_key(method, url, data)
+    return PageValidator.objects.filter(cle=key).first() or PageValidator(cle=key, url=url[:500])
+
+
+def check_not_modified(response, validator):
+    """
+    Marque la réponse inchangée (response.not_modified) : statut 304, ou contenu
+    identique à la dernière version traitée pour les sites sans validateurs.
+    Les nouveaux validateurs sont portés par response.validator, enregistrés
+    ensuite par remember().
+    """
+    response.validator = validator
+    if response.status_code == 304:
+        response.not_modified = True
+    elif response.status_code == 200:
+        empreinte = hashlib.blake2b(response.content, digest_size=16).hexdigest()
+        response.not_modified = bool(validator.empreinte) and empreinte == validator.empreinte
+        validator.etag = response.headers.get('ETag', '')[:255]
+        validator.last_modified = response.headers.get('Last-Modified', '')[:64]
+        validator.empreinte = empreinte
+
+
+def save_validators(validators):
+    """Enregistre en une requête les validateurs de pages traitées (les None sont ignorés)."""
+    from ..models.pageValidatorModel import PageValidator
+
+    validators = list({validator.cle: validator for validator in validators if validator is not None}.values())
+    if not validators:
+        return
+    options = {'update_conflicts': True, 'update_fields': ['url', 'etag', 'last_modified', 'empreinte', 'date_verification']}
+    # MySQL ne permet pas de désigner la contrainte en conflit (ON DUPLICATE KEY UPDATE)
+    if connection.features.supports_update_conflicts_with_target:
+        options['unique_fields'] = ['cle']
+    PageValidator.objects.bulk_create(validators, **options)
+
+
+def page_validator(response):
+    """Validateurs d'une réponse conditionnelle à enregistrer une fois la page traitée (None s'il n'y en a pas)."""
+    validator = getattr(response, 'validator', None)
+    return validator if validator is not None and response.status_code == 200 else None
+
+
+def remember(response):
+    """
+    Enregistre les validateurs d'une réponse conditionnelle une fois la page traitée.
+
+    Ils ne sont enregistrés qu'après le traitement : une collecte interrompue
+    ne marque pas comme inchangée une page dont les offres n'ont pas été lues.
+    """
+    save_validators([page_validator(response)])
+
+
+def request(method, url, conditional=False, **kwargs):
+    """
+    Exécute une requête HTTP via la session de l'hôte.
+
+    Chaque tentative attend son créneau auprès du limiteur de débit de l'hôte,
+    puis lui transmet le statut et la durée de la réponse (ou l'échec de la
+    connexion) pour qu'il adapte le débit. Les erreurs réseau, délais dépassés
+    et statuts RETRY_STATUSES sont relancés jusqu'à SCRAP_HTTP_RETRIES fois,
+    après une attente exponentielle (SCRAP_HTTP_BACKOFF) ; la dernière réponse
+    est retournée, ou la dernière erreur levée.
+    Un délai d'attente est toujours appliqué : SCRAP_HTTP_TIMEOUT si l'appelant
+    n'en fournit pas, afin qu'un site muet ne bloque jamais un worker.
+
+    Avec conditional=True (et SCRAP_CONDITIONAL_REQUESTS), les validateurs de la
+    dernière version traitée sont envoyés (If-None-Match, If-Modified-Since) et
+    response.not_modified indique si la page peut être ignorée.
+    """
+    if kwargs.get('timeout') is None:
+        kwargs['timeout'] = settings.SCRAP_HTTP_TIMEOUT
+
+    validator = None
+    if conditional and settings.SCRAP_CONDITIONAL_REQUESTS:
+        validator = load_validator(method, url, kwargs.get('data'))
+        headers = dict(kwargs.get('headers') or {})
+        if validator.etag:
+            headers['If-None-Match'] = validator.etag
+        if validator.last_modified:
+            headers['If-Modified-Since'] = validator.last_modified
+        kwargs['headers'] = headers
+
+    host = urlsplit(url).netloc
+    limiter = get_rate_limiter()
+    session = get_session(url)
+    retries = settings.SCRAP_HTTP_RETRIES
+    for attempt in range(retries + 1):
+        if attempt:
+            time.sleep(settings.SCRAP_HTTP_BACKOFF * 2 ** (attempt - 1))
+        limiter.acquire(host)
+
+        start = time.monotonic()
+        try:
+            response = session.request(method, url, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            limiter.feedback(host, None, time.monotonic() - start)
+            if attempt == retries:
+                raise
+            logger.warning(f"Nouvelle tentative {attempt + 1}/{retries} pour {method} {url}: {str(e)}")
+            continue
+
+        limiter.feedback(host, response.status_code, response.elapsed.total_seconds(), parse_retry_after(response))
+        if response.status_code not in RETRY_STATUSES or attempt == retries:
+            break
+        logger.warning(f"Nouvelle tentative {attempt + 1}/{retries} pour {method} {url}: statut {response.status_code}")
+        response.close()
+
+    response.not_modified = False
+    if validator is not None:
+        check_not_modified(response, validator)
+    return response
+
+
+def get(url, **kwargs):
+    return request('GET', url, **kwargs)
+
+
+def post(url, data=None, **kwargs):
+    return request('POST', url, data=data, **kwargs)
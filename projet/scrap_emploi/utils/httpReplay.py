@@ -0,0 +1,209 @@
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from pathlib import Path
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from . import httpClient
+
+logger = logging.getLogger(__name__)
+
+# En-têtes qui ne décrivent plus le contenu enregistré (décompressé, complet)
+DROPPED_HEADERS = ('content-encoding', 'content-length', 'transfer-encoding', 'connection', 'keep-alive')
+
+
+def request_body(request):
+    """Corps d'une requête préparée, en texte (formulaires des API AJAX)."""
+    body = request.body or ''
+    return body.decode('utf-8', 'replace') if isinstance(body, bytes) else body
+
+
+class Cassette:
+    """
+    Paires requête/réponse enregistrées, rejouables sans réseau.
+
+    Les réponses sont indexées par méthode, URL et corps de la requête. Sur
+    disque (path) :
+        index.jsonl       une ligne par réponse : méthode, URL, corps, statut, en-têtes, empreinte
+        pages/<empreinte> contenu brut (décompressé) de la réponse
+    Une requête enregistrée plusieurs fois est rejouée dans l'ordre
+    d'enregistrement, la dernière réponse étant ensuite répétée.
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else None
+        self.responses = {}
+        self.played = {}
+        self.lock = threading.Lock()
+        if self.path is not None and (self.path / 'index.jsonl').exists():
+            self.load()
+
+    def __len__(self):
+        return sum(len(responses) for responses in self.responses.values())
+
+    def __str__(self):
+        return f"cassette {self.path or 'en mémoire'} ({len(self)} réponses)"
+
+    @staticmethod
+    def key(method, url, body=''):
+        return method.upper(), url, body or ''
+
+    def load(self):
+        with open(self.path / 'index.jsonl', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    content = (self.path / 'pages' / entry['empreinte']).read_bytes()
+                    self.add(entry['methode'], entry['url'], content, entry['statut'], entry['entetes'], entry['corps'],
+                             save=False)
+
+    def add(self, method, url, content, status_code=200, headers=None, body='', save=True):
+        """Ajoute une réponse (enregistrée sur disque si la cassette a un répertoire)."""
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        headers = {name: value for name, value in (headers or {}).items() if name.lower() not in DROPPED_HEADERS}
+        with self.lock:
+            self.responses.setdefault(self.key(method, url, body), []).append((status_code, headers, content))
+            if save and self.path is not None:
+                self.save(method, url, body, status_code, headers, content)
+
+    def save(self, method, url, body, status_code, headers, content):
+        empreinte = hashlib.blake2b(content, digest_size=16).hexdigest()
+        pages = self.path / 'pages'
+        pages.mkdir(parents=True, exist_ok=True)
+        if not (pages / empreinte).exists():
+            (pages / empreinte).write_bytes(content)
+        entry = {
+            'methode': method.upper(),
+            'url': url,
+            'corps': body or '',
+            'statut': status_code,
+            'entetes': headers,
+            'empreinte': empreinte,
+        }
+        with open(self.path / 'index.jsonl', 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    def play(self, method, url, body=''):
+        """Prochaine réponse enregistrée pour la requête (None si elle n'a jamais été enregistrée)."""
+        key = self.key(method, url, body)
+        with self.lock:
+            responses = self.responses.get(key)
+            if not responses:
+                return None
+            index = self.played.get(key, 0)
+            self.played[key] = index + 1
+            return responses[min(index, len(responses) - 1)]
+
+
+class RecordingAdapter(BaseAdapter):
+    """Transport enregistrant dans une cassette chaque réponse du transport réel."""
+
+    def __init__(self, adapter, cassette):
+        super().__init__()
+        self.adapter = adapter
+        self.cassette = cassette
+
+    def send(self, request, **kwargs):
+        response = self.adapter.send(request, **kwargs)
+        self.cassette.add(request.method, request.url, response.content, response.status_code, dict(response.headers),
+                          request_body(request))
+        return response
+
+    def close(self):
+        self.adapter.close()
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Transport rejouant les réponses d'une cassette, sans réseau.
+
+    latency: délai (en secondes) ajouté à chaque réponse
+    error_rate: proportion de requêtes en échec (erreurs injectées, tirage reproductible avec seed)
+    error_status: statut HTTP des erreurs injectées (None : erreur de connexion)
+    Une requête absente de la cassette lève une erreur de connexion.
+    """
+
+    def __init__(self, cassette, latency=0.0, error_rate=0.0, error_status=None, seed=None):
+        super().__init__()
+        self.cassette = cassette
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    def send(self, request, **kwargs):
+        with self.lock:
+            self.requests += 1
+            failed = self.error_rate and self.random.random() < self.error_rate
+            if failed:
+                self.errors += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if failed and self.error_status is None:
+            raise requests.exceptions.ConnectionError(f"Erreur injectée pour {request.url}", request=request)
+        if failed:
+            return self.build_response(request, self.error_status, {}, b'', reason='Erreur injectée')
+
+        recorded = self.cassette.play(request.method, request.url, request_body(request))
+        if recorded is None:
+            raise requests.exceptions.ConnectionError(f"Aucune réponse enregistrée pour {request.method} {request.url}",
+                                                      request=request)
+        return self.build_response(request, *recorded)
+
+    def build_response(self, request, status_code, headers, content, reason='OK'):
+        response = requests.Response()
+        response.status_code = status_code
+        response.headers = CaseInsensitiveDict(headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = content
+        response.url = request.url
+        response.request = request
+        response.reason = reason
+        response.elapsed = timedelta(seconds=self.latency)
+        return response
+
+    def close(self):
+        pass
+
+
+@contextmanager
+def recording(path):
+    """Enregistre dans la cassette du répertoire path toutes les réponses reçues par httpClient."""
+    cassette = Cassette(path)
+    httpClient.set_transport(lambda adapter: RecordingAdapter(adapter, cassette))
+    try:
+        yield cassette
+    finally:
+        httpClient.set_transport(None)
+        logger.info(f"Enregistrement terminé: {cassette}")
+
+
+@contextmanager
+def replaying(cassette, **options):
+    """
+    Rejoue une cassette (ou le répertoire d'une cassette) à la place du réseau pour httpClient.
+
+    options: latency, error_rate, error_status, seed (voir ReplayAdapter)
+    """
+    if not isinstance(cassette, Cassette):
+        cassette = Cassette(cassette)
+    adapter = ReplayAdapter(cassette, **options)
+    httpClient.set_transport(lambda real_adapter: adapter)
+    try:
+        yield adapter
+    finally:
+        httpClient.set_transport(None)
+        logger.info(f"Rejeu terminé: {adapter.requests} requêtes, {adapter.errors} erreurs injectées")
@@ -0,0 +1,237 @@
+import logging
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from ..models.crawlStateModel import CrawlState
+from ..models.offreIndexModel import OffreIndex, OffreRecherche
+
+logger = logging.getLogger(__name__)
+
+
+class OfferWriter:
+    """
+    Tampon d'écriture des offres d'une source.
+
+    Les offres sont accumulées avec add() puis écrites en un seul aller-retour
+    par page avec bulk_create. Les doublons sont arbitrés par la contrainte
+    d'unicité de la base (lien_offre) : ignorés par défaut, ou mis à jour si
+    update_fields est fourni.
+
+    Les offres déjà en base collectées à nouveau (mode rafraîchissement) sont
+    ajoutées avec add_refresh() : seules celles dont l'empreinte a changé sont
+    réécrites, en un bulk_update par lot.
+
+    Les descriptions des offres (table de contenu liée, voir OfferContentMixin)
+    sont écrites dans la même transaction que les offres, suivant la même règle
+    pour les doublons, tout comme leurs lignes de l'index commun (OffreIndex).
+
+    Si source est fourni, la version de la source (clé des pages en cache) est
+    incrémentée après chaque écriture ayant ajouté ou modifié des offres.
+
+    Les offres qui n'ont pu être écrites (ni déjà en base) sont retenues dans
+    failed, par leur champ unique.
+    """
+
+    def __init__(self, model, unique_field='lien_offre', update_fields=None, batch_size=500, source=None):
+        self.model = model
+        self.source = source
+        self.unique_field = unique_field
+        self.update_fields = update_fields
+        self.batch_size = batch_size
+        self.buffer = []
+        self.refresh_buffer = []
+        self.refreshed = 0
+        self.failed = set()
+
+    def __len__(self):
+        return len(self.buffer) + len(self.refresh_buffer)
+
+    def add(self, offre):
+        """Ajoute une instance non sauvegardée au tampon."""
+        offre.populate_derived_fields()
+        self.buffer.append(offre)
+
+    def add_refresh(self, offre):
+        """Ajoute au tampon une nouvelle version (non sauvegardée) d'une offre déjà en base."""
+        offre.populate_derived_fields()
+        self.refresh_buffer.append(offre)
+
+    def refresh_fields(self):
+        """Champs réécrits lors d'un rafraîchissement (ni clé, ni champ unique, ni date de création)."""
+        return [
+            field for field in self.model._meta.concrete_fields
+            if not field.primary_key and not field.unique and not getattr(field, 'auto_now_add', False)
+        ]
+
+    def bulk_options(self, update_fields=None, unique_fields=None):
+        update_fields = update_fields or self.update_fields
+        if not update_fields:
+            return {'ignore_conflicts': True}
+        options = {'update_conflicts': True, 'update_fields': update_fields}
+        # MySQL ne permet pas de désigner la contrainte en conflit (ON DUPLICATE KEY UPDATE)
+        if connection.features.supports_update_conflicts_with_target:
+            options['unique_fields'] = unique_fields or [self.unique_field]
+        return options
+
+    def unique(self, offres):
+        """Offres du lot dédoublonnées sur le champ unique (la dernière version de chaque offre est gardée)."""
+        return list({getattr(offre, self.unique_field): offre for offre in offres}.values())
+
+    def stored_pks(self, offres):
+        """Identifiants en base des offres, indexés par leur champ unique."""
+        keys = [getattr(offre, self.unique_field) for offre in offres]
+        return dict(self.model.objects.filter(**{f'{self.unique_field}__in': keys}).values_list(self.unique_field, 'pk'))
+
+    def write_contents(self, offres, update, pks):
+        """
+        Écrit les contenus (descriptions) des offres dont le contenu a été renseigné.
+
+        update: réécrire le contenu des offres déjà en base (sinon il est conservé)
+        pks: identifiants en base des offres (voir stored_pks)
+        """
+        contenus = []
+        for offre in offres:
+            pk = pks.get(getattr(offre, self.unique_field))
+            if pk is not None and getattr(offre, 'has_contenu', None) and offre.has_contenu():
+                offre.contenu.offre_id = pk
+                contenus.append(offre.contenu)
+        if not contenus:
+            return
+        options = self.bulk_options(self.model.content_fields() if update else None, unique_fields=['offre'])
+        self.model.content_model().objects.bulk_create(contenus, batch_size=self.batch_size, **options)
+
+    def write_index(self, offres, update, pks):
+        """
+        Écrit les lignes de l'index commun des offres (OffreIndex) et leur texte
+        de recherche (OffreRecherche).
+
+        update: réécrire les lignes des offres déjà indexées (sinon elles sont conservées)
+        pks: identifiants en base des offres (voir stored_pks)
+        """
+        if getattr(self.model, 'CRAWL_SOURCE', None) is None:
+            return
+        entries = []
+        for offre in offres:
+            pk = pks.get(getattr(offre, self.unique_field))
+            if pk is not None:
+                entries.append(OffreIndex.entry(offre, pk))
+        if not entries:
+            return
+        options = self.bulk_options(OffreIndex.index_fields() if update else None, unique_fields=['source', 'offre_id'])
+        OffreIndex.objects.bulk_create(entries, batch_size=self.batch_size, **options)
+
+        # Identifiants des lignes d'index (non renseignés par bulk_create en cas de conflit)
+        ids = dict(OffreIndex.objects.filter(
+            source=self.model.CRAWL_SOURCE, offre_id__in=[entry.offre_id for entry in entries]
+        ).values_list('offre_id', 'id'))
+        recherches = []
+        for offre in offres:
+            entry_id = ids.get(pks.get(getattr(offre, self.unique_field)))
+            if entry_id is not None:
+                recherches.append(OffreRecherche(offre_id=entry_id, **offre.search_values()))
+        options = self.bulk_options(OffreRecherche.search_fields() if update else None, unique_fields=['offre'])
+        OffreRecherche.objects.bulk_create(recherches, batch_size=self.batch_size, **options)
+
+    def flush(self):
+        """
+        Écrit le tampon en base.
+
+        Returns:
+            int: nombre d'offres qui n'existaient pas encore en base
+        """
+        refreshed = self.flush_refresh() if self.refresh_buffer else 0
+        self.refreshed += refreshed
+        if not self.buffer:
+            self.changed(refreshed)
+            return 0
+
+        # Une offre présente deux fois dans le lot ne compte qu'une fois (et n'est écrite qu'une fois)
+        offres, self.buffer = self.unique(self.buffer), []
+        keys = [getattr(offre, self.unique_field) for offre in offres]
+        try:
+            with transaction.atomic():
+                existing = self.model.objects.filter(**{f'{self.unique_field}__in': keys}).count()
+                self.model.objects.bulk_create(offres, batch_size=self.batch_size, **self.bulk_options())
+                pks = self.stored_pks(offres)
+                self.write_contents(offres, bool(self.update_fields), pks)
+                self.write_index(offres, bool(self.update_fields), pks)
+        except Exception as e:
+            logger.error(f"Échec de l'écriture groupée ({self.model.__name__}), écriture offre par offre: {str(e)}")
+            saved = self.save_one_by_one(offres)
+            self.changed(refreshed + saved)
+            return saved
+
+        # Lignes refusées sans erreur (INSERT OR IGNORE de SQLite écarte aussi les valeurs invalides)
+        missing = [key for key in keys if key not in pks]
+        if missing:
+            logger.error(f"{len(missing)} offres non écrites ({self.model.__name__}): {', '.join(missing[:5])}")
+            self.failed.update(missing)
+        added = len(pks) - existing
+        self.changed(refreshed + added + (existing if self.update_fields else 0))
+        return added
+
+    def changed(self, count):
+        """Incrémente la version de la source si des offres ont été ajoutées ou modifiées."""
+        if count and self.source is not None:
+            CrawlState.bump_version(self.source)
+
+    def flush_refresh(self):
+        """
+        Réécrit les offres rafraîchies dont l'empreinte a changé.
+
+        Returns:
+            int: nombre d'offres mises à jour
+        """
+        offres, self.refresh_buffer = self.unique(self.refresh_buffer), []
+        keys = [getattr(offre, self.unique_field) for offre in offres]
+        rows = self.model.objects.filter(**{f'{self.unique_field}__in': keys}).values_list(
+            self.unique_field, 'pk', 'empreinte_carte', 'empreinte_detail'
+        )
+        stored = {key: (pk, empreinte_carte, empreinte_detail) for key, pk, empreinte_carte, empreinte_detail in rows}
+        fields = self.refresh_fields()
+        now = timezone.now()
+        changed = []
+        for offre in offres:
+            row = stored.get(getattr(offre, self.unique_field))
+            if row is None:
+                continue
+            pk, empreinte_carte, empreinte_detail = row
+            if (empreinte_carte, empreinte_detail) == (offre.empreinte_carte, offre.empreinte_detail):
+                continue
+            offre.pk = pk
+            # bulk_update n'appelle pas pre_save : dates de modification renseignées ici
+            for field in fields:
+                if getattr(field, 'auto_now', False):
+                    setattr(offre, field.attname, now)
+            changed.append(offre)
+        if not changed:
+            return 0
+        try:
+            with transaction.atomic():
+                self.model.objects.bulk_update(changed, [field.name for field in fields], batch_size=self.batch_size)
+                pks = {getattr(offre, self.unique_field): offre.pk for offre in changed}
+                self.write_contents(changed, True, pks)
+                self.write_index(changed, True, pks)
+        except Exception as e:
+            logger.error(f"Échec du rafraîchissement groupé ({self.model.__name__}): {str(e)}")
+            self.failed.update(getattr(offre, self.unique_field) for offre in changed)
+            return 0
+        return len(changed)
+
+    def save_one_by_one(self, offres):
+        """Repli : isole les offres invalides pour ne pas perdre toute la page."""
+        saved = 0
+        for offre in offres:
+            try:
+                with transaction.atomic():
+                    offre.save()
+                saved += 1
+            except Exception as e:
+                logger.error(f"Erreur lors de l'enregistrement de l'offre {offre}: {str(e)}")
+        if saved < len(offres):
+            # Offres en erreur déjà en base (doublons) : elles ne sont pas perdues
+            stored = self.stored_pks(offres)
+            self.failed.update(getattr(offre, self.unique_field) for offre in offres
+                               if getattr(offre, self.unique_field) not in stored)
+        return saved
@@ -0,0 +1,160 @@
+import base64
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+# Paramètres d'URL portant le curseur de la page suivante ou précédente
+NEXT_PARAM = 'apres'
+PREVIOUS_PARAM = 'avant'
+
+
+def estimated_count(model):
+    """
+    Nombre d'offres de la table, mis en cache SCRAP_COUNT_CACHE_TIMEOUT secondes.
+
+    Sous MySQL, au-delà de SCRAP_EXACT_COUNT_LIMIT lignes, l'estimation d'InnoDB
+    (information_schema) remplace le COUNT(*), qui parcourt tout l'index.
+    """
+    key = f'scrap:nombre:{model._meta.db_table}'
+    count = cache.get(key)
+    if count is None:
+        count = table_estimate(model)
+        if count is None or count < settings.SCRAP_EXACT_COUNT_LIMIT:
+            count = model.objects.count()
+        cache.set(key, count, settings.SCRAP_COUNT_CACHE_TIMEOUT)
+    return count
+
+
+def table_estimate(model):
+    """Nombre de lignes estimé par le moteur (MySQL uniquement, None sinon)."""
+    if connection.vendor != 'mysql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            [model._meta.db_table],
+        )
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+class KeysetPage:
+    """Page d'offres et curseurs des pages voisines (même usage qu'une page de Paginator dans les templates)."""
+
+    def __init__(self, paginator, object_list, has_next, has_previous):
+        self.paginator = paginator
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    @property
+    def next_cursor(self):
+        return self.paginator.encode(self.object_list[-1]) if self.has_next and self.object_list else ''
+
+    @property
+    def previous_cursor(self):
+        return self.paginator.encode(self.object_list[0]) if self.has_previous and self.object_list else ''
+
+
+class KeysetPaginator:
+    """
+    Pagination par curseur sur (date_publication, id), du plus récent au plus ancien.
+
+    Chaque page est lue à partir de la dernière (ou première) offre de la page
+    voisine, avec l'index composite (date_publication, id) : le coût d'une page
+    ne dépend pas de sa profondeur, contrairement à LIMIT/OFFSET, et aucun
+    COUNT(*) n'est exécuté (le total affiché vient de estimated_count).
+    Les offres sans date (EmploiDakar) sont placées après toutes les autres.
+
+    count_model: modèle dont le nombre de lignes est le total affiché (par
+    défaut celui du queryset, qui ne doit alors pas être filtré)
+    """
+
+    def __init__(self, queryset, per_page, field='date_publication', count_model=None):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.field = field
+        self.model_field = queryset.model._meta.get_field(field)
+        self.count_model = count_model or queryset.model
+
+    @cached_property
+    def count(self):
+        return estimated_count(self.count_model)
+
+    def encode(self, offre):
+        value = getattr(offre, self.field)
+        raw = f"{value.isoformat() if value is not None else ''}|{offre.pk}"
+        return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+    def decode(self, cursor):
+        """(valeur, id) du curseur, ou None s'il est absent ou invalide."""
+        if not cursor:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8')
+            value, pk = raw.rsplit('|', 1)
+            return (self.model_field.to_python(value) if value else None), int(pk)
+        except (ValueError, ValidationError):
+            # binascii.Error et UnicodeDecodeError dérivent de ValueError
+            return None
+
+    def ordering(self, backward):
+        return [self.field, 'id'] if backward else [f'-{self.field}', '-id']
+
+    def after(self, cursor):
+        """Conditions successives sélectionnant les offres qui suivent le curseur dans l'ordre d'affichage."""
+        isnull = f'{self.field}__isnull'
+        if cursor is None:
+            return [Q(**{isnull: False}), Q(**{isnull: True})] if self.model_field.null else [Q()]
+        value, pk = cursor
+        if value is None:
+            return [Q(**{isnull: True}) & Q(id__lt=pk)]
+        # La borne sur la date seule permet au moteur de parcourir l'index à partir du curseur
+        segments = [Q(**{f'{self.field}__lte': value}) & (Q(**{f'{self.field}__lt': value}) | Q(id__lt=pk))]
+        if self.model_field.null:
+            segments.append(Q(**{isnull: True}))
+        return segments
+
+    def before(self, cursor):
+        """Conditions successives sélectionnant les offres qui précèdent le curseur, de la plus proche à la plus éloignée."""
+        value, pk = cursor
+        if value is None:
+            return [Q(**{f'{self.field}__isnull': True}) & Q(id__gt=pk), Q(**{f'{self.field}__isnull': False})]
+        return [Q(**{f'{self.field}__gte': value}) & (Q(**{f'{self.field}__gt': value}) | Q(id__gt=pk))]
+
+    def get_page(self, params):
+        """Page désignée par les paramètres de la requête (première page si le curseur est absent ou invalide)."""
+        cursor = self.decode(params.get(PREVIOUS_PARAM))
+        backward = cursor is not None
+        if not backward:
+            cursor = self.decode(params.get(NEXT_PARAM))
+
+        # Les offres sans date (champ nullable) forment un segment à part, lu
+        # seulement si les offres datées ne suffisent pas à remplir la page :
+        # chaque requête reste un parcours d'index borné par le curseur.
+        queryset = self.queryset.order_by(*self.ordering(backward))
+        offres = []
+        for condition in (self.before(cursor) if backward else self.after(cursor)):
+            offres.extend(queryset.filter(condition)[:self.per_page + 1 - len(offres)])
+            if len(offres) > self.per_page:
+                break
+        more = len(offres) > self.per_page
+        offres = offres[:self.per_page]
+
+        if backward:
+            offres.reverse()
+            return KeysetPage(self, offres, has_next=True, has_previous=more)
+        return KeysetPage(self, offres, has_next=more, has_previous=cursor is not None)
@@ -0,0 +1,132 @@
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+
+from ..models.offreIndexModel import OffreIndex
+from .textNormalizer import search_tokens
+
+# Table FTS5 (SQLite) indexant les colonnes d'OffreRecherche
+FTS_TABLE = 'offre_recherche_fts'
+# Poids du titre par rapport à l'entreprise, au lieu et aux descriptions dans le classement
+TITLE_WEIGHT = 3
+# Nombre maximal de mots d'une requête
+MAX_TOKENS = 10
+# Longueur minimale des mots indexés par InnoDB (innodb_ft_min_token_size, 3 par défaut)
+MYSQL_MIN_TOKEN_SIZE = 3
+
+
+def fts_query(tokens):
+    """Requête FTS5 : tous les mots (entre guillemets, jamais interprétés comme opérateurs)."""
+    return ' '.join(f'"{token}"' for token in tokens)
+
+
+def boolean_query(tokens):
+    """
+    Requête FULLTEXT de MySQL en mode booléen : tous les mots indexés requis.
+
+    Les mots plus courts que innodb_ft_min_token_size (« rh », « it ») ne sont
+    pas indexés par InnoDB : requis, ils excluraient toutes les offres ; ils
+    restent dans la requête sans être requis.
+    """
+    return ' '.join(f'+{token}' if len(token) >= MYSQL_MIN_TOKEN_SIZE else token for token in tokens)
+
+
+def rank_window(limit, offset):
+    """
+    Nombre d'offres classées par pertinence (SCRAP_SEARCH_RANK_WINDOW), ou None
+    si la page demandée dépasse la fenêtre : toutes les offres trouvées sont
+    alors classées, pour ne pas écarter les plus anciennes.
+    """
+    window = settings.SCRAP_SEARCH_RANK_WINDOW
+    return window if offset + limit <= window else None
+
+
+def sqlite_search(tokens, source, limit, offset):
+    join = ' JOIN offre_index i ON i.id = f.rowid'
+    where = f"{FTS_TABLE} MATCH %s{' AND i.source = %s' if source else ''}"
+    params = [fts_query(tokens), *([source] if source else [])]
+    window = rank_window(limit, offset)
+    with connection.cursor() as cursor:
+        # Fenêtre de classement : seules les offres indexées le plus récemment sont classées. FTS5
+        # parcourt les listes de documents par rowid décroissant sans les classer ; le calcul de bm25
+        # pour chaque offre contenant un mot très courant coûterait sinon une centaine de
+        # millisecondes à 500 000 offres.
+        bound = None
+        if window:
+            cursor.execute(f"SELECT f.rowid FROM {FTS_TABLE} f{join if source else ''} WHERE {where} "
+                           f"ORDER BY f.rowid DESC LIMIT 1 OFFSET %s", [*params, window - 1])
+            bound = cursor.fetchone()
+        # bm25 : plus la valeur est petite, plus l'offre est pertinente
+        cursor.execute(f"SELECT f.rowid FROM {FTS_TABLE} f{join} WHERE {where} AND f.rowid >= %s "
+                       f"ORDER BY bm25({FTS_TABLE}, {TITLE_WEIGHT}, 1), i.date_publication DESC LIMIT %s OFFSET %s",
+                       [*params, bound[0] if bound else 0, limit, offset])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def mysql_search(tokens, source, limit, offset):
+    # Aucun mot indexé : le mode booléen ne trouverait rien
+    if all(len(token) < MYSQL_MIN_TOKEN_SIZE for token in tokens):
+        return scan_search(tokens, source, limit, offset)
+    # Sélection en mode booléen (tous les mots) des offres indexées le plus récemment, puis classement
+    # en langage naturel (TF-IDF d'InnoDB) de ces seules candidates : un mot très courant ne fait pas
+    # calculer la pertinence, ni lire la date de publication, de chaque offre qui le contient
+    window = rank_window(limit, offset)
+    words = ' '.join(tokens)
+    candidates = (
+        "SELECT c.offre_id FROM offre_recherche c"
+        f"{' JOIN offre_index ci ON ci.id = c.offre_id' if source else ''} "
+        f"WHERE MATCH(c.titre, c.texte) AGAINST(%s IN BOOLEAN MODE){' AND ci.source = %s' if source else ''}"
+        f"{' ORDER BY c.offre_id DESC LIMIT %s' if window else ''}"
+    )
+    sql = (
+        f"SELECT r.offre_id FROM ({candidates}) candidates "
+        "JOIN offre_recherche r ON r.offre_id = candidates.offre_id JOIN offre_index i ON i.id = r.offre_id "
+        f"ORDER BY {TITLE_WEIGHT} * MATCH(r.titre) AGAINST(%s) + MATCH(r.titre, r.texte) AGAINST(%s) DESC, "
+        "i.date_publication DESC LIMIT %s OFFSET %s"
+    )
+    params = [boolean_query(tokens), *([source] if source else []), *([window] if window else []),
+              words, words, limit, offset]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def scan_search(tokens, source, limit, offset):
+    """Autres bases (sans index en texte intégral) : parcours des textes, offres les plus récentes d'abord."""
+    queryset = OffreIndex.objects.all()
+    if source:
+        queryset = queryset.filter(source=source)
+    for token in tokens:
+        queryset = queryset.filter(Q(recherche__titre__contains=token) | Q(recherche__texte__contains=token))
+    return list(queryset.order_by('-date_publication', '-id').values_list('id', flat=True)[offset:offset + limit])
+
+
+BACKENDS = {
+    'sqlite': sqlite_search,
+    'mysql': mysql_search,
+}
+
+
+def search(query, source=None, limit=20, offset=0):
+    """
+    Offres de l'index commun contenant tous les mots de query (dans le titre,
+    l'entreprise, le lieu ou les descriptions), les plus pertinentes d'abord.
+
+    Les mots sont normalisés comme le texte indexé (accents, casse, mots vides,
+    pluriels). La recherche utilise l'index en texte intégral de la base :
+    FULLTEXT sous MySQL, FTS5 sous SQLite (table tenue à jour par des
+    déclencheurs, voir la migration 0015). Seules les offres trouvées les plus
+    récemment indexées (SCRAP_SEARCH_RANK_WINDOW) sont classées, sauf pour
+    une page au-delà de cette fenêtre (voir rank_window).
+
+    source: limiter la recherche à une source (CrawlState.SOURCE_*)
+
+    Returns:
+        list[OffreIndex]: au plus limit offres, à partir du rang offset
+    """
+    tokens = search_tokens(query)[:MAX_TOKENS]
+    if not tokens:
+        return []
+    ids = BACKENDS.get(connection.vendor, scan_search)(tokens, source, limit, offset)
+    offres = OffreIndex.objects.in_bulk(ids)
+    return [offres[pk] for pk in ids if pk in offres]
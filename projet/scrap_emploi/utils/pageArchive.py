@@ -0,0 +1,142 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+from .pageFixtures import make_response
+
+logger = logging.getLogger(__name__)
+
+# Types de pages archivées
+KIND_LISTING = 'liste'
+KIND_DETAIL = 'detail'
+
+
+class PageArchive:
+    """
+    Archive des pages brutes récupérées, compressées et adressées par leur contenu.
+
+    Organisation du répertoire :
+        objets/ab/abcd….gz            contenu compressé (un fichier par contenu distinct)
+        index/<source>/AAAA-MM-JJ.jsonl une ligne par page récupérée : date, type,
+                                        méthode, URL, corps de la requête (formulaire
+                                        des onglets AJAX), statut, encodage et
+                                        empreinte du contenu
+
+    Une page récupérée plusieurs fois sans changement n'est stockée qu'une fois ;
+    l'index garde chaque récupération. Les lignes sont ajoutées en une écriture
+    (mode append), ce qui permet à plusieurs workers d'archiver en parallèle.
+    """
+
+    def __init__(self, root=None):
+        self.root = Path(root or settings.SCRAP_ARCHIVE_DIR)
+        self.lock = threading.Lock()
+
+    def __str__(self):
+        return f"archive {self.root}"
+
+    def object_path(self, empreinte):
+        return self.root / 'objets' / empreinte[:2] / f'{empreinte}.gz'
+
+    def store(self, response, source, kind):
+        """Archive le contenu d'une réponse et l'ajoute à l'index de la source."""
+        content = response.content
+        empreinte = hashlib.blake2b(content, digest_size=16).hexdigest()
+        path = self.object_path(empreinte)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Écriture dans un fichier temporaire puis renommage : un lecteur ne voit jamais un fichier partiel
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(gzip.compress(content, mtime=0))
+            os.replace(tmp, path)
+
+        # Les onglets AJAX d'une source partagent la même URL : seul le formulaire envoyé les distingue
+        request = response.request
+        body = (request.body if request is not None else None) or ''
+        if isinstance(body, bytes):
+            body = body.decode('utf-8', errors='replace')
+        now = timezone.now()
+        entry = {
+            'date': now.isoformat(),
+            'type': kind,
+            'methode': request.method if request is not None else 'GET',
+            'url': response.url,
+            'corps': body,
+            'statut': response.status_code,
+            'encodage': response.encoding,
+            'empreinte': empreinte,
+        }
+        index = self.root / 'index' / source / f'{now.date().isoformat()}.jsonl'
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+        with self.lock:
+            index.parent.mkdir(parents=True, exist_ok=True)
+            with open(index, 'a', encoding='utf-8') as f:
+                f.write(line)
+        return entry
+
+    def entries(self, source, since=None):
+        """
+        Entrées de l'index d'une source, dans l'ordre de récupération.
+
+        since: date (incluse) à partir de laquelle les pages sont lues
+        """
+        directory = self.root / 'index' / source
+        if not directory.is_dir():
+            return
+        for path in sorted(directory.glob('*.jsonl')):
+            if since is not None and path.stem < since.isoformat():
+                continue
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+    def load(self, empreinte):
+        """Contenu brut (bytes) d'une page archivée."""
+        return gzip.decompress(self.object_path(empreinte).read_bytes())
+
+    def response(self, entry):
+        """Réponse requests reconstruite à partir d'une entrée de l'index."""
+        response = make_response(self.load(entry['empreinte']), url=entry['url'], status_code=entry['statut'],
+                                 encoding=entry['encodage'])
+        response.not_modified = False
+        return response
+
+
+_archive = None
+_archive_lock = threading.Lock()
+
+
+def get_archive():
+    """Retourne l'archive partagée du processus (None si SCRAP_ARCHIVE_DIR n'est pas défini)."""
+    global _archive
+    if not settings.SCRAP_ARCHIVE_DIR:
+        return None
+    with _archive_lock:
+        if _archive is None:
+            _archive = PageArchive()
+        return _archive
+
+
+def archive_page(response, source, kind):
+    """
+    Archive une page traitée par la collecte.
+
+    Les réponses sans contenu nouveau (erreur, page inchangée) ne sont pas
+    archivées, et une erreur d'écriture n'interrompt jamais la collecte.
+    """
+    archive = get_archive()
+    if archive is None or response is None or response.status_code != 200 or getattr(response, 'not_modified', False):
+        return
+    try:
+        archive.store(response, source, kind)
+    except OSError as e:
+        logger.warning(f"Échec de l'archivage de {response.url}: {str(e)}")
@@ -0,0 +1,151 @@
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpRequest, QueryDict
+from django.urls import resolve, reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from ..models.crawlStateModel import CrawlState
+
+logger = logging.getLogger(__name__)
+
+# Page de liste de chaque source, préchauffée après chaque collecte
+LIST_URLS = {
+    CrawlState.SOURCE_EMPLOIDAKAR: 'emplois_dakar_list',
+    CrawlState.SOURCE_EMPLOISENEGAL: 'emplois_senegal_list',
+    CrawlState.SOURCE_SENJOB: 'senjob_list',
+    CrawlState.SOURCE_OFFRE_EMPLOI_SN: 'offre_emploi_sn_list',
+}
+
+# Source désignant l'index commun des offres dans les clés de cache et les ETag
+INDEX_KEY = 'offres'
+
+
+def get_page_cache():
+    return caches[settings.SCRAP_PAGE_CACHE]
+
+
+def page_key(request, source, version, vary_host=False):
+    """Clé d'une page : source, version des données, chemin et paramètres (triés) de la requête."""
+    params = request.GET.copy()
+    query = '&'.join(f'{name}={value}' for name, values in sorted(params.lists()) for value in values)
+    host = request.get_host() if vary_host else ''
+    return f'scrap:page:{source}:{version}:{host}{request.path}?{query}'
+
+
+def cached_response(request, source, build, vary_host=False, version=None):
+    """
+    Réponse mise en cache d'une page construite à partir des offres de la source.
+
+    La clé contient la version de la source (CrawlState.version) : une écriture
+    d'offres ou une actualisation rend les pages en cache obsolètes, qui
+    expirent ensuite d'elles-mêmes (SCRAP_PAGE_CACHE_TIMEOUT).
+
+    build: fonction sans argument retournant la réponse (appelée en cas d'absence)
+    vary_host: inclure l'hôte dans la clé (pages contenant des URL absolues)
+    version: version de la source, si elle a déjà été lue
+    """
+    if not settings.SCRAP_PAGE_CACHE_TIMEOUT or request.method not in ('GET', 'HEAD'):
+        return build()
+    page_cache = get_page_cache()
+    if version is None:
+        version = CrawlState.get_version(source)
+    key = page_key(request, source, version, vary_host)
+    response = page_cache.get(key)
+    if response is None:
+        response = build()
+        if response.status_code == 200:
+            page_cache.set(key, response, settings.SCRAP_PAGE_CACHE_TIMEOUT)
+    return response
+
+
+def with_validators(response, etag, last_modified=None):
+    """Ajoute ETag et Last-Modified à une réponse (y compris 304), comme le décorateur condition de Django."""
+    if last_modified is not None and not response.has_header('Last-Modified'):
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    response.headers.setdefault('ETag', etag)
+    return response
+
+
+def list_response(request, source, build):
+    """
+    Page de liste de la source, ou 304 si le client en a déjà la version courante.
+
+    Les validateurs viennent de la version de la source (une seule ligne de
+    CrawlState) : ni la requête des offres ni le rendu ne sont exécutés pour
+    répondre à If-None-Match / If-Modified-Since.
+    """
+    version, date_version = CrawlState.get_version_info(source)
+    return versioned_response(request, source, version, date_version, build)
+
+
+def index_response(request, build):
+    """Page de la liste de toutes les offres (OffreIndex), versionnée par les versions des quatre sources."""
+    version, date_version = CrawlState.get_combined_version_info()
+    return versioned_response(request, INDEX_KEY, version, date_version, build)
+
+
+def versioned_response(request, source, version, date_version, build):
+    """Réponse (ou 304) d'une page de liste dont les validateurs et la clé de cache viennent de version."""
+    etag = quote_etag(f'{source}-{version}')
+    last_modified = int(date_version.timestamp()) if date_version else None
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = cached_response(request, source, build, version=version)
+    return with_validators(response, etag, date_version)
+
+
+def detail_response(request, source, model, pk, build, vary_host=False):
+    """
+    Page de détail d'une offre, ou 304 si le client en a déjà la version courante.
+
+    L'ETag est formé des empreintes de la carte et de l'offre complète, qui
+    changent à chaque modification de l'offre ; les offres sans empreinte
+    (enregistrées avant leur calcul) sont servies sans validateur.
+    """
+    empreintes = model.objects.filter(pk=pk).values_list('empreinte_carte', 'empreinte_detail').first()
+    if not empreintes or not any(empreintes):
+        return cached_response(request, source, build, vary_host)
+    etag = quote_etag(f'{pk}-{empreintes[0]}-{empreintes[1]}')
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = cached_response(request, source, build, vary_host)
+    return with_validators(response, etag)
+
+
+def next_page_params(response):
+    """Paramètres de la page suivante, d'après l'en-tête Link (rel="next") d'une page de liste."""
+    for link in response.get('Link', '').split(','):
+        target, _, rel = link.partition(';')
+        if rel.strip() == 'rel="next"':
+            return target.strip().strip('<>').partition('?')[2]
+    return None
+
+
+def prewarm(source, pages=None):
+    """
+    Construit et met en cache les premières pages de la liste d'une source,
+    pour que les visiteurs suivant une collecte ne paient pas leur rendu.
+
+    Returns:
+        int: nombre de pages mises en cache
+    """
+    pages = settings.SCRAP_PREWARM_PAGES if pages is None else pages
+    if not pages or not settings.SCRAP_PAGE_CACHE_TIMEOUT:
+        return 0
+    path = reverse(LIST_URLS[source])
+    view = resolve(path).func
+    query = ''
+    for count in range(pages):
+        request = HttpRequest()
+        request.method = 'GET'
+        request.path = request.path_info = path
+        request.META = {'SERVER_NAME': settings.SCRAP_PREWARM_HOST, 'SERVER_PORT': '80', 'QUERY_STRING': query}
+        request.GET = QueryDict(query)
+        response = view(request)
+        query = next_page_params(response)
+        if query is None:
+            return count + 1
+    return pages
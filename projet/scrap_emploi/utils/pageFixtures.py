@@ -0,0 +1,38 @@
+from pathlib import Path
+
+import requests
+
+from .htmlParser import make_soup
+
+# Pages enregistrées des sites, rangées par source : fixtures/pages/<source>/<nom>.html
+FIXTURES_DIR = Path(__file__).resolve().parent.parent / 'fixtures' / 'pages'
+
+
+def load_page(source, name):
+    """Contenu brut (bytes) d'une page enregistrée."""
+    return (FIXTURES_DIR / source / f'{name}.html').read_bytes()
+
+
+def make_response(content, url='', status_code=200, encoding='utf-8'):
+    """Réponse requests construite à partir d'un contenu enregistré."""
+    response = requests.Response()
+    response._content = content
+    response.status_code = status_code
+    response.encoding = encoding
+    response.url = url
+    return response
+
+
+def extract_listing(module, markup, **details_kwargs):
+    """Champs de toutes les offres d'une page de liste, tels qu'extraits par le contrôleur."""
+    offres = []
+    for card in module.find_cards(make_soup(markup)):
+        carte = module.parse_listing_card(card)
+        if carte is not None:
+            offres.append({**carte, **module.parse_card_details(card, **details_kwargs)})
+    return offres
+
+
+def extract_detail(module, content, offre):
+    """Champs d'une offre complétés par sa page de détail."""
+    return module.parse_offer_detail(offre, make_response(content, url=offre.get('lien_offre', '')))
@@ -0,0 +1,122 @@
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+
+import billiard
+import requests
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def snapshot_response(response):
+    """
+    Données brutes d'une réponse transmises à un processus d'analyse.
+
+    Seuls le contenu (bytes) et quelques attributs sont envoyés : la session,
+    la requête et la connexion restent dans le processus principal.
+    """
+    if response is None:
+        return None
+    return {
+        'content': response.content,
+        'status_code': response.status_code,
+        'url': response.url,
+        'encoding': response.encoding,
+        'reason': response.reason,
+        'headers': dict(response.headers),
+    }
+
+
+def restore_response(page):
+    """Réponse requests reconstruite dans le processus d'analyse."""
+    if page is None:
+        return None
+    response = requests.Response()
+    response._content = page['content']
+    response.status_code = page['status_code']
+    response.url = page['url']
+    response.encoding = page['encoding']
+    response.reason = page['reason']
+    response.headers.update(page['headers'])
+    return response
+
+
+def parse_page(parse_detail, offre, page):
+    """Exécuté dans un processus d'analyse : retourne les champs du modèle (ou None)."""
+    return parse_detail(offre, restore_response(page))
+
+
+def _init_worker():
+    # Processus démarrés par forkserver : Django doit être initialisé
+    from django.apps import apps
+    if not apps.ready:
+        import django
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'projet.settings')
+        django.setup()
+
+
+def _in_daemon_process():
+    """Vrai dans un processus de travail Celery (prefork), où multiprocessing refuse de créer des enfants."""
+    return multiprocessing.current_process().daemon or billiard.current_process().daemon
+
+
+class ParsePool:
+    """
+    Pool de processus analysant les pages de détail hors du processus principal.
+
+    BeautifulSoup est limité à un cœur par l'interpréteur : les pages brutes sont
+    envoyées à SCRAP_PARSE_PROCESSES processus qui retournent de simples
+    dictionnaires de champs. Le processus principal ne garde que les requêtes
+    et les écritures en base.
+
+    Les processus sont démarrés par forkserver : un fork du processus principal,
+    dont les threads du pipeline détiennent des verrous (logging, connexions),
+    pourrait bloquer les processus d'analyse. Dans un worker Celery, le pool
+    est créé avec billiard.
+    """
+
+    def __init__(self, processes=None):
+        self.processes = processes or settings.SCRAP_PARSE_PROCESSES or os.cpu_count()
+        if _in_daemon_process():
+            self.executor = None
+            self.pool = billiard.Pool(self.processes, initializer=_init_worker)
+        else:
+            self.pool = None
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context('forkserver'),
+                initializer=_init_worker
+            )
+        logger.info(f"Analyse des pages dans {self.processes} processus")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def submit(self, parse_detail, offre, response):
+        """
+        Planifie l'analyse d'une page de détail et retourne un Future.
+
+        parse_detail doit être une fonction de module (transmise par référence).
+        """
+        page = snapshot_response(response)
+        if self.executor is not None:
+            return self.executor.submit(parse_page, parse_detail, offre, page)
+        future = Future()
+        self.pool.apply_async(
+            parse_page, (parse_detail, offre, page),
+            callback=future.set_result, error_callback=future.set_exception
+        )
+        return future
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+        else:
+            self.pool.close()
+            self.pool.join()
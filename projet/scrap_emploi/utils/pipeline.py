@@ -0,0 +1,397 @@
+import logging
+import queue
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db import connections
+
+from . import httpClient
+from .fetchEngine import fetch
+from .fingerprint import fingerprint
+from .ingestion import OfferWriter
+from .pageArchive import KIND_DETAIL, archive_page
+from .parsePool import ParsePool
+
+logger = logging.getLogger(__name__)
+
+# Marqueur de fin de flux transmis d'un étage au suivant
+_END = object()
+# Délai (en secondes) entre deux vérifications de l'arrêt du pipeline par un étage bloqué sur une file
+POLL_INTERVAL = 0.1
+
+
+class StageStats:
+    """Compteurs d'un étage du pipeline (débit, temps de travail, profondeur de file)."""
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.errors = 0
+        self.busy = 0.0
+        self.max_depth = 0
+        self.lock = threading.Lock()
+
+    def record(self, elapsed, error=False):
+        with self.lock:
+            self.count += 1
+            self.busy += elapsed
+            if error:
+                self.errors += 1
+
+    def observe(self, depth):
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    def summary(self, duration):
+        rate = self.count / duration if duration else 0.0
+        return (f"{self.name}: {self.count} offres ({rate:.1f}/s), "
+                f"temps de travail {self.busy:.2f}s, erreurs {self.errors}, file max {self.max_depth}")
+
+
+class OfferPipeline:
+    """
+    Pipeline producteur/consommateur d'une source.
+
+    Le contrôleur parcourt les pages de listing et envoie chaque nouvelle offre
+    avec put(). Un pool de threads télécharge les pages de détail, un thread les
+    analyse avec parse_detail(offre, response) (qui retourne les champs du modèle
+    ou None) et un unique thread écrit les offres par lots avec OfferWriter.
+
+    Les étages sont reliés par des files bornées : lorsqu'un étage prend du
+    retard, les précédents sont bloqués, ce qui borne la mémoire utilisée.
+
+    Les empreintes de la carte (offre envoyée) et de l'offre complète (champs
+    retournés) sont ajoutées aux champs, hors fingerprint_exclude (champs
+    volatils). Les offres déjà en base envoyées avec put(offre, refresh=True)
+    ne sont réécrites que si leurs empreintes ont changé. Si leur carte n'a pas
+    changé, la page de détail est demandée de façon conditionnelle
+    (httpClient.request) et n'est pas analysée si elle est inchangée.
+
+    Avec parse_processes (SCRAP_PARSE_PROCESSES) non nul, le thread d'analyse
+    délègue les pages à un ParsePool et ne fait qu'en collecter les résultats ;
+    parse_detail doit alors être une fonction de module.
+
+    Les liens des offres envoyées qui n'ont pas été écrites (page de détail en
+    erreur, offre ignorée par parse_detail, écriture refusée) sont retenus dans
+    failed.
+
+    Une erreur inattendue d'un étage (écriture en base, enregistrement des
+    validateurs, ...) arrête le pipeline : les étages vident leurs files sans
+    les traiter, put() ignore les offres suivantes (voir aborted) et close()
+    relève l'erreur.
+
+    Avec source (CrawlState.SOURCE_*), les pages de détail récupérées sont
+    archivées (voir utils.pageArchive) et chaque écriture modifiant des offres
+    invalide les pages en cache de la source. fetcher remplace la récupération des
+    pages (fonction url, **kwargs -> réponse), par exemple pour réanalyser
+    l'archive ; conditional=False désactive alors les requêtes conditionnelles.
+    """
+
+    def __init__(self, model, parse_detail, fetch_kwargs=None, fetch_workers=None, queue_size=None, batch_size=None,
+                 parse_processes=None, fingerprint_exclude=(), source=None, fetcher=None, conditional=True):
+        queue_size = queue_size or settings.SCRAP_PIPELINE_QUEUE_SIZE
+        self.model = model
+        self.parse_detail = parse_detail
+        self.fetch_kwargs = fetch_kwargs or {}
+        self.fetch_workers = fetch_workers or settings.SCRAP_FETCH_WORKERS
+        self.parse_processes = settings.SCRAP_PARSE_PROCESSES if parse_processes is None else parse_processes
+        self.parse_pool = None
+        self.fingerprint_exclude = fingerprint_exclude
+        self.source = source
+        self.fetcher = fetcher or fetch
+        self.conditional = conditional
+        self.writer = OfferWriter(model, batch_size=batch_size or settings.SCRAP_PIPELINE_BATCH_SIZE, source=source)
+        self.fetch_queue = queue.Queue(maxsize=queue_size)
+        self.parse_queue = queue.Queue(maxsize=queue_size)
+        self.write_queue = queue.Queue(maxsize=queue_size)
+        self.stats = {name: StageStats(name) for name in ('listing', 'fetch', 'parse', 'write')}
+        self.threads = []
+        self.stopped = threading.Event()
+        self.error = None
+        self.failed_links = set()
+        self.validators = []
+        self.written = 0
+        self.unchanged = 0
+        self.started_at = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.close()
+        except Exception:
+            # L'exception en cours n'est pas masquée par celle du pipeline (déjà journalisée)
+            if exc_type is None:
+                raise
+        return False
+
+    def start(self):
+        self.started_at = time.monotonic()
+        if self.parse_processes:
+            self.parse_pool = ParsePool(self.parse_processes)
+        name = self.model.__name__
+        for i in range(self.fetch_workers):
+            self.threads.append(threading.Thread(target=self.fetch_stage, name=f'{name}-fetch-{i}', daemon=True))
+        self.parse_thread = threading.Thread(target=self.parse_stage, name=f'{name}-parse', daemon=True)
+        self.write_thread = threading.Thread(target=self.write_stage, name=f'{name}-write', daemon=True)
+        for thread in self.threads + [self.parse_thread, self.write_thread]:
+            thread.start()
+
+    @property
+    def aborted(self):
+        """Vrai si une erreur a arrêté le pipeline : les offres envoyées ne sont plus traitées."""
+        return self.stopped.is_set()
+
+    def abort(self, error):
+        """Arrête le pipeline après l'erreur d'un étage (la première est relevée par close())."""
+        if self.error is None:
+            self.error = error
+        logger.error(f"Pipeline {self.model.__name__} arrêté: {str(error)}")
+        self.stopped.set()
+
+    def send(self, target, item):
+        """
+        Place item dans la file target sans rester bloqué si le pipeline est arrêté.
+
+        Returns:
+            bool: False si l'élément n'a pas été transmis (pipeline arrêté)
+        """
+        while not self.stopped.is_set():
+            try:
+                target.put(item, timeout=POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def end(self, target, threads):
+        """Transmet la fin du flux à chacun des threads consommateurs de target encore actifs."""
+        for _ in threads:
+            while any(thread.is_alive() for thread in threads):
+                try:
+                    target.put(_END, timeout=POLL_INTERVAL)
+                    break
+                except queue.Full:
+                    continue
+        for thread in threads:
+            thread.join()
+
+    @property
+    def failed(self):
+        """Liens des offres envoyées qui n'ont pas été écrites en base."""
+        return self.failed_links | self.writer.failed
+
+    @property
+    def refreshed(self):
+        """Nombre d'offres déjà en base réécrites car leur contenu a changé."""
+        return self.writer.refreshed
+
+    def put(self, offre, refresh=False):
+        """
+        Envoie une offre de la liste (dictionnaire contenant 'lien_offre') au pipeline.
+
+        refresh: l'offre est déjà en base et n'est réécrite que si elle a changé
+        L'offre est ignorée si le pipeline a été arrêté par une erreur.
+        """
+        self.stats['listing'].record(0)
+        self.stats['fetch'].observe(self.fetch_queue.qsize())
+        self.send(self.fetch_queue, (offre, refresh))
+
+    def fetch_stage(self):
+        stats = self.stats['fetch']
+        try:
+            while True:
+                item = self.fetch_queue.get()
+                if item is _END:
+                    break
+                if self.stopped.is_set():
+                    continue
+                offre, refresh = item
+                start = time.monotonic()
+                try:
+                    conditional = refresh and self.conditional and self.card_unchanged(offre)
+                    response = self.fetcher(offre['lien_offre'], conditional=conditional, **self.fetch_kwargs)
+                    stats.record(time.monotonic() - start)
+                    if self.source:
+                        archive_page(response, self.source, KIND_DETAIL)
+                except Exception as e:
+                    logger.error(f"Erreur lors de la récupération de {offre['lien_offre']}: {str(e)}")
+                    response = None
+                    stats.record(time.monotonic() - start, error=True)
+                self.stats['parse'].observe(self.parse_queue.qsize())
+                self.send(self.parse_queue, (offre, refresh, response))
+        except Exception as e:
+            self.abort(e)
+        finally:
+            # Offres connues : empreintes et validateurs lus depuis ce thread
+            connections.close_all()
+
+    def parse_stage(self):
+        try:
+            if self.parse_pool is not None:
+                self.parse_stage_pool()
+            else:
+                self.parse_stage_local()
+        except Exception as e:
+            self.abort(e)
+
+    def parse_stage_local(self):
+        while True:
+            item = self.parse_queue.get()
+            if item is _END:
+                break
+            if self.stopped.is_set():
+                continue
+            offre, refresh, response = item
+            if self.skip_unchanged(response):
+                continue
+            self.emit(offre, refresh, time.monotonic(), lambda: self.parse_detail(offre, response),
+                      getattr(response, 'validator', None))
+
+    def parse_stage_pool(self):
+        # Quelques pages d'avance par processus ; les résultats sont collectés dans l'ordre d'envoi
+        pending = deque()
+        limit = self.parse_pool.processes * 2
+        while True:
+            item = self.parse_queue.get()
+            if item is _END:
+                break
+            if self.stopped.is_set():
+                continue
+            offre, refresh, response = item
+            if self.skip_unchanged(response):
+                continue
+            try:
+                future = self.parse_pool.submit(self.parse_detail, offre, response)
+            except Exception as e:
+                # Pool inutilisable (processus d'analyse arrêté) : l'offre est perdue mais le flux continue
+                logger.error(f"Erreur lors de l'envoi de l'offre {offre.get('titre')} à l'analyse: {str(e)}")
+                self.stats['parse'].record(0, error=True)
+                self.failed_links.add(offre['lien_offre'])
+                continue
+            pending.append((offre, refresh, getattr(response, 'validator', None), time.monotonic(), future))
+            if len(pending) >= limit:
+                self.emit_pending(pending.popleft())
+        while pending:
+            self.emit_pending(pending.popleft())
+
+    def emit_pending(self, entry):
+        offre, refresh, validator, start, future = entry
+        self.emit(offre, refresh, start, future.result, validator)
+
+    def card_unchanged(self, offre):
+        """
+        Vrai si la carte d'une offre connue n'a pas changé : sa page de détail peut
+        alors être demandée de façon conditionnelle. Une carte modifiée impose la
+        page complète (une réponse 304 n'a pas de contenu à analyser).
+        """
+        stored = self.model.objects.filter(lien_offre=offre['lien_offre']).values_list('empreinte_carte', flat=True).first()
+        return stored == fingerprint(offre, self.fingerprint_exclude)
+
+    def skip_unchanged(self, response):
+        """Vrai si la page de détail est inchangée depuis la dernière collecte (304 ou même contenu)."""
+        if response is None or not response.not_modified:
+            return False
+        self.unchanged += 1
+        return True
+
+    def emit(self, offre, refresh, start, parse, validator=None):
+        """
+        Transmet à l'étage d'écriture les champs retournés par parse(), avec les
+        validateurs de la page de détail (enregistrés une fois l'offre écrite).
+        """
+        stats = self.stats['parse']
+        try:
+            fields = parse()
+            stats.record(time.monotonic() - start)
+        except Exception as e:
+            logger.error(f"Erreur lors du traitement de l'offre {offre.get('titre')}: {str(e)}")
+            stats.record(time.monotonic() - start, error=True)
+            self.failed_links.add(offre['lien_offre'])
+            return
+        if fields is None:
+            self.failed_links.add(offre['lien_offre'])
+            return
+        fields['empreinte_detail'] = fingerprint(fields, self.fingerprint_exclude)
+        fields['empreinte_carte'] = fingerprint(offre, self.fingerprint_exclude)
+        self.stats['write'].observe(self.write_queue.qsize())
+        self.send(self.write_queue, (fields, refresh, validator))
+
+    def write_stage(self):
+        try:
+            while True:
+                try:
+                    item = self.write_queue.get(timeout=settings.SCRAP_PIPELINE_FLUSH_INTERVAL)
+                except queue.Empty:
+                    # Rien à écrire pour l'instant : vider le lot en cours
+                    self.flush()
+                    continue
+                if item is _END:
+                    break
+                fields, refresh, validator = item
+                try:
+                    if refresh:
+                        self.writer.add_refresh(self.model(**fields))
+                    else:
+                        self.writer.add(self.model(**fields))
+                except Exception as e:
+                    logger.error(f"Offre invalide ignorée ({self.model.__name__}): {str(e)}")
+                    self.failed_links.add(fields.get('lien_offre'))
+                    continue
+                if validator is not None:
+                    self.validators.append((fields.get('lien_offre'), validator))
+                if len(self.writer) >= self.writer.batch_size:
+                    self.flush()
+            self.flush()
+        except Exception as e:
+            # Les étages précédents cessent de transmettre leurs offres (voir send)
+            self.abort(e)
+        finally:
+            # Ce thread a ouvert sa propre connexion à la base
+            connections.close_all()
+
+    def flush(self):
+        count = len(self.writer)
+        if not count:
+            return
+        start = time.monotonic()
+        self.written += self.writer.flush()
+        # Offres non écrites : leurs pages ne sont pas marquées inchangées, la collecte suivante les reprend
+        httpClient.save_validators(validator for lien, validator in self.validators if lien not in self.writer.failed)
+        self.validators = []
+        elapsed = time.monotonic() - start
+        stats = self.stats['write']
+        with stats.lock:
+            stats.count += count
+            stats.busy += elapsed
+
+    def close(self):
+        """
+        Attend la fin de tous les étages.
+
+        Returns:
+            int: nombre de nouvelles offres écrites en base
+
+        Raises:
+            l'erreur qui a arrêté le pipeline, le cas échéant
+        """
+        self.end(self.fetch_queue, self.threads)
+        self.end(self.parse_queue, [self.parse_thread])
+        if self.parse_pool is not None:
+            self.parse_pool.close()
+        self.end(self.write_queue, [self.write_thread])
+        self.report()
+        if self.error is not None:
+            raise self.error
+        return self.written
+
+    def report(self):
+        duration = time.monotonic() - self.started_at
+        logger.info(f"Pipeline {self.model.__name__} terminé en {duration:.2f}s, {self.written} nouvelles offres écrites, "
+                    f"{self.refreshed} offres mises à jour, {self.unchanged} pages de détail inchangées")
+        for stats in self.stats.values():
+            logger.info(f"Pipeline {self.model.__name__} - {stats.summary(duration)}")
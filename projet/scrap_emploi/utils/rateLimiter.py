@@ -0,0 +1,194 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+
+logger = logging.getLogger(__name__)
+
+# Pénalité maximale appliquée à l'intervalle nominal d'un site
+MAX_PENALTY = 16.0
+# Statuts indiquant que le site demande de ralentir
+THROTTLE_STATUSES = (429, 503)
+# Une réponse plus lente que LATENCY_FACTOR fois la moyenne est un signe de surcharge
+LATENCY_FACTOR = 2.0
+
+
+class HostState:
+    def __init__(self, prochaine_requete=0.0, penalite=1.0, latence_moyenne=0.0):
+        self.prochaine_requete = prochaine_requete
+        self.penalite = penalite
+        self.latence_moyenne = latence_moyenne
+
+
+class MemoryBackend:
+    """État du limiteur conservé en mémoire : coordination entre threads d'un même processus."""
+
+    def __init__(self):
+        self.states = {}
+        self.locks = {}
+        self.lock = threading.Lock()
+
+    def update(self, host, func):
+        """Applique func à l'état de l'hôte sous verrou et retourne son résultat."""
+        with self.lock:
+            host_lock = self.locks.setdefault(host, threading.Lock())
+        with host_lock:
+            return func(self.states.setdefault(host, HostState()))
+
+    def defer(self, host, func):
+        """Applique func à l'état de l'hôte (immédiatement : l'état en mémoire ne coûte rien à mettre à jour)."""
+        self.update(host, func)
+
+
+class DatabaseBackend:
+    """
+    État du limiteur stocké en base : coordination entre processus et workers Celery.
+
+    Chaque mise à jour coûte une lecture verrouillée et une écriture de la
+    ligne de l'hôte. Les ajustements après réponse (defer) sont conservés en
+    mémoire et appliqués à la ligne lors de la réservation suivante du même
+    processus : une seule transaction par requête.
+
+    Si la base est indisponible, l'état en mémoire du processus prend le relais
+    pour que le scraping continue à un débit maîtrisé.
+    """
+
+    def __init__(self):
+        self.fallback = MemoryBackend()
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    def defer(self, host, func):
+        """Applique func à l'état de l'hôte lors de sa prochaine mise à jour."""
+        with self.lock:
+            self.pending.setdefault(host, []).append(func)
+
+    def update(self, host, func):
+        """Applique les ajustements en attente puis func à l'état de l'hôte verrouillé en base, et retourne son résultat."""
+        from ..models.rateLimitStateModel import RateLimitState
+
+        with self.lock:
+            pending = self.pending.pop(host, [])
+
+        def apply(state):
+            for adjust in pending:
+                adjust(state)
+            return func(state)
+
+        try:
+            with transaction.atomic():
+                row = RateLimitState.objects.select_for_update().filter(host=host).first()
+                if row is None:
+                    RateLimitState.objects.get_or_create(host=host)
+                    row = RateLimitState.objects.select_for_update().get(host=host)
+                state = HostState(row.prochaine_requete, row.penalite, row.latence_moyenne)
+                result = apply(state)
+                row.prochaine_requete = state.prochaine_requete
+                row.penalite = state.penalite
+                row.latence_moyenne = state.latence_moyenne
+                row.save(update_fields=['prochaine_requete', 'penalite', 'latence_moyenne'])
+                return result
+        except DatabaseError as e:
+            logger.warning(f"Limiteur de débit en base indisponible pour {host}, repli en mémoire: {str(e)}")
+            return self.fallback.update(host, apply)
+
+
+class RateLimiter:
+    """
+    Limiteur de débit par hôte de type seau à jetons (algorithme GCRA).
+
+    Chaque site dispose d'un débit nominal (requêtes par seconde) et d'une rafale
+    autorisée, configurés dans SCRAP_RATE_LIMITS. L'intervalle nominal est
+    multiplié par une pénalité qui double sur 429/503 ou sur une latence en forte
+    hausse, puis décroît progressivement quand le site répond normalement.
+
+    clock, sleep: horloge (timestamp en secondes) et attente utilisées par le limiteur
+    """
+
+    def __init__(self, backend, clock=time.time, sleep=time.sleep):
+        self.backend = backend
+        self.clock = clock
+        self.sleep = sleep
+
+    def get_limits(self, host):
+        limits = settings.SCRAP_RATE_LIMITS
+        host_limits = limits.get(host) or limits.get(host.removeprefix('www.')) or {}
+        rate = host_limits.get('rate', limits['default']['rate'])
+        burst = host_limits.get('burst', limits['default']['burst'])
+        return rate, burst
+
+    def acquire(self, host):
+        """
+        Réserve le prochain créneau disponible pour l'hôte et attend qu'il arrive.
+
+        Returns:
+            float: temps d'attente effectif en secondes
+        """
+        rate, burst = self.get_limits(host)
+
+        def reserve(state):
+            now = self.clock()
+            interval = state.penalite / rate
+            allowed_at = max(now, state.prochaine_requete - interval * (burst - 1))
+            state.prochaine_requete = max(state.prochaine_requete, allowed_at) + interval
+            return allowed_at - now
+
+        wait = self.backend.update(host, reserve)
+        if wait > 0:
+            self.sleep(wait)
+        return wait
+
+    def feedback(self, host, status_code, elapsed, retry_after=None):
+        """
+        Ajuste le débit de l'hôte d'après la dernière réponse (ajustement appliqué
+        à la prochaine réservation avec le stockage en base).
+
+        Args:
+            host: hôte interrogé
+            status_code: statut HTTP reçu (None en cas d'erreur réseau ou de délai dépassé)
+            elapsed: durée de la requête en secondes
+            retry_after: délai demandé par l'en-tête Retry-After, en secondes
+        """
+        rate, burst = self.get_limits(host)
+        retry_at = self.clock() + retry_after if retry_after else None
+
+        def adjust(state):
+            if status_code is None or status_code in THROTTLE_STATUSES:
+                state.penalite = min(state.penalite * 2, MAX_PENALTY)
+                if retry_at:
+                    # Aucune rafale avant la date demandée par le site
+                    interval = state.penalite / rate
+                    state.prochaine_requete = max(state.prochaine_requete, retry_at + interval * (burst - 1))
+                logger.warning(f"Ralentissement des requêtes vers {host} (pénalité x{state.penalite:.2f})")
+                return
+
+            if state.latence_moyenne and elapsed > state.latence_moyenne * LATENCY_FACTOR:
+                state.penalite = min(state.penalite * 1.25, MAX_PENALTY)
+            else:
+                state.penalite = max(1.0, state.penalite * 0.9)
+
+            if state.latence_moyenne:
+                state.latence_moyenne = 0.8 * state.latence_moyenne + 0.2 * elapsed
+            else:
+                state.latence_moyenne = elapsed
+
+        self.backend.defer(host, adjust)
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """Retourne le limiteur partagé du processus, selon SCRAP_RATE_LIMIT_BACKEND."""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            if settings.SCRAP_RATE_LIMIT_BACKEND == 'database':
+                backend = DatabaseBackend()
+            else:
+                backend = MemoryBackend()
+            _limiter = RateLimiter(backend)
+        return _limiter
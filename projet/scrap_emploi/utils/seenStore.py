@@ -0,0 +1,119 @@
+import hashlib
+import logging
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.db.models import Q
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseSeenStore:
+    """
+    Détection des offres déjà connues par requêtes groupées en base.
+
+    Rien n'est chargé au démarrage : pour chaque page de listing, prefetch()
+    interroge les colonnes indexées (lien_offre__in, titre_normalise__in, ...)
+    en une seule requête, et seules les clés trouvées sont gardées en mémoire.
+    """
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = fields
+        self.known = {field: set() for field in fields}
+
+    def __str__(self):
+        return f"base de données ({self.model.__name__})"
+
+    def prefetch(self, items):
+        """
+        Charge en une requête les clés de la page déjà présentes en base.
+
+        Args:
+            items: dictionnaires {champ: valeur} des offres de la page
+        """
+        condition = Q()
+        for field in self.fields:
+            values = {item[field] for item in items if item.get(field)}
+            values -= self.known[field]
+            if values:
+                condition |= Q(**{f'{field}__in': values})
+        if not condition:
+            return
+        for row in self.model.objects.filter(condition).values_list(*self.fields):
+            for field, value in zip(self.fields, row):
+                if value:
+                    self.known[field].add(value)
+
+    def contains(self, item):
+        return any(item.get(field) and item[field] in self.known[field] for field in self.fields)
+
+    def add(self, item):
+        for field in self.fields:
+            if item.get(field):
+                self.known[field].add(item[field])
+
+
+def hash64(field, value):
+    """Empreinte signée sur 64 bits d'une clé (préfixée par son champ)."""
+    digest = hashlib.blake2b(f'{field}:{value}'.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+class HashSeenStore:
+    """
+    Détection des offres déjà connues à partir d'empreintes 64 bits en mémoire.
+
+    Les clés existantes sont lues une seule fois en flux et stockées dans un
+    tableau trié d'entiers 64 bits (8 octets par clé, recherche dichotomique),
+    au lieu d'ensembles de chaînes complètes.
+    """
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = fields
+        hashes = array('q')
+        for row in model.objects.values_list(*fields).iterator(chunk_size=5000):
+            for field, value in zip(fields, row):
+                if value:
+                    hashes.append(hash64(field, value))
+        self.hashes = array('q', sorted(hashes))
+        self.added = set()
+        logger.info(f"{len(self.hashes)} empreintes chargées pour {model.__name__}")
+
+    def __str__(self):
+        return f"empreintes 64 bits ({self.model.__name__}, {len(self.hashes)} clés)"
+
+    def prefetch(self, items):
+        pass
+
+    def has_hash(self, value):
+        index = bisect_left(self.hashes, value)
+        return index < len(self.hashes) and self.hashes[index] == value
+
+    def contains(self, item):
+        for field in self.fields:
+            if item.get(field):
+                value = hash64(field, item[field])
+                if value in self.added or self.has_hash(value):
+                    return True
+        return False
+
+    def add(self, item):
+        for field in self.fields:
+            if item.get(field):
+                self.added.add(hash64(field, item[field]))
+
+
+def get_seen_store(model, fields):
+    """
+    Crée le magasin d'offres connues configuré par SCRAP_SEEN_STORE.
+
+    Args:
+        model: modèle des offres de la source
+        fields: colonnes indexées identifiant une offre (ex. lien_offre, titre_normalise)
+    """
+    if settings.SCRAP_SEEN_STORE == 'hash':
+        return HashSeenStore(model, fields)
+    return DatabaseSeenStore(model, fields)
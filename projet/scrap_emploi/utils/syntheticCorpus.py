@@ -0,0 +1,154 @@
+import random
+from datetime import date, datetime, time, timedelta
+
+from django.utils import timezone
+
+# Vocabulaire des offres générées
+POSTES = ['Comptable', 'Développeur Python', 'Chargé de clientèle', 'Responsable logistique', 'Assistant de direction',
+          'Ingénieur réseaux', 'Commercial terrain', 'Chef de projet digital', 'Auditeur interne', 'Technicien de maintenance']
+NIVEAUX = ['junior', 'confirmé', 'senior', 'stagiaire', 'H/F']
+ENTREPRISES = ['Sonatel', 'Orange Finances Mobiles', 'Ecobank', 'Dangote Cement', 'Wave', 'CBAO', 'Total Energies',
+               'Kirène', 'Sococim', 'Expresso']
+VILLES = ['Dakar', 'Thiès', 'Saint-Louis', 'Ziguinchor', 'Kaolack', 'Mbour', 'Rufisque', 'Touba']
+CONTRATS = ['CDI', 'CDD', 'Stage', 'Freelance', 'Intérim']
+PHRASE = ("Vous participerez à la mise en œuvre des projets de l'entreprise, en lien avec les équipes "
+          "opérationnelles, et contribuerez à l'amélioration continue des processus qualité. ")
+
+# Hôte et chemin des offres de chaque source
+OFFER_URLS = {
+    'emploidakar': 'https://www.emploidakar.com/offre-emploi/{slug}/',
+    'emploisenegal': 'https://www.emploisenegal.com/offre-emploi-senegal/{slug}',
+    'senjob': 'https://senjob.com/sn/jobseekers/{slug}.html',
+    'offre_emploi_sn': 'https://offre-emploi.sn/offre/{slug}/',
+}
+
+
+class SyntheticOffer:
+    """
+    Offre générée de façon déterministe à partir de son numéro.
+
+    Les mêmes valeurs servent à remplir les modèles (model_instance) et à
+    produire les pages de liste et de détail au format de chaque site
+    (listing_page, detail_page) : une offre générée et déjà en base est donc
+    reconnue comme telle par les contrôleurs.
+    """
+
+    def __init__(self, source, number, today=None):
+        rng = random.Random(f'{source}:{number}')
+        self.source = source
+        self.number = number
+        self.titre = f"{rng.choice(POSTES)} {rng.choice(NIVEAUX)} {number}"
+        self.entreprise = rng.choice(ENTREPRISES)
+        self.ville = rng.choice(VILLES)
+        self.contrat = rng.choice(CONTRATS)
+        self.date = (today or date(2026, 10, 1)) - timedelta(days=rng.randrange(60))
+        self.slug = f"offre-synthetique-{number}"
+        self.lien_offre = OFFER_URLS[source].format(slug=self.slug)
+        self.paragraphes = [PHRASE * rng.randint(2, 6) for _ in range(rng.randint(3, 8))]
+
+    @property
+    def description(self):
+        return ''.join(f'<p>{paragraphe}</p>' for paragraphe in self.paragraphes)
+
+    def aware_date(self):
+        return timezone.make_aware(datetime.combine(self.date, time.min))
+
+    def model_fields(self):
+        """Champs du modèle de la source, tels qu'écrits par une collecte."""
+        if self.source == 'emploidakar':
+            return {
+                'titre': self.titre, 'entreprise': self.entreprise, 'localisation': self.ville,
+                'type_contrat': self.contrat, 'date_publication': self.aware_date(), 'lien_offre': self.lien_offre,
+                'reference': self.slug, 'description_poste': f'<div class="job_description">{self.description}</div>',
+            }
+        if self.source == 'emploisenegal':
+            return {
+                'titre': self.titre, 'entreprise': self.entreprise, 'localisation': f'Région de : {self.ville}',
+                'lien_offre': self.lien_offre, 'date_publication': self.date, 'type_contrat': self.contrat,
+                'niveau_etude': 'Bac+3', 'niveau_experience': '2 ans', 'competences': 'Python, Excel',
+                'description_poste': f'<div class="job-description">{self.description}</div>',
+                'profil_recherche': f'<div class="job-qualifications"><p>{PHRASE}</p></div>',
+                'secteur_activite': 'Informatique', 'description_entreprise': self.entreprise,
+            }
+        if self.source == 'senjob':
+            return {
+                'titre': self.titre, 'entreprise': self.entreprise, 'localisation': self.ville,
+                'type_contrat': self.contrat, 'date_publication': self.date,
+                'date_expiration': self.date + timedelta(days=30), 'lien_offre': self.lien_offre,
+                'description_poste': (f'<div class="view"><div>A PROPOS DE : {self.entreprise}</div>'
+                                      f'<div>TYPE DE CONTRAT : {self.contrat}</div>{self.description}</div>'),
+            }
+        return {
+            'titre': self.titre, 'entreprise': self.entreprise, 'lieu': self.ville, 'type_contrat': self.contrat,
+            'date_publication': self.aware_date(), 'lien_offre': self.lien_offre,
+            'description_courte': PHRASE.strip(), 'description_complete': f'<div class="job_description">{self.description}</div>',
+            'date_cloture': self.date + timedelta(days=30),
+        }
+
+    def model_instance(self, model):
+        """Instance non sauvegardée, champs dérivés (titre normalisé, slug...) compris."""
+        offre = model(**self.model_fields())
+        offre.populate_derived_fields()
+        return offre
+
+    def listing_card(self):
+        """Élément de l'offre dans une page de liste du site."""
+        if self.source == 'emploidakar':
+            return (f'<li class="job_listing type-job_listing"><a href="{self.lien_offre}">'
+                    f'<div class="position"><h3>{self.titre}</h3></div>'
+                    f'<div class="company"><strong>{self.entreprise}</strong></div>'
+                    f'<div class="location">{self.ville}</div><ul class="meta"><li class="job-type">{self.contrat}</li>'
+                    f'<li><time datetime="{self.date.isoformat()}">{self.date}</time></li></ul></a></li>')
+        if self.source == 'emploisenegal':
+            return (f'<div class="card card-job"><h3><a href="/offre-emploi-senegal/{self.slug}">{self.titre}</a></h3>'
+                    f'<a class="card-job-company company-name" href="#">{self.entreprise}</a>'
+                    f'<div class="card-job-description"><p>{PHRASE}</p></div>'
+                    f'<ul><li>Région de : {self.ville}</li><li>Niveau d\'études requis : Bac+3</li>'
+                    f'<li>Niveau d\'expérience : 2 ans</li><li>Contrat proposé : {self.contrat}</li>'
+                    f'<li>Compétences clés : Python, Excel</li></ul>'
+                    f'<time>{self.date.strftime("%d.%m.%Y")}</time></div>')
+        if self.source == 'senjob':
+            return (f'<tr style="height:70px"><td><a href="jobseekers/{self.slug}.html">{self.titre}</a></td>'
+                    f'<td style="font-size:14px"><span class="green_text_normal">{self.ville}</span></td>'
+                    f'<td><span style="display:none">{self.date.isoformat()}</span>{self.date}</td>'
+                    f'<td><span style="display:none">{(self.date + timedelta(days=30)).isoformat()}</span></td></tr>')
+        return (f'<li data-title="{self.titre}" data-company="{self.entreprise}" data-address="{self.ville}" '
+                f'data-image="https://offre-emploi.sn/img/{self.number}.png" '
+                f'data-job_type=\'<span class="cdi">{self.contrat}</span>\'>'
+                f'<a href="{self.lien_offre}"><h4>{self.titre}</h4></a>'
+                f'<div class="listing-desc"><p>{PHRASE}</p></div>'
+                f'<div class="listing-date"><time>Publié il y a {self.number % 5 + 1} jours</time></div></li>')
+
+    def detail_page(self):
+        """Page de détail complète de l'offre (avec l'en-tête et le pied de page du site)."""
+        habillage = '<nav>' + '<a href="#">Rubrique</a>' * 40 + '</nav>'
+        if self.source == 'emploidakar':
+            corps = f'<div class="job_description">{self.description}</div>'
+        elif self.source == 'emploisenegal':
+            corps = (f'<div class="job-description">{self.description}</div>'
+                     f'<div class="job-qualifications"><p>{PHRASE}</p></div>'
+                     f'<ul class="skills"><li>Python</li><li>Excel</li></ul>'
+                     f'<div class="card-block-company"><div class="field-item even">Informatique</div>'
+                     f'<a rel="nofollow" href="https://{self.slug}.sn">site</a>'
+                     f'<p class="truncated-text">{self.entreprise}</p></div>')
+        elif self.source == 'senjob':
+            corps = (f'<div class="view"><div>A PROPOS DE : {self.entreprise}</div>'
+                     f'<div>TYPE DE CONTRAT : {self.contrat}</div>{self.description}</div>')
+        else:
+            corps = (f'<article class="single_job_listing"><div class="job_description">{self.description}</div>'
+                     f'<div class="job-overview"><span class="date-expiration">Closing date: '
+                     f'{(self.date + timedelta(days=30)).strftime("%d %b %Y")}</span></div></article>')
+        return f'<html><head><title>{self.titre}</title></head><body>{habillage}{corps}<footer>{habillage}</footer></body></html>'
+
+
+def listing_page(source, offres):
+    """Page de liste du site contenant les offres données (fragment AJAX pour EmploiDakar)."""
+    cards = ''.join(offre.listing_card() for offre in offres)
+    if source == 'emploidakar':
+        return cards
+    if source == 'emploisenegal':
+        return f'<html><body><div class="page-search-jobs-content">{cards}</div></body></html>'
+    if source == 'senjob':
+        pages = ''.join(f'<div class="resultsOffre"><a href="?page={page}">{page}</a></div>' for page in range(1, 4))
+        return f'<html><body><table><tr><td>{pages}<table>{cards}</table></td></tr></table></body></html>'
+    return f'<html><body><ul class="job_listings">{cards}</ul></body></html>'
@@ -0,0 +1,68 @@
+import html
+import re
+import unicodedata
+
+# Longueur de la colonne titre_normalise des modèles
+TITLE_KEY_MAX_LENGTH = 255
+
+# Mots vides du français (sans accents), ignorés par la recherche
+STOPWORDS = frozenset('''
+    a au aux avec ce ces dans de des du elle en et il ils je la le les leur lui ma mais me meme mes moi mon ne nos
+    notre nous on ou par pas pour qu que qui sa se ses son sur ta te tes toi ton tu un une vos votre vous c d j l m n
+    s t y est sont ete etre avoir afin ainsi
+'''.split())
+
+_TAG = re.compile(r'<[^>]*>')
+_WORD = re.compile(r'\w+')
+
+
+def strip_accents(text):
+    """Supprime les accents et signes diacritiques (« Sénégal » -> « Senegal »)."""
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def normalize_title(titre):
+    """
+    Clé de déduplication d'un titre d'offre : accents supprimés, casse repliée
+    (casefold) et espaces consécutifs réduits à un seul.
+
+    Deux titres qui ne diffèrent que par la casse, les accents ou les espaces
+    produisent la même clé.
+    """
+    if not titre:
+        return ''
+    key = ' '.join(strip_accents(titre).casefold().split())
+    return key[:TITLE_KEY_MAX_LENGTH]
+
+
+def singular(token):
+    """Forme approchée du singulier d'un mot (« postes » -> « poste », « commerciaux » -> « commercial »)."""
+    if len(token) <= 3:
+        return token
+    if token.endswith(('eaux', 'eux')):
+        return token[:-1]
+    if token.endswith('aux'):
+        return token[:-3] + 'al'
+    if token.endswith('s') and not token.endswith('ss'):
+        return token[:-1]
+    return token
+
+
+def search_tokens(text):
+    """
+    Mots d'un texte pour la recherche : balises HTML retirées, accents supprimés,
+    casse repliée, mots vides ignorés et pluriels ramenés au singulier.
+
+    Le texte indexé et les requêtes passent par la même fonction : la
+    recherche ne dépend ni des accents ni de la casse, ni du nombre.
+    """
+    if not text:
+        return []
+    text = strip_accents(html.unescape(_TAG.sub(' ', text))).casefold()
+    return [singular(word) for word in _WORD.findall(text) if word not in STOPWORDS]
+
+
+def search_text(*texts):
+    """Mots de recherche de plusieurs textes, séparés par des espaces (colonnes des index en texte intégral)."""
+    return ' '.join(token for text in texts for token in search_tokens(text))
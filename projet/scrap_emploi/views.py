@@ -1,94 +1,231 @@
 from django.shortcuts import render, redirect, get_object_or_404
-import requests
-from django.core.paginator import Paginator
+from django.conf import settings
+from django.utils import timezone
+from datetime import timedelta
+import logging
 from .models.emploisenegalModel import EmploiSenegal
 from .models.emploidakarModel import EmploiDakar
-from .controllers.emploidakarController import scrape_emplois_dakar
-from .controllers.emploisenegalController import scrape_emplois
-from .controllers.senjobController import scrape_senjob
 from .models.senjobModel import SenjobModel
-from .controllers.offreEmploiSNController import scrape_offre_emploi_sn
 from .models.offreEmploiSNModel import OffreEmploiSN
+from .models.crawlStateModel import CrawlState
+from .models.offreIndexModel import OffreIndex
+from .controllers import SOURCE_MODELS
+from .utils.keysetPaginator import NEXT_PARAM, PREVIOUS_PARAM, KeysetPaginator
+from .utils.offerSearch import search
+from .utils.pageCache import detail_response, index_response, list_response
+from .tasks import (
+    scrape_emploidakar_periodic,
+    scrape_emploisenegal_periodic,
+    scrape_senjob_periodic,
+    scrape_offre_emploi_sn_periodic,
+)
+
+logger = logging.getLogger(__name__)
+
+# Colonnes communes aux cartes des listes (les descriptions ne sont chargées que dans les vues de détail)
+CARD_FIELDS = ('titre', 'entreprise', 'date_publication')
+
+
+def revalidate_source(source, task):
+    """
+    Stale-while-revalidate : si les données de la source sont plus anciennes que
+    SCRAP_FRESHNESS_WINDOW, la tâche Celery correspondante est mise en file
+    (une seule fois, quel que soit le nombre de visiteurs simultanés).
+
+    Returns:
+        datetime: date de la dernière actualisation réussie (ou None)
+    """
+    derniere_actualisation = CrawlState.last_refreshed(source)
+    freshness_window = timedelta(seconds=settings.SCRAP_FRESHNESS_WINDOW)
+
+    if derniere_actualisation is None or timezone.now() - derniere_actualisation > freshness_window:
+        claim = CrawlState.claim_refresh(source, settings.SCRAP_REFRESH_LOCK_TIMEOUT)
+        if claim is not None:
+            try:
+                # La tâche reprend la réservation (et la libère à la fin de la collecte)
+                task.delay(claim=claim.isoformat())
+                logger.info(f"Actualisation de la source {source} mise en file")
+            except Exception as e:
+                logger.error(f"Impossible de mettre en file l'actualisation de {source}: {str(e)}")
+                CrawlState.release_refresh(source, claim)
+
+    return derniere_actualisation
 
 
 def home(request):
     return render(request, 'scrap_emploi/home.html')
 
 
+def filter_query(request, page_params=(NEXT_PARAM, PREVIOUS_PARAM)):
+    """Paramètres de la requête hors pagination (filtres), à placer devant la page dans les liens de pagination."""
+    params = request.GET.copy()
+    for name in page_params:
+        params.pop(name, None)
+    return f'{params.urlencode()}&' if params else ''
+
+
+def paginated_response(request, template, context, page):
+    """Page de liste, avec les liens vers les pages voisines dans l'en-tête Link (suivis par le préchauffage)."""
+    filtre = filter_query(request)
+    response = render(request, template, {**context, 'filtre': filtre})
+    links = []
+    if page.has_previous:
+        links.append(f'<{request.path}?{filtre}{PREVIOUS_PARAM}={page.previous_cursor}>; rel="prev"')
+    if page.has_next:
+        links.append(f'<{request.path}?{filtre}{NEXT_PARAM}={page.next_cursor}>; rel="next"')
+    if links:
+        response['Link'] = ', '.join(links)
+    return response
+
+
 def emplois_senegal_list(request):
-    scrape_emplois()
-    
-    emplois_senegal = EmploiSenegal.objects.all()
-    paginator = Paginator(emplois_senegal, 20)  # 20 éléments par page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    context = {
-        'page_obj': page_obj
-    }
-    return render(request, 'scrap_emploi/emplois_senegal_list.html', context)
+    derniere_actualisation = revalidate_source(CrawlState.SOURCE_EMPLOISENEGAL, scrape_emploisenegal_periodic)
+
+    def build():
+        emplois_senegal = EmploiSenegal.objects.only(*CARD_FIELDS, 'localisation')
+        paginator = KeysetPaginator(emplois_senegal, 20)  # 20 éléments par page
+        page_obj = paginator.get_page(request.GET)
+        context = {
+            'page_obj': page_obj,
+            'derniere_actualisation': derniere_actualisation,
+        }
+        return paginated_response(request, 'scrap_emploi/emplois_senegal_list.html', context, page_obj)
+
+    return list_response(request, CrawlState.SOURCE_EMPLOISENEGAL, build)
 
 
 def emploi_senegal_detail(request, emploi_id):
-    emploi = get_object_or_404(EmploiSenegal, id=emploi_id)
-    context = {
-        'emploi': emploi
-    }
-    return render(request, 'scrap_emploi/emploi_senegal_detail.html', context)
+    def build():
+        emploi = get_object_or_404(EmploiSenegal.objects.select_related('contenu'), id=emploi_id)
+        context = {
+            'emploi': emploi
+        }
+        return render(request, 'scrap_emploi/emploi_senegal_detail.html', context)
+
+    return detail_response(request, CrawlState.SOURCE_EMPLOISENEGAL, EmploiSenegal, emploi_id, build)
 
 
 def emplois_dakar_list(request):
-    scrape_emplois_dakar()
-   
-    emplois_dakar = EmploiDakar.objects.all()
-    paginator = Paginator(emplois_dakar, 20)  # 20 éléments par page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    context = {
-        'page_obj': page_obj
-    }
-    return render(request, 'scrap_emploi/emplois_dakar_list.html', context)
+    derniere_actualisation = revalidate_source(CrawlState.SOURCE_EMPLOIDAKAR, scrape_emploidakar_periodic)
+
+    def build():
+        emplois_dakar = EmploiDakar.objects.only(*CARD_FIELDS, 'localisation')
+        paginator = KeysetPaginator(emplois_dakar, 20)  # 20 éléments par page
+        page_obj = paginator.get_page(request.GET)
+        context = {
+            'page_obj': page_obj,
+            'derniere_actualisation': derniere_actualisation,
+        }
+        return paginated_response(request, 'scrap_emploi/emplois_dakar_list.html', context, page_obj)
+
+    return list_response(request, CrawlState.SOURCE_EMPLOIDAKAR, build)
 
 
 def emploi_dakar_detail(request, emploi_id):
-    emploi = get_object_or_404(EmploiDakar, id=emploi_id)
-    context = {
-        'emploi': emploi
-    }
-    return render(request, 'scrap_emploi/emploi_dakar_detail.html', context)
+    def build():
+        emploi = get_object_or_404(EmploiDakar.objects.select_related('contenu'), id=emploi_id)
+        context = {
+            'emploi': emploi
+        }
+        return render(request, 'scrap_emploi/emploi_dakar_detail.html', context)
+
+    return detail_response(request, CrawlState.SOURCE_EMPLOIDAKAR, EmploiDakar, emploi_id, build)
 
 
 def senjob_list(request):
-    scrape_senjob()
-    offres_list = SenjobModel.objects.all().order_by('-date_publication')
-    paginator = Paginator(offres_list, 10)  # 10 offres par page
-    
-    page = request.GET.get('page')
-    offres = paginator.get_page(page)
-    
-    return render(request, 'scrap_emploi/senjob_list.html', {'offres': offres})
+    derniere_actualisation = revalidate_source(CrawlState.SOURCE_SENJOB, scrape_senjob_periodic)
 
+    def build():
+        offres_list = SenjobModel.objects.only(*CARD_FIELDS, 'localisation', 'type_contrat', 'date_expiration')
+        paginator = KeysetPaginator(offres_list, 10)  # 10 offres par page
+        offres = paginator.get_page(request.GET)
+        return paginated_response(request, 'scrap_emploi/senjob_list.html', {
+            'offres': offres,
+            'derniere_actualisation': derniere_actualisation,
+        }, offres)
 
-def senjob_detail(request, offre_id):
-    offre = get_object_or_404(SenjobModel, id=offre_id)
-    return render(request, 'scrap_emploi/senjob_detail.html', {'offre': offre})
+    return list_response(request, CrawlState.SOURCE_SENJOB, build)
 
 
-def offre_emploi_sn_list(request):
-    scrape_offre_emploi_sn()
-    offres_list = OffreEmploiSN.objects.all().order_by('-date_publication')
-    paginator = Paginator(offres_list, 10)  # 10 offres par page
-    
-    page = request.GET.get('page')
-    offres = paginator.get_page(page)
-    
-    return render(request, 'scrap_emploi/offre_emploi_sn_list.html', {'offres': offres})
+def senjob_detail(request, offre_id):
+    def build():
+        offre = get_object_or_404(SenjobModel.objects.select_related('contenu'), id=offre_id)
+        return render(request, 'scrap_emploi/senjob_detail.html', {'offre': offre})
 
+    # Le template contient l'URL absolue de la page
+    return detail_response(request, CrawlState.SOURCE_SENJOB, SenjobModel, offre_id, build, vary_host=True)
 
-def offre_emploi_sn_detail(request, offre_id):
-    offre = get_object_or_404(OffreEmploiSN, id=offre_id)
-    return render(request, 'scrap_emploi/offre_emploi_sn_detail.html', {'offre': offre})
 
+def offre_emploi_sn_list(request):
+    derniere_actualisation = revalidate_source(CrawlState.SOURCE_OFFRE_EMPLOI_SN, scrape_offre_emploi_sn_periodic)
 
+    def build():
+        offres_list = OffreEmploiSN.objects.only(*CARD_FIELDS, 'lieu')
+        paginator = KeysetPaginator(offres_list, 10)  # 10 offres par page
+        offres = paginator.get_page(request.GET)
+        return paginated_response(request, 'scrap_emploi/offre_emploi_sn_list.html', {
+            'offres': offres,
+            'derniere_actualisation': derniere_actualisation,
+        }, offres)
 
+    return list_response(request, CrawlState.SOURCE_OFFRE_EMPLOI_SN, build)
 
 
+def offre_emploi_sn_detail(request, offre_id):
+    def build():
+        offre = get_object_or_404(OffreEmploiSN.objects.select_related('contenu'), id=offre_id)
+        return render(request, 'scrap_emploi/offre_emploi_sn_detail.html', {'offre': offre})
+
+    # Le template contient l'URL absolue de la page
+    return detail_response(request, CrawlState.SOURCE_OFFRE_EMPLOI_SN, OffreEmploiSN, offre_id, build, vary_host=True)
+
+
+def offres_list(request):
+    """Offres de toutes les sources (index commun OffreIndex), éventuellement filtrées par source."""
+    source = request.GET.get('source')
+    if source not in SOURCE_MODELS:
+        source = None
+
+    def build():
+        offres_list = OffreIndex.objects.only(*CARD_FIELDS, 'source', 'offre_id', 'lieu', 'type_contrat')
+        if source:
+            offres_list = offres_list.filter(source=source)
+        # Total d'une source : nombre d'offres de sa table
+        paginator = KeysetPaginator(offres_list, 20, count_model=SOURCE_MODELS[source] if source else None)
+        offres = paginator.get_page(request.GET)
+        return paginated_response(request, 'scrap_emploi/offres_list.html', {
+            'offres': offres,
+            'source': source,
+            'sources': CrawlState.SOURCE_CHOICES,
+        }, offres)
+
+    return index_response(request, build)
+
+
+def recherche(request):
+    """Recherche en texte intégral dans les offres de toutes les sources (voir utils/offerSearch.py)."""
+    query = request.GET.get('q', '').strip()
+    source = request.GET.get('source')
+    if source not in SOURCE_MODELS:
+        source = None
+    try:
+        page = min(max(int(request.GET.get('page', 1)), 1), settings.SCRAP_SEARCH_MAX_PAGE)
+    except ValueError:
+        page = 1
+    per_page = 20
+
+    def build():
+        # Une offre de plus que la page : indique s'il existe une page suivante
+        offres = search(query, source, limit=per_page + 1, offset=(page - 1) * per_page)
+        return render(request, 'scrap_emploi/recherche.html', {
+            'q': query,
+            'source': source,
+            'sources': CrawlState.SOURCE_CHOICES,
+            'offres': offres[:per_page],
+            'page': page,
+            'has_previous': page > 1,
+            'has_next': len(offres) > per_page and page < settings.SCRAP_SEARCH_MAX_PAGE,
+            'filtre': filter_query(request, ('page',)),
+        })
+
+    return index_response(request, build)